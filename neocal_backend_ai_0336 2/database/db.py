@@ -1,5 +1,8 @@
 import os
-from sqlalchemy import create_engine
+from contextlib import asynccontextmanager
+
+import anyio
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 # Use DATABASE_URL env var when provided (e.g., postgres://...).
@@ -17,10 +20,23 @@ else:
     DATABASE_URL = f"sqlite:///{default_sqlite_path}"
 
 # SQLAlchemy engine
-engine_kwargs = {"echo": False}
-connect_args = None
-if DATABASE_URL.startswith("sqlite"):
+# Route handlers run in the threadpool, so size the connection pool to
+# match the number of threads that may hold a session concurrently.
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "20"))
+engine_kwargs = {
+    "echo": False,
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+}
+connect_args = {}
+is_sqlite = DATABASE_URL.startswith("sqlite")
+if is_sqlite:
     connect_args = {"check_same_thread": False}
+    if ":memory:" in DATABASE_URL or DATABASE_URL in ("sqlite://", "sqlite:///"):
+        # In-memory SQLite uses a singleton pool that takes no sizing args
+        engine_kwargs.pop("pool_size")
+        engine_kwargs.pop("max_overflow")
 
 engine = create_engine(
     DATABASE_URL,
@@ -28,6 +44,18 @@ engine = create_engine(
     **engine_kwargs,
 )
 
+if is_sqlite:
+    @event.listens_for(engine, "connect")
+    def _configure_sqlite(dbapi_connection, connection_record):
+        # WAL lets readers proceed while a writer commits, and busy_timeout
+        # makes concurrent writers wait instead of failing with "locked".
+        cursor = dbapi_connection.cursor()
+        if os.environ.get("SQLITE_WAL", "1") == "1":
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000'))}")
+        cursor.close()
+
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -35,9 +63,37 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 # FastAPI dependency for DB session
-def get_db():
-    db = SessionLocal()
-    try:
+# Each request's session may hold a pooled connection from its first query
+# until teardown, including while it waits for a threadpool slot to run the
+# handler or serialize the response. Capping open sessions at the pool
+# capacity means those waits can never exhaust the pool, so excess requests
+# queue here on the event loop instead of timing out inside a worker thread.
+_session_slots = None
+
+@asynccontextmanager
+async def session_scope():
+    """A session holding one of the capped slots, for code outside ``get_db``.
+
+    Handlers that wait a long time between queries (image inference) use
+    this to hold a slot only around the queries themselves.
+    """
+    global _session_slots
+    if _session_slots is None:
+        _session_slots = anyio.Semaphore(DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    async with _session_slots:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            # Closing rolls back and returns the connection to the pool,
+            # which is blocking I/O, so keep it off the event loop; shielded
+            # so a cancelled request still releases its connection
+            with anyio.CancelScope(shield=True):
+                if db.in_transaction():
+                    await anyio.to_thread.run_sync(db.close)
+                else:
+                    db.close()  # holds no connection; nothing to wait on
+
+async def get_db():
+    async with session_scope() as db:
         yield db
-    finally:
-        db.close()
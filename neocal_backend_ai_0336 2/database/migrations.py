@@ -0,0 +1,56 @@
+"""
+Lightweight schema upgrades for existing databases.
+
+``Base.metadata.create_all`` only creates missing tables, so databases
+created before an index was declared on a model never receive it. This
+module backfills any index declared in the ORM metadata that is missing
+from the live database. It works for both SQLite and Postgres and is safe
+to run repeatedly.
+
+Run manually with:
+    python -m database.migrations
+"""
+
+import logging
+from typing import List
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+
+from database.db import Base, engine as default_engine
+
+logger = logging.getLogger(__name__)
+
+
+def ensure_indexes(engine: Engine = default_engine) -> List[str]:
+    """Create every ORM-declared index missing from the database.
+
+    Returns the names of the indexes that were created.
+    """
+    # Import models so their tables/indexes are registered on Base.metadata
+    from models import database  # noqa: F401
+
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    created: List[str] = []
+
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in existing:
+                    continue
+                index.create(bind=conn, checkfirst=True)
+                created.append(index.name)
+                logger.info("Created index %s on %s", index.name, table.name)
+
+    return created
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    Base.metadata.create_all(bind=default_engine)
+    names = ensure_indexes()
+    print(f"Created {len(names)} index(es): {', '.join(names) or 'none'}")
@@ -79,6 +79,32 @@ CREATE INDEX idx_meals_user ON meals(user_id);
 CREATE INDEX idx_food_items_meal ON food_items(meal_id);
 CREATE INDEX idx_sessions_user ON sessions(user_id);
 CREATE INDEX idx_sessions_token ON sessions(token);
+CREATE INDEX idx_sessions_expires_at ON sessions(expires_at);
 CREATE INDEX idx_water_logs_user_timestamp ON water_logs(user_id, timestamp);
 CREATE INDEX idx_exercise_logs_user_timestamp ON exercise_logs(user_id, timestamp);
 CREATE INDEX idx_weight_logs_user_timestamp ON weight_logs(user_id, timestamp);
+
+CREATE TABLE foods (
+    food_key TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    calories REAL NOT NULL,
+    protein_g REAL NOT NULL,
+    carbs_g REAL NOT NULL,
+    fat_g REAL NOT NULL,
+    source TEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE user_food_stats (
+    user_id TEXT NOT NULL,
+    food_key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    last_grams REAL,
+    last_logged_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (user_id, food_key),
+    FOREIGN KEY (user_id) REFERENCES users(user_id)
+);
+
+CREATE INDEX idx_user_food_stats_recent ON user_food_stats(user_id, last_logged_at);
+CREATE INDEX idx_user_food_stats_frequent ON user_food_stats(user_id, count);
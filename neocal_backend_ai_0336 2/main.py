@@ -1,17 +1,55 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+import anyio
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.formparsers import MultiPartParser
 from database.db import engine, Base
+from database.migrations import ensure_indexes
+from services.http_clients import close_http_clients, open_http_clients, provider_stats
+from services.food_catalogue import refresh_catalogue
+from services.food_search import get_search_index
+from services.inference import inference_stats, shutdown_executors
+from services.warmup import PRELOAD_MODELS, readiness, warm_up_models
 import os
 
 # Import models to ensure they are registered before creating tables
 from models import database
 
 Base.metadata.create_all(bind=engine)
+ensure_indexes(engine)
+
+# Sync route handlers and run_in_threadpool share anyio's default limiter;
+# keep it in line with the DB connection pool (DB_POOL_SIZE + DB_MAX_OVERFLOW).
+THREADPOOL_SIZE = int(os.environ.get("THREADPOOL_SIZE", "40"))
+
+# Multipart uploads stay in memory up to this size and spill to a temp
+# file beyond it; the file is deleted when the upload is closed.
+MultiPartParser.spool_max_size = int(os.environ.get("UPLOAD_SPOOL_MAX_BYTES", str(1024 * 1024)))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    open_http_clients()
+    # Nutrition lookups and food search read an in-memory copy of the foods table
+    await anyio.to_thread.run_sync(refresh_catalogue)
+    await anyio.to_thread.run_sync(get_search_index)
+    # Warm models in the background so /health answers while they load
+    warmup = asyncio.create_task(warm_up_models(PRELOAD_MODELS))
+    yield
+    readiness.state = "stopping"
+    warmup.cancel()
+    await close_http_clients()
+    shutdown_executors()
+
 
 app = FastAPI(
     title="NeoCal AI Backend",
     description="Calorie tracking API with AI meal recognition",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -36,6 +74,26 @@ app.include_router(weight.router)
 async def health():
     return {"status": "ok"}
 
+@app.get("/ready")
+async def ready(response: Response):
+    """Readiness for load balancers: 503 until configured models are warm."""
+    if not readiness.is_ready:
+        response.status_code = 503
+    return readiness.stats()
+
+@app.get("/metrics")
+async def metrics():
+    from services.auth import token_cache, password_hash_stats
+    from services.nutrition_service import nutrition_cache
+    return {
+        "token_cache": token_cache.stats(),
+        "nutrition_cache": nutrition_cache.stats(),
+        "password_hashing": password_hash_stats(),
+        "inference": inference_stats(),
+        "providers": provider_stats(),
+        "readiness": readiness.stats(),
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
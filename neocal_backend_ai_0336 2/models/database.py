@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Float, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, Integer, Float, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database.db import Base
@@ -30,6 +30,10 @@ class Session(Base):
     
     user = relationship("User", back_populates="sessions")
 
+    __table_args__ = (
+        Index("idx_sessions_expires_at", "expires_at"),
+    )
+
 class Meal(Base):
     __tablename__ = "meals"
     
@@ -48,6 +52,10 @@ class Meal(Base):
     user = relationship("User", back_populates="meals")
     food_items = relationship("FoodItem", back_populates="meal", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("idx_meals_user_timestamp", "user_id", "timestamp"),
+    )
+
 class FoodItem(Base):
     __tablename__ = "food_items"
     
@@ -64,6 +72,43 @@ class FoodItem(Base):
     
     meal = relationship("Meal", back_populates="food_items", cascade_backrefs=False)
 
+    __table_args__ = (
+        Index("idx_food_items_meal", "meal_id"),
+    )
+
+
+class Food(Base):
+    """Nutrition catalogue entry; values are per 100 g."""
+    __tablename__ = "foods"
+
+    # normalised name (services.food_names.normalize_name); the upsert key
+    food_key = Column(String, primary_key=True)
+    name = Column(String, nullable=False)
+    calories = Column(Float, nullable=False)
+    protein_g = Column(Float, nullable=False)
+    carbs_g = Column(Float, nullable=False)
+    fat_g = Column(Float, nullable=False)
+    source = Column(String)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class UserFoodStat(Base):
+    """How often and how recently a user logged a food; kept by _create_meal."""
+    __tablename__ = "user_food_stats"
+
+    user_id = Column(String, ForeignKey("users.user_id"), primary_key=True)
+    # catalogue key when known, else the normalised name
+    food_key = Column(String, primary_key=True)
+    name = Column(String, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    last_grams = Column(Float)
+    last_logged_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("idx_user_food_stats_recent", "user_id", "last_logged_at"),
+        Index("idx_user_food_stats_frequent", "user_id", "count"),
+    )
+
 
 class WaterLog(Base):
     __tablename__ = "water_logs"
@@ -76,6 +121,10 @@ class WaterLog(Base):
     
     user = relationship("User", back_populates="water_logs")
 
+    __table_args__ = (
+        Index("idx_water_logs_user_timestamp", "user_id", "timestamp"),
+    )
+
 
 class ExerciseLog(Base):
     __tablename__ = "exercise_logs"
@@ -90,6 +139,10 @@ class ExerciseLog(Base):
     
     user = relationship("User", back_populates="exercise_logs")
 
+    __table_args__ = (
+        Index("idx_exercise_logs_user_timestamp", "user_id", "timestamp"),
+    )
+
 
 class WeightLog(Base):
     __tablename__ = "weight_logs"
@@ -101,3 +154,7 @@ class WeightLog(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     
     user = relationship("User", back_populates="weight_logs")
+
+    __table_args__ = (
+        Index("idx_weight_logs_user_timestamp", "user_id", "timestamp"),
+    )
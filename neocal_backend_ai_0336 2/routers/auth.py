@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Header, Response, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from database.db import get_db
 from models.schemas import UserRegistrationRequest, UserLoginRequest, AuthResponse, UserProfileResponse, ProfileUpdateRequest
-from services.auth import create_user, authenticate_user, create_session, get_user, get_user_by_email
+from services.auth import (
+    create_user, authenticate_user_async, create_session, get_user,
+    get_user_by_email, hash_password_async, revoke_session
+)
 
 router = APIRouter(tags=["auth"])
 
@@ -12,18 +16,21 @@ async def register_user(request: UserRegistrationRequest, db: Session = Depends(
     Register a new user account.
     """
     # Check if user already exists
-    existing_user = get_user_by_email(db, request.email)
+    existing_user = await run_in_threadpool(get_user_by_email, db, request.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
 
-    # Create new user
-    user = create_user(db, request.email, request.password)
+    # Create new user (bcrypt runs on the password-hash pool, not the loop)
+    hashed_password = await hash_password_async(request.password)
+    user = await run_in_threadpool(
+        create_user, db, request.email, hashed_password=hashed_password
+    )
 
     # Create session for the new user
-    db_session = create_session(db, user.user_id)
+    db_session = await run_in_threadpool(create_session, db, user.user_id)
 
     return AuthResponse(
         token=db_session.token,
@@ -36,7 +43,7 @@ async def login_user(request: UserLoginRequest, db: Session = Depends(get_db)):
     """
     Authenticate user and return session token.
     """
-    user = authenticate_user(db, request.email, request.password)
+    user = await authenticate_user_async(db, request.email, request.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -44,7 +51,7 @@ async def login_user(request: UserLoginRequest, db: Session = Depends(get_db)):
         )
 
     # Create new session
-    db_session = create_session(db, user.user_id)
+    db_session = await run_in_threadpool(create_session, db, user.user_id)
 
     return AuthResponse(
         token=db_session.token,
@@ -52,8 +59,23 @@ async def login_user(request: UserLoginRequest, db: Session = Depends(get_db)):
         email=user.email
     )
 
+@router.post("/auth/logout", status_code=204, response_class=Response)
+def logout_user(
+    x_auth_token: str = Header(None, alias="X-Auth-Token"),
+    db: Session = Depends(get_db)
+):
+    """
+    Revoke the current session token.
+    """
+    if not x_auth_token or not revoke_session(db, x_auth_token):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token"
+        )
+    return Response(status_code=204)
+
 @router.get("/auth/profile", response_model=UserProfileResponse)
-async def get_user_profile(user_id: str, db: Session = Depends(get_db)):
+def get_user_profile(user_id: str, db: Session = Depends(get_db)):
     """
     Get user profile information.
     """
@@ -71,7 +93,7 @@ async def get_user_profile(user_id: str, db: Session = Depends(get_db)):
     )
 
 @router.put("/auth/profile", response_model=UserProfileResponse)
-async def update_user_profile(
+def update_user_profile(
     request: ProfileUpdateRequest,
     user_id: str,
     db: Session = Depends(get_db)
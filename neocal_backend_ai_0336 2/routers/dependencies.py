@@ -0,0 +1,61 @@
+from fastapi import Depends, Header, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from database.db import get_db, session_scope
+from services.auth import token_cache, verify_token
+
+
+def get_current_user(
+    x_auth_token: str = Header(None, alias="X-Auth-Token"),
+    db: Session = Depends(get_db),
+) -> str:
+    """
+    Extract and verify user from authentication token.
+
+    Shared by every authenticated router; ``verify_token`` answers repeat
+    tokens from its in-process cache without touching the database.
+    """
+    if not x_auth_token:
+        raise HTTPException(
+            status_code=401,
+            detail="Authentication required"
+        )
+
+    user_id = verify_token(db, x_auth_token)
+    if not user_id:
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid or expired token"
+        )
+
+    return user_id
+
+
+async def get_current_user_released(
+    x_auth_token: str = Header(None, alias="X-Auth-Token"),
+) -> str:
+    """
+    Like ``get_current_user``, but returns the DB session before the handler runs.
+
+    ``get_db`` keeps its slot and pooled connection until the response is
+    sent. Handlers that spend most of their time waiting on inference use
+    this instead, and open ``session_scope()`` only for their own writes.
+    """
+    if not x_auth_token:
+        raise HTTPException(
+            status_code=401,
+            detail="Authentication required"
+        )
+
+    user_id = token_cache.get(x_auth_token)
+    if user_id is None:
+        async with session_scope() as db:
+            user_id = await run_in_threadpool(verify_token, db, x_auth_token)
+    if not user_id:
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid or expired token"
+        )
+
+    return user_id
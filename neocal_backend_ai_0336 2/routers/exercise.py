@@ -1,11 +1,11 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Response, Header
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
 from database.db import get_db
 from models.schemas import ExerciseLogRequest, ExerciseLogResponse
-from services.auth import verify_token
+from routers.dependencies import get_current_user
 from services.exercise_service import (
     create_exercise_log,
     delete_exercise_log,
@@ -15,31 +15,8 @@ from services.exercise_service import (
 router = APIRouter(tags=["exercise"])
 
 
-async def get_current_user(
-    x_auth_token: str = Header(None, alias="X-Auth-Token"),
-    db: Session = Depends(get_db),
-) -> str:
-    """
-    Extract and verify user from authentication token.
-    """
-    if not x_auth_token:
-        raise HTTPException(
-            status_code=401,
-            detail="Authentication required"
-        )
-
-    user_id = verify_token(db, x_auth_token)
-    if not user_id:
-        raise HTTPException(
-            status_code=401,
-            detail="Invalid or expired token"
-        )
-
-    return user_id
-
-
 @router.post("/exercise", response_model=ExerciseLogResponse, status_code=201)
-async def log_exercise(
+def log_exercise(
     request: ExerciseLogRequest,
     user_id: str = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -59,7 +36,7 @@ async def log_exercise(
 
 
 @router.get("/exercise", response_model=List[ExerciseLogResponse])
-async def list_exercises(
+def list_exercises(
     date: Optional[str] = Query(None, description="Filter logs for a given date (YYYY-MM-DD)"),
     user_id: str = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -71,7 +48,7 @@ async def list_exercises(
 
 
 @router.delete("/exercise/{exercise_log_id}", status_code=204, response_class=Response)
-async def remove_exercise_log(
+def remove_exercise_log(
     exercise_log_id: str,
     user_id: str = Depends(get_current_user),
     db: Session = Depends(get_db),
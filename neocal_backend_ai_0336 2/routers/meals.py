@@ -1,80 +1,110 @@
+import os
 from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Response, Header
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from database.db import get_db
+from database.db import get_db, session_scope
 from models.schemas import (
     MealResponse, TextMealRequest, ImageMealRequest,
     BarcodeMealRequest, DailySummaryResponse, Food
 )
-from services.auth import verify_token
+from routers.dependencies import get_current_user, get_current_user_released
 from services.meal_service import (
-    create_meal_from_text, create_meal_from_image,
+    create_meal_from_text, create_meal_from_parsed_image,
     create_meal_from_barcode, get_meal_by_id, get_meals_for_date,
     get_meals_for_range, create_meal_from_structured,
     delete_meal
 )
 from services.summary_service import get_daily_summary
+from services.food_history import recent_foods, search_boosts
+from services.food_search import search_foods
+from services.ai_service import TEXT_PARSE_TIMEOUT
+from services.inference import (
+    InferenceBusyError, InferenceTimeoutError, parse_image_meal_async
+)
 
 router = APIRouter(tags=["meals"])
 
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", str(15 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_SEARCH_LIMIT = 100
+# Text-parsing budget for /meals/from-text; past it the keyword parser answers
+FROM_TEXT_PARSE_TIMEOUT = float(os.environ.get("FROM_TEXT_PARSE_TIMEOUT", str(TEXT_PARSE_TIMEOUT)))
 
-# --- Auth Dependency (must be above all route definitions) ---
-async def get_current_user(
-    x_auth_token: str = Header(None, alias="X-Auth-Token"),
-    db: Session = Depends(get_db),
-) -> str:
-    """
-    Extract and verify user from authentication token.
-    """
-    if not x_auth_token:
-        raise HTTPException(
-            status_code=401,
-            detail="Authentication required"
-        )
 
-    user_id = verify_token(db, x_auth_token)
-    if not user_id:
+async def _read_upload(file: UploadFile) -> bytes:
+    """Read an upload into memory, rejecting anything over MAX_UPLOAD_BYTES."""
+    chunks = []
+    size = 0
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > MAX_UPLOAD_BYTES:
+                raise HTTPException(status_code=413, detail="Image is too large")
+            chunks.append(chunk)
+    finally:
+        # Drops the spooled temp file (if the upload was large enough to
+        # have one) now rather than when the response is done.
+        await file.close()
+    return b"".join(chunks)
+
+
+async def _recognize_image(file: UploadFile, user_id: str) -> list:
+    """Run image recognition on the inference pools, mapping overload to HTTP errors."""
+    contents = await _read_upload(file)
+    try:
+        return await parse_image_meal_async(contents, user_id=user_id, filename=file.filename)
+    except InferenceBusyError:
         raise HTTPException(
-            status_code=401,
-            detail="Invalid or expired token"
+            status_code=503,
+            detail="Image recognition is busy, please retry shortly",
+            headers={"Retry-After": "2"},
         )
-
-    return user_id
+    except InferenceTimeoutError:
+        raise HTTPException(status_code=504, detail="Image recognition timed out")
 
 
 # --- Food Search Endpoint ---
 @router.get("/meals/search")
-async def search_food(
+def search_food(
     q: str = Query(..., description="Search query for food name"),
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_LIMIT, description="Results per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     user_id: str = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    # Use nutrition database for search
-    from services.nutrition_service import NUTRITION_DATABASE
-    results = []
-    for key, nutrition in NUTRITION_DATABASE.items():
-        if q.lower() in key.replace('_', ' '):
-            results.append({
-                "id": key,
-                "name": key.replace('_', ' ').title(),
-                "serving": "100g",
-                "calories": nutrition.get("calories", 0),
-                "protein": nutrition.get("protein_g", 0),
-                "carbs": nutrition.get("carbs_g", 0),
-                "fat": nutrition.get("fat_g", 0)
-            })
+    # The cursor is the offset into the ranked results
+    try:
+        offset = int(cursor) if cursor else 0
+    except ValueError:
+        offset = -1
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # Foods the user logs often and lately rank first
+    boosts = search_boosts(db, user_id)
+    results, has_more = search_foods(q, limit=limit, offset=offset, boosts=boosts)
     # Always return 200 OK with results (even if empty)
-    return {"results": results}
+    return {"results": results, "next_cursor": str(offset + limit) if has_more else None}
+
+
+@router.get("/meals/recent-foods")
+def get_recent_foods(
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_LIMIT),
+    order: str = Query("recent", pattern="^(recent|frequent)$", description="recent or frequent"),
+    user_id: str = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    return {"results": recent_foods(db, user_id, limit=limit, order=order)}
 
 
 @router.post("/meals/from-text", response_model=MealResponse, status_code=201)
-async def log_meal_from_text(
+def log_meal_from_text(
     request: TextMealRequest,
     user_id: str = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     try:
-        return create_meal_from_text(db, user_id, request.description)
+        return create_meal_from_text(db, user_id, request.description, timeout=FROM_TEXT_PARSE_TIMEOUT)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -82,26 +112,18 @@ async def log_meal_from_text(
 @router.post("/meals/from-image", response_model=MealResponse, status_code=201)
 async def log_meal_from_image(
     file: UploadFile = File(...),
-    user_id: str = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user_id: str = Depends(get_current_user_released),
 ):
     try:
-        import os
-        import uuid
-
-        # Save uploaded file to a temp path
-        ext = (file.filename or "jpg").split(".")[-1]
-        filename = f"neocal_upload_{uuid.uuid4().hex}.{ext}"
-        tmp_dir = "/tmp"
-        os.makedirs(tmp_dir, exist_ok=True)
-        filepath = os.path.join(tmp_dir, filename)
-
-        contents = await file.read()
-        with open(filepath, "wb") as f:
-            f.write(contents)
-
-        # Pass local file path into the existing AI pipeline
-        return create_meal_from_image(db, user_id, filepath)
+        # Recognise on the inference pools without holding a DB session,
+        # then open one just for the write
+        parsed = await _recognize_image(file, user_id)
+        async with session_scope() as db:
+            return await run_in_threadpool(
+                create_meal_from_parsed_image, db, user_id, file.filename or "upload", parsed
+            )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -109,8 +131,7 @@ async def log_meal_from_image(
 @router.post("/meals/scan", response_model=List[Food])
 async def scan_meal_image(
     file: UploadFile = File(...),
-    user_id: str = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    user_id: str = Depends(get_current_user_released),
 ) -> List[Food]:
     """Upload an image and return parsed foods with nutrition estimates.
 
@@ -118,50 +139,36 @@ async def scan_meal_image(
     parse result and estimated nutrition so the client can preview.
     """
     try:
-        import os
-        import uuid
-
-        # Save uploaded file to a temp path
-        ext = (file.filename or "jpg").split(".")[-1]
-        filename = f"neocal_scan_{uuid.uuid4().hex}.{ext}"
-        tmp_dir = "/tmp"
-        os.makedirs(tmp_dir, exist_ok=True)
-        filepath = os.path.join(tmp_dir, filename)
-
-        contents = await file.read()
-        with open(filepath, "wb") as f:
-            f.write(contents)
-
         # Use AI service to parse image (may call OpenAI/HF/local fallback)
-        from services.ai_service import parse_image_meal
-        from services.nutrition_service import lookup_food_nutrition, scale_nutrition_by_grams
+        from services.nutrition_service import nutrition_for_grams
 
-        parsed = parse_image_meal(filepath)
+        parsed = await _recognize_image(file, user_id)
         results: List[Food] = []
         for item in parsed:
             name = item.get("name", "meal")
             grams = float(item.get("grams", 250) or 250)
-            nutrition = lookup_food_nutrition(name)
-            scaled = scale_nutrition_by_grams(nutrition, grams)
+            calories, protein, carbs, fat = nutrition_for_grams(name, grams, item.get("nutrition_key"))
             food_obj = {
                 "name": name,
                 "grams": grams,
-                "calories": scaled.get("calories", 0),
-                "protein_g": scaled.get("protein_g", 0),
-                "carbs_g": scaled.get("carbs_g", 0),
-                "fat_g": scaled.get("fat_g", 0),
+                "calories": calories,
+                "protein_g": protein,
+                "carbs_g": carbs,
+                "fat_g": fat,
                 "model_label": item.get("model_label", name.replace(" ", "_")),
                 "confidence": float(item.get("confidence", 0.7)),
             }
             results.append(Food(**food_obj))
 
         return results
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/meals/from-barcode", response_model=MealResponse, status_code=201)
-async def log_meal_from_barcode(
+def log_meal_from_barcode(
     request: BarcodeMealRequest,
     user_id: str = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -179,7 +186,7 @@ async def log_meal_from_barcode(
 
 
 @router.get("/meals/history", response_model=List[MealResponse])
-async def meals_history(
+def meals_history(
     date: Optional[str] = Query(None),
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
@@ -203,7 +210,7 @@ async def meals_history(
 
 
 @router.post("/meals", response_model=MealResponse, status_code=201)
-async def create_meal_manual(
+def create_meal_manual(
     foods: List[dict],
     user_id: str = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -219,7 +226,7 @@ async def create_meal_manual(
 
 
 @router.get("/meals/{meal_id}", response_model=MealResponse)
-async def get_meal(
+def get_meal(
     meal_id: str,
     user_id: str = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -231,7 +238,7 @@ async def get_meal(
 
 
 @router.delete("/meals/{meal_id}", status_code=204, response_class=Response)
-async def remove_meal(
+def remove_meal(
     meal_id: str,
     user_id: str = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -243,7 +250,7 @@ async def remove_meal(
 
 
 @router.get("/meals", response_model=List[MealResponse])
-async def list_meals(
+def list_meals(
     date: str = Query(...),
     user_id: str = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -258,7 +265,7 @@ async def list_meals(
 
 
 @router.get("/summary/day", response_model=DailySummaryResponse)
-async def get_day_summary(
+def get_day_summary(
     date: str = Query(...),
     user_id: str = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -6,7 +6,7 @@ from services.auth import verify_token, get_user
 
 router = APIRouter(tags=["user"])
 
-async def get_current_user(db: Session = Depends(get_db)) -> str:
+def get_current_user(db: Session = Depends(get_db)) -> str:
     """
     Auth disabled: always return a shared demo user via verify_token.
 
@@ -16,7 +16,7 @@ async def get_current_user(db: Session = Depends(get_db)) -> str:
     return verify_token(db, "")
 
 @router.get("/user/profile", response_model=UserProfileResponse)
-async def get_profile(user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
+def get_profile(user_id: str = Depends(get_current_user), db: Session = Depends(get_db)):
     user = get_user(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -28,7 +28,7 @@ async def get_profile(user_id: str = Depends(get_current_user), db: Session = De
     )
 
 @router.put("/user/profile", response_model=UserProfileResponse)
-async def update_profile(
+def update_profile(
     request: ProfileUpdateRequest,
     user_id: str = Depends(get_current_user),
     db: Session = Depends(get_db)
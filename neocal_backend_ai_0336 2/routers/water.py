@@ -1,11 +1,11 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Response, Header
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
 from database.db import get_db
 from models.schemas import WaterLogRequest, WaterLogResponse
-from services.auth import verify_token
+from routers.dependencies import get_current_user
 from services.water_service import (
     create_water_log,
     delete_water_log,
@@ -14,31 +14,8 @@ from services.water_service import (
 router = APIRouter(tags=["water"])
 
 
-async def get_current_user(
-    x_auth_token: str = Header(None, alias="X-Auth-Token"),
-    db: Session = Depends(get_db),
-) -> str:
-    """
-    Extract and verify user from authentication token.
-    """
-    if not x_auth_token:
-        raise HTTPException(
-            status_code=401,
-            detail="Authentication required"
-        )
-
-    user_id = verify_token(db, x_auth_token)
-    if not user_id:
-        raise HTTPException(
-            status_code=401,
-            detail="Invalid or expired token"
-        )
-
-    return user_id
-
-
 @router.post("/water", response_model=WaterLogResponse, status_code=201)
-async def log_water(
+def log_water(
     request: WaterLogRequest,
     user_id: str = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -56,7 +33,7 @@ async def log_water(
 
 
 @router.get("/water", response_model=List[WaterLogResponse])
-async def list_water_logs(
+def list_water_logs(
     date: Optional[str] = Query(None, description="Filter logs for a given date (YYYY-MM-DD)"),
     user_id: str = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -68,7 +45,7 @@ async def list_water_logs(
 
 
 @router.delete("/water/{water_log_id}", status_code=204, response_class=Response)
-async def remove_water_log(
+def remove_water_log(
     water_log_id: str,
     user_id: str = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -1,11 +1,11 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Response, Header
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
 from database.db import get_db
 from models.schemas import WeightLogRequest, WeightLogResponse
-from services.auth import verify_token
+from routers.dependencies import get_current_user
 from services.weight_service import (
     create_weight_log,
     delete_weight_log,
@@ -15,31 +15,8 @@ from services.weight_service import (
 router = APIRouter(tags=["weight"])
 
 
-async def get_current_user(
-    x_auth_token: str = Header(None, alias="X-Auth-Token"),
-    db: Session = Depends(get_db),
-) -> str:
-    """
-    Extract and verify user from authentication token.
-    """
-    if not x_auth_token:
-        raise HTTPException(
-            status_code=401,
-            detail="Authentication required"
-        )
-
-    user_id = verify_token(db, x_auth_token)
-    if not user_id:
-        raise HTTPException(
-            status_code=401,
-            detail="Invalid or expired token"
-        )
-
-    return user_id
-
-
 @router.post("/weight", response_model=WeightLogResponse, status_code=201)
-async def log_weight(
+def log_weight(
     request: WeightLogRequest,
     user_id: str = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -57,7 +34,7 @@ async def log_weight(
 
 
 @router.get("/weight", response_model=List[WeightLogResponse])
-async def list_weight_logs(
+def list_weight_logs(
     start: Optional[str] = Query(None, description="Start date inclusive (YYYY-MM-DD)"),
     end: Optional[str] = Query(None, description="End date inclusive (YYYY-MM-DD)"),
     user_id: str = Depends(get_current_user),
@@ -70,7 +47,7 @@ async def list_weight_logs(
 
 
 @router.delete("/weight/{weight_log_id}", status_code=204, response_class=Response)
-async def remove_weight_log(
+def remove_weight_log(
     weight_log_id: str,
     user_id: str = Depends(get_current_user),
     db: Session = Depends(get_db),
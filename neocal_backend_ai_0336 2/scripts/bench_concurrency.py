@@ -0,0 +1,90 @@
+"""
+Concurrency benchmark for the NeoCal API.
+
+Fires a mixed read/write workload (POST /water, GET /water, GET /meals,
+GET /summary/day) from many concurrent clients against a running backend
+and reports throughput and latency percentiles.
+
+Usage:
+  uvicorn main:app --port 8000 &
+  python scripts/bench_concurrency.py --clients 200 --requests 20
+
+Set BACKEND_URL to target another host.
+"""
+
+import argparse
+import os
+import secrets
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+BASE_URL = os.environ.get("BACKEND_URL", "http://127.0.0.1:8000").rstrip("/")
+
+
+def register(session: requests.Session) -> str:
+    resp = session.post(
+        f"{BASE_URL}/auth/register",
+        json={"email": f"bench_{secrets.token_hex(6)}@example.com", "password": "bench-pass"},
+        timeout=60,
+    )
+    resp.raise_for_status()
+    return resp.json()["token"]
+
+
+def client(token: str, n_requests: int) -> list:
+    today = datetime.utcnow().strftime("%Y-%m-%d")
+    headers = {"X-Auth-Token": token}
+    latencies = []
+    with requests.Session() as session:
+        for i in range(n_requests):
+            kind = i % 4
+            start = time.perf_counter()
+            if kind == 0:
+                resp = session.post(f"{BASE_URL}/water", json={"amount": 250}, headers=headers, timeout=60)
+            elif kind == 1:
+                resp = session.get(f"{BASE_URL}/water", params={"date": today}, headers=headers, timeout=60)
+            elif kind == 2:
+                resp = session.get(f"{BASE_URL}/meals", params={"date": today}, headers=headers, timeout=60)
+            else:
+                resp = session.get(f"{BASE_URL}/summary/day", params={"date": today}, headers=headers, timeout=60)
+            latencies.append((time.perf_counter() - start, resp.status_code))
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=20, help="requests per client")
+    parser.add_argument("--users", type=int, default=20, help="distinct accounts to spread load over")
+    args = parser.parse_args()
+
+    with requests.Session() as session:
+        tokens = [register(session) for _ in range(args.users)]
+
+    print(f"Target: {BASE_URL}  clients={args.clients}  requests/client={args.requests}")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        futures = [
+            pool.submit(client, tokens[i % len(tokens)], args.requests)
+            for i in range(args.clients)
+        ]
+        results = [lat for f in futures for lat in f.result()]
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(lat for lat, _ in results)
+    errors = sum(1 for _, code in results if code >= 400)
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000  # noqa: E731
+
+    print(f"Requests:   {len(results)}  errors: {errors}")
+    print(f"Elapsed:    {elapsed:.2f}s")
+    print(f"Throughput: {len(results) / elapsed:.1f} req/s")
+    print(f"Latency ms: mean={statistics.mean(latencies) * 1000:.1f} "
+          f"p50={pct(0.50):.1f} p95={pct(0.95):.1f} p99={pct(0.99):.1f}")
+
+
+if __name__ == "__main__":
+    main()
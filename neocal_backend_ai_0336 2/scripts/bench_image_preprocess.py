@@ -0,0 +1,157 @@
+"""
+Benchmark of vision-provider payloads with and without image preprocessing.
+
+For each photo, compares the raw upload with the output of
+``ai_service.prepare_vision_image``. It reports the OpenAI JSON payload size
+(base64 data URL), the HuggingFace body size, the preprocessing time, and
+the end-to-end time to prepare and POST each payload.
+
+By default the POSTs go to a local sink server that throttles reads to
+--uplink-mbps, which stands in for the path to the provider. Pass
+--endpoint to post to a real server instead.
+
+Usage:
+  python scripts/bench_image_preprocess.py                 # synthetic 12 MP photo
+  python scripts/bench_image_preprocess.py photo1.jpg photo2.jpg --uplink-mbps 50
+"""
+
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import ai_service  # noqa: E402
+
+
+def synthetic_photo(width: int = 4032, height: int = 3024) -> bytes:
+    """A phone-sized JPEG with sensor-like noise, so it compresses like a real photo."""
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([
+        128 + 80 * np.sin(x / 300.0),
+        128 + 80 * np.cos(y / 250.0),
+        128 + 60 * np.sin((x + y) / 400.0),
+    ], axis=-1)
+    pixels = np.clip(base + rng.normal(0, 12, base.shape), 0, 255).astype(np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(pixels).save(buf, "JPEG", quality=92)
+    return buf.getvalue()
+
+
+def start_sink(uplink_mbps: float) -> ThreadingHTTPServer:
+    bytes_per_second = uplink_mbps * 1_000_000 / 8
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            remaining = int(self.headers.get("Content-Length", 0))
+            start = time.monotonic()
+            received = 0
+            while remaining:
+                chunk = self.rfile.read(min(remaining, 64 * 1024))
+                remaining -= len(chunk)
+                received += len(chunk)
+                # Throttle to the simulated uplink
+                delay = received / bytes_per_second - (time.monotonic() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def openai_body(img_bytes: bytes, mime_type: str = "image/jpeg") -> bytes:
+    return json.dumps(ai_service._openai_vision_payload(img_bytes, mime_type)).encode()
+
+
+def timed(fn, repeat: int) -> tuple:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return result, statistics.median(samples)
+
+
+def bench_photo(name: str, raw: bytes, endpoint: str, repeat: int) -> None:
+    session = requests.Session()
+
+    def send(body: bytes) -> None:
+        session.post(endpoint, data=body, timeout=300).raise_for_status()
+
+    (oa_bytes, oa_mime), oa_prep = timed(lambda: ai_service._openai_vision_image(raw), repeat)
+    (hf_bytes, _), hf_prep = timed(lambda: ai_service._huggingface_vision_image(raw), repeat)
+
+    raw_openai = openai_body(raw)
+    new_openai = openai_body(oa_bytes, oa_mime)
+    _, raw_oa_e2e = timed(lambda: send(openai_body(raw)), repeat)
+    _, new_oa_e2e = timed(lambda: send(openai_body(*ai_service._openai_vision_image(raw))), repeat)
+    _, raw_hf_e2e = timed(lambda: send(raw), repeat)
+    _, new_hf_e2e = timed(lambda: send(ai_service._huggingface_vision_image(raw)[0]), repeat)
+
+    size = Image.open(io.BytesIO(raw)).size
+    print(f"\n{name}: {size[0]}x{size[1]}, {len(raw) / 1e6:.2f} MB")
+    print(f"  {'':12} {'payload before':>15} {'payload after':>15} {'prep':>9} {'e2e before':>11} {'e2e after':>11}")
+    print(
+        f"  {'openai':12} {len(raw_openai) / 1e3:>12.0f} kB {len(new_openai) / 1e3:>12.0f} kB"
+        f" {oa_prep * 1e3:>6.1f} ms {raw_oa_e2e * 1e3:>8.0f} ms {new_oa_e2e * 1e3:>8.0f} ms"
+    )
+    print(
+        f"  {'huggingface':12} {len(raw) / 1e3:>12.0f} kB {len(hf_bytes) / 1e3:>12.0f} kB"
+        f" {hf_prep * 1e3:>6.1f} ms {raw_hf_e2e * 1e3:>8.0f} ms {new_hf_e2e * 1e3:>8.0f} ms"
+    )
+    # OpenAI bills images by 512px tiles after its own downscaling, so
+    # token cost is unchanged; the savings are bandwidth and latency.
+    print(f"  openai image sent as {Image.open(io.BytesIO(oa_bytes)).size}, huggingface as "
+          f"{Image.open(io.BytesIO(hf_bytes)).size}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("images", nargs="*", help="JPEG/PNG/WebP photos (default: a synthetic 12 MP photo)")
+    parser.add_argument("--uplink-mbps", type=float, default=20.0, help="simulated uplink for the local sink")
+    parser.add_argument("--endpoint", help="POST payloads here instead of the local sink")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    sink = None
+    endpoint = args.endpoint
+    if endpoint is None:
+        sink = start_sink(args.uplink_mbps)
+        endpoint = f"http://127.0.0.1:{sink.server_address[1]}/"
+        print(f"Posting to a local sink throttled to {args.uplink_mbps:g} Mbit/s")
+
+    photos = [(path, open(path, "rb").read()) for path in args.images]
+    if not photos:
+        photos = [("synthetic", synthetic_photo())]
+
+    try:
+        for name, raw in photos:
+            bench_photo(name, raw, endpoint, args.repeat)
+    finally:
+        if sink is not None:
+            sink.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Benchmark of the local model backends (see services/onnx_backend.py).
+
+Each backend runs in its own subprocess, so resident memory is measured
+without the other backends' weights. For CLIP it reports load time, peak
+RSS, per-image latency at batch size 1 and CLIP_BATCH_MAX_SIZE, and top-1
+agreement with the torch backend. For GPT-2 it reports load time, peak
+RSS, latency of ``parse_text_meal`` and how often it returns the same
+food names as torch.
+
+The first ONNX run exports (and for onnx-int8 quantises) the models into
+ONNX_CACHE_DIR; load times are reported for the second, cached load.
+
+Usage:
+  python scripts/bench_model_backends.py                     # synthetic images
+  python scripts/bench_model_backends.py photos/*.jpg --models image
+  python scripts/bench_model_backends.py --backends torch,onnx-int8 --repeat 10
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TEXT_CORPUS = [
+    "2 eggs and a slice of toast",
+    "chicken breast with rice and broccoli",
+    "a bowl of oatmeal with banana",
+    "pasta with tomato sauce and a side salad",
+    "greek yogurt with berries",
+    "a cheeseburger and fries",
+    "salmon, quinoa and asparagus",
+    "peanut butter sandwich and an apple",
+]
+
+
+def synthetic_images(count: int = 16):
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    images = []
+    for i in range(count):
+        y, x = np.mgrid[0:480, 0:640]
+        base = np.stack([
+            128 + 100 * np.sin(x / (40.0 + 7 * i)),
+            128 + 100 * np.cos(y / (30.0 + 5 * i)),
+            128 + 80 * np.sin((x + y) / (50.0 + 3 * i)),
+        ], axis=-1)
+        pixels = np.clip(base + rng.normal(0, 10, base.shape), 0, 255).astype(np.uint8)
+        images.append((f"synthetic-{i}", pixels))
+    return images
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def bench_image(paths, repeat: int) -> dict:
+    from PIL import Image
+
+    from services import ai_service
+    from services.inference import CLIP_BATCH_MAX_SIZE
+
+    if paths:
+        images = [(p, Image.open(p).convert("RGB")) for p in paths]
+    else:
+        images = [(name, Image.fromarray(pixels)) for name, pixels in synthetic_images()]
+
+    start = time.perf_counter()
+    model = ai_service.load_image_model()
+    load_seconds = time.perf_counter() - start
+    if model is None:
+        raise SystemExit("image model unavailable (transformers/torch missing?)")
+
+    pil = [image for _, image in images]
+    model(pil[:1])  # first call pays for lazy initialisation
+    single = []
+    for _ in range(repeat):
+        for image in pil:
+            t = time.perf_counter()
+            model([image])
+            single.append(time.perf_counter() - t)
+    batched = []
+    for _ in range(repeat):
+        for i in range(0, len(pil), CLIP_BATCH_MAX_SIZE):
+            chunk = pil[i:i + CLIP_BATCH_MAX_SIZE]
+            t = time.perf_counter()
+            model(chunk)
+            batched.append((time.perf_counter() - t) / len(chunk))
+
+    top1 = [results[0]["label"] for results in model(pil)]
+    return {
+        "load_s": load_seconds,
+        "peak_rss_mb": peak_rss_mb(),
+        "single_ms": [statistics.median(single) * 1e3, percentile(single, 0.95) * 1e3],
+        "batched_ms": [statistics.median(batched) * 1e3, percentile(batched, 0.95) * 1e3],
+        "top1": top1,
+    }
+
+
+def bench_text(repeat: int) -> dict:
+    from services import ai_service
+
+    start = time.perf_counter()
+    model = ai_service.load_text_model()
+    load_seconds = time.perf_counter() - start
+    if model is None:
+        raise SystemExit("text model unavailable (transformers/torch missing?)")
+
+    ai_service.parse_text_meal(TEXT_CORPUS[0])
+    samples, names = [], []
+    for _ in range(repeat):
+        names = []
+        for description in TEXT_CORPUS:
+            t = time.perf_counter()
+            foods = ai_service.parse_text_meal(description)
+            samples.append(time.perf_counter() - t)
+            names.append(sorted(food["name"] for food in foods))
+    return {
+        "load_s": load_seconds,
+        "peak_rss_mb": peak_rss_mb(),
+        "single_ms": [statistics.median(samples) * 1e3, percentile(samples, 0.95) * 1e3],
+        "top1": names,
+    }
+
+
+def child(backend: str, model: str, paths, repeat: int) -> None:
+    os.environ["MODEL_BACKEND"] = backend
+    os.environ.pop("MODEL_SERVER_SOCKET", None)
+    result = bench_image(paths, repeat) if model == "image" else bench_text(repeat)
+    print(json.dumps(result))
+
+
+def run_child(backend: str, model: str, paths, repeat: int) -> dict:
+    cmd = [sys.executable, __file__, "--child", backend, "--models", model, "--repeat", str(repeat), *paths]
+    # Run twice for ONNX: the first run may export/quantise and skews load time
+    runs = 2 if backend != "torch" else 1
+    for _ in range(runs):
+        out = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+        if out.returncode:
+            raise SystemExit(f"{backend} {model} benchmark failed:\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def report(model: str, results: dict) -> None:
+    baseline = results.get("torch")
+    print(f"\n{model}")
+    header = f"  {'backend':10} {'load':>8} {'peak RSS':>10} {'p50 / p95 per item':>22}"
+    if model == "image":
+        header += f" {'batched p50 / p95':>20}"
+    print(header + f" {'top-1 agree':>12}")
+    for backend, r in results.items():
+        line = (
+            f"  {backend:10} {r['load_s']:>6.1f} s {r['peak_rss_mb']:>7.0f} MB"
+            f" {r['single_ms'][0]:>10.1f} / {r['single_ms'][1]:>6.1f} ms"
+        )
+        if model == "image":
+            line += f" {r['batched_ms'][0]:>8.1f} / {r['batched_ms'][1]:>6.1f} ms"
+        if baseline:
+            agree = sum(a == b for a, b in zip(r["top1"], baseline["top1"])) / len(r["top1"])
+            line += f" {agree:>11.0%}"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("images", nargs="*", help="food photos (default: synthetic images)")
+    parser.add_argument("--backends", default="torch,onnx,onnx-int8")
+    parser.add_argument("--models", default="image,text")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.models, args.images, args.repeat)
+        return
+
+    for model in args.models.split(","):
+        results = {
+            backend: run_child(backend, model, args.images, args.repeat)
+            for backend in args.backends.split(",")
+        }
+        report(model, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark of the rule-based text meal parser (services/text_parser.py).
+
+Runs ``parse_text_meal_fast`` over a corpus of meal descriptions, one per
+line, and reports:
+
+- coverage: the share of descriptions the fast path answers (the rest
+  fall through to GPT-2);
+- fast-path latency: p50 / p95 / max per description;
+- with --model, the latency of the full ``parse_text_meal`` on the
+  descriptions that fall through, for comparison.
+
+Usage:
+  python scripts/bench_text_parser.py                          # bundled sample corpus
+  python scripts/bench_text_parser.py descriptions.txt --show-misses
+  python scripts/bench_text_parser.py --model --repeat 1
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services import ai_service  # noqa: E402
+from services.text_parser import parse_text_meal_fast  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "text_meal_corpus.txt")
+
+
+def load_corpus(path: str):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def timed(fn, description: str, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(description)
+        samples.append(time.perf_counter() - start)
+    return result, statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="?", default=DEFAULT_CORPUS)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--model", action="store_true", help="also time parse_text_meal on fall-through lines")
+    parser.add_argument("--show-misses", action="store_true")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    parse_text_meal_fast("warm up")  # builds the vocabulary trie
+
+    hits, misses, fast_times = [], [], []
+    for description in corpus:
+        result, seconds = timed(parse_text_meal_fast, description, args.repeat)
+        fast_times.append(seconds)
+        (hits if result is not None else misses).append((description, result))
+
+    print(f"{len(corpus)} descriptions from {args.corpus}")
+    print(f"  fast-path coverage   {len(hits) / len(corpus):>7.1%} ({len(hits)} answered, {len(misses)} fall through)")
+    print(
+        f"  fast-path latency    p50 {percentile(fast_times, 0.5) * 1e6:>6.1f} us"
+        f"   p95 {percentile(fast_times, 0.95) * 1e6:>6.1f} us   max {max(fast_times) * 1e6:>6.1f} us"
+    )
+
+    if args.model and misses:
+        model_times = [timed(ai_service.parse_text_meal, d, 1)[1] for d, _ in misses]
+        backend = "GPT-2" if ai_service.load_text_model() is not None else "keyword fallback (no transformers)"
+        print(
+            f"  fall-through latency p50 {percentile(model_times, 0.5) * 1e3:>6.1f} ms"
+            f"   p95 {percentile(model_times, 0.95) * 1e3:>6.1f} ms   [{backend}]"
+        )
+
+    if args.show_misses:
+        print("\nFall-through descriptions:")
+        for description, _ in misses:
+            print(f"  {description}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ from dotenv import load_dotenv
 dotenv_path = Path(__file__).parent.parent / ".env"
 if dotenv_path.exists():
     load_dotenv(dotenv_path)
+import base64
+import io
 import os
 import requests
 # --- AI API Config ---
@@ -11,16 +13,49 @@ OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 OPENAI_VISION_MODEL = os.environ.get("OPENAI_VISION_MODEL", "gpt-4o")
 HUGGINGFACE_API_KEY = os.environ.get("HUGGINGFACE_API_KEY")
 HUGGINGFACE_VISION_MODEL = os.environ.get("HUGGINGFACE_VISION_MODEL", "openai/clip-vit-base-patch32")
+OPENAI_API_BASE = os.environ.get("OPENAI_API_BASE", "https://api.openai.com/v1").rstrip("/")
+HUGGINGFACE_API_BASE = os.environ.get("HUGGINGFACE_API_BASE", "https://api-inference.huggingface.co").rstrip("/")
+# Images are downscaled to what each provider actually looks at before upload.
+# OpenAI fits high-detail images in 2048x2048, then scales the short side to 768.
+OPENAI_IMAGE_MAX_SIDE = int(os.environ.get("OPENAI_IMAGE_MAX_SIDE", "2048"))
+OPENAI_IMAGE_SHORT_SIDE = int(os.environ.get("OPENAI_IMAGE_SHORT_SIDE", "768"))
+# CLIP ViT-B/32 sees 224x224; raise for higher-resolution HF models.
+HUGGINGFACE_IMAGE_SHORT_SIDE = int(os.environ.get("HUGGINGFACE_IMAGE_SHORT_SIDE", "224"))
+VISION_IMAGE_FORMAT = os.environ.get("VISION_IMAGE_FORMAT", "JPEG").upper()
+VISION_IMAGE_QUALITY = int(os.environ.get("VISION_IMAGE_QUALITY", "85"))
+import concurrent.futures
 import logging
 import json
 import re
+import threading
 import time
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, BinaryIO, Tuple, Union
+
+import anyio
+from PIL import Image, ImageOps
+
+from services.model_registry import ModelRegistry
+from services.text_parser import parse_text_meal_fast
+from services.model_server import MODEL_SERVER_SOCKET, model_server_client
 
 logger = logging.getLogger(__name__)
 
 INFERENCE_TIMEOUT = 30
-model_cache: Dict[str, Any] = {}
+# Default budget for GPT-2 text parsing; endpoints may pass their own
+TEXT_PARSE_TIMEOUT = float(os.environ.get("TEXT_PARSE_TIMEOUT", str(INFERENCE_TIMEOUT)))
+TEXT_PARSE_WORKERS = int(os.environ.get("TEXT_PARSE_WORKERS", "2"))
+# Single-flight, optionally idle-unloaded; see services.model_registry
+model_cache = ModelRegistry()
+# GPT-2 runs here so a caller can stop waiting at its deadline
+_text_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=TEXT_PARSE_WORKERS, thread_name_prefix="text-parse"
+)
+text_parse_stats = {"fast_path": 0, "generated": 0, "timed_out": 0}
+# Request threads and _text_executor both count; += is not atomic
+_text_stats_lock = threading.Lock()
+
+# An image as a local path / URL, raw encoded bytes, or a binary file object
+ImageSource = Union[str, bytes, BinaryIO]
 
 # --- Optional deps ---------------------------------------------------------
 
@@ -39,58 +74,144 @@ except Exception:  # pragma: no cover
 
 
 def load_text_model():
-    """Lazy-load text model (GPT-2) for meal parsing."""
-    if "text_model" in model_cache:
-        return model_cache["text_model"]
+    """Lazy-load text model (GPT-2) for meal parsing; concurrent callers share one load."""
+    return model_cache.get("text_model", _load_text_model)
+
 
+def _load_text_model():
     if pipeline is None:
         logger.warning("transformers not available, using text fallback")
-        model_cache["text_model"] = None
         return None
 
+    from services.onnx_backend import MODEL_BACKEND, load_onnx_text_pipeline
+
+    if MODEL_BACKEND != "torch":
+        try:
+            model = load_onnx_text_pipeline("gpt2", quantize=MODEL_BACKEND == "onnx-int8")
+            logger.info("Text model (GPT-2) loaded with the %s backend", MODEL_BACKEND)
+            return model
+        except Exception as e:
+            logger.warning("%s text backend unavailable, using torch: %s", MODEL_BACKEND, e)
+
     try:
         device = 0 if (torch is not None and torch.cuda.is_available()) else -1
-        model_cache["text_model"] = pipeline(
+        model = pipeline(
             "text-generation",
             model="gpt2",
             device=device,
         )
         logger.info("Text model (GPT-2) loaded successfully")
+        return model
     except Exception as e:  # pragma: no cover
         logger.error(f"Failed to load text model: {e}")
-        model_cache["text_model"] = None
-
-    return model_cache["text_model"]
+        return None
 
 
 def load_image_model():
-    """Lazy-load CLIP vision model for zero-shot image classification."""
-    if "image_model" in model_cache:
-        return model_cache["image_model"]
+    """
+    Lazy-load CLIP for zero-shot food classification.
 
-    if pipeline is None:
+    The labels are the food vocabulary (``services.food_index``); their
+    prompts are embedded once (or read from the on-disk cache), see
+    ``services.clip_classifier``. MODEL_BACKEND can move the image tower
+    to ONNX Runtime (``services.onnx_backend``).
+    """
+    return model_cache.get("image_model", _load_image_model)
+
+
+def _load_image_model():
+    from services.clip_classifier import CLIPModel, ClipClassifier
+    from services.food_index import get_food_vocabulary
+
+    if CLIPModel is None:
         logger.warning("transformers not available, using image fallback")
-        model_cache["image_model"] = None
         return None
 
+    from services.onnx_backend import MODEL_BACKEND, OnnxClipClassifier
+
+    labels = [label for label, _ in get_food_vocabulary()]
+    if MODEL_BACKEND != "torch":
+        try:
+            model = OnnxClipClassifier.load(labels, quantize=MODEL_BACKEND == "onnx-int8")
+            logger.info("CLIP image model loaded with the %s backend", MODEL_BACKEND)
+            return model
+        except Exception as e:
+            logger.warning("%s image backend unavailable, using torch: %s", MODEL_BACKEND, e)
+
     try:
-        device = 0 if (torch is not None and torch.cuda.is_available()) else -1
-        model_cache["image_model"] = pipeline(
-            "zero-shot-image-classification",
-            model="openai/clip-vit-base-patch32",
-            device=device,
-        )
+        model = ClipClassifier.load(labels)
         logger.info("CLIP image model loaded successfully")
+        return model
     except Exception as e:  # pragma: no cover
         logger.error(f"Failed to load image model: {e}")
-        model_cache["image_model"] = None
+        return None
+
 
-    return model_cache["image_model"]
+def warm_up_text_model() -> bool:
+    """Load GPT-2 and run a one-token generation. False if only the fallback is available."""
+    if MODEL_SERVER_SOCKET:
+        return model_server_client(MODEL_SERVER_SOCKET).call("warm_up_text_model")
+    model = load_text_model()
+    if model is None:
+        return False
+    model("1 apple", max_new_tokens=1, do_sample=False)
+    return True
+
+
+def warm_up_image_model() -> bool:
+    """Load CLIP and classify a blank image. False if only the fallback is available."""
+    if MODEL_SERVER_SOCKET:
+        return model_server_client(MODEL_SERVER_SOCKET).call("warm_up_image_model")
+    model = load_image_model()
+    if model is None:
+        return False
+    model([Image.new("RGB", (224, 224))])
+    return True
 
 
 # --- Helpers ---------------------------------------------------------------
 
 
+OPENAI_VISION_PROMPT = (
+    "You are a professional nutritionist with expertise in food recognition and nutritional analysis. "
+    "Analyze this food image with high accuracy for precise calorie tracking.\n\n"
+    "ANALYSIS REQUIREMENTS:\n"
+    "1. Identify the PRIMARY food item(s) clearly visible in the image\n"
+    "2. Determine the exact food type and preparation method\n"
+    "3. Estimate realistic portion size based on visual cues\n"
+    "4. Calculate accurate nutritional information\n\n"
+    "FOOD IDENTIFICATION RULES:\n"
+    "- Fruits: apple, banana, orange, berries, grapes, etc.\n"
+    "- Proteins: chicken breast/fillet/thigh, beef steak/ground, fish fillet/salmon, eggs, tofu, beans\n"
+    "- Vegetables: broccoli, carrots, spinach, tomatoes, peppers, salad greens\n"
+    "- Grains/Carbs: rice (white/brown), pasta, bread, potatoes, quinoa\n"
+    "- Dairy: yogurt, cheese, milk\n"
+    "- NEVER mistake one food category for another (e.g., don't identify fruit as protein)\n\n"
+    "PORTION SIZE GUIDELINES:\n"
+    "- 1 medium apple/orange = 150-180g\n"
+    "- Chicken breast = 120-150g\n"
+    "- Salmon fillet = 140-160g\n"
+    "- Mixed vegetables = 200g\n"
+    "- Pasta/rice serving = 140-160g\n"
+    "- Yogurt = 170g\n\n"
+    "RESPONSE FORMAT - Return ONLY valid JSON:\n"
+    "{\n"
+    "  \"foods\": [\n"
+    "    {\n"
+    "      \"name\": \"exact food name (e.g., 'grilled chicken breast', 'fresh orange', 'brown rice')\",\n"
+    "      \"grams\": weight_in_grams_number,\n"
+    "      \"calories\": total_calories_number,\n"
+    "      \"protein_g\": protein_grams_number,\n"
+    "      \"carbs_g\": carb_grams_number,\n"
+    "      \"fat_g\": fat_grams_number,\n"
+    "      \"confidence\": confidence_0_to_1\n"
+    "    }\n"
+    "  ]\n"
+    "}\n\n"
+    "Be extremely precise in food identification. Use standard nutritional databases for calculations."
+)
+
+
 def extract_json_from_text(text: str) -> Optional[Dict]:
     """Extract first JSON object from model output text."""
     try:
@@ -153,7 +274,7 @@ def _parse_text_meal_fallback(description: str) -> List[Dict[str, Any]]:
 # --- Public: text meal parsing --------------------------------------------
 
 
-def parse_text_meal(description: str) -> List[Dict[str, Any]]:
+def parse_text_meal(description: str, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
     """
     Parse a meal from free-form text description.
 
@@ -162,10 +283,72 @@ def parse_text_meal(description: str) -> List[Dict[str, Any]]:
     - grams
     - model_label
     - confidence
+
+    Plain lists of known foods ("2 eggs and toast") are handled by the
+    rule-based parser in ``services.text_parser``; only descriptions it is
+    unsure about reach GPT-2.
+
+    GPT-2 (including loading it) gets ``timeout`` seconds, default
+    TEXT_PARSE_TIMEOUT. When the budget runs out the keyword fallback is
+    returned at once; generation itself stops at the deadline through
+    ``max_time``, so the abandoned job does not keep a core busy.
+
+    With MODEL_SERVER_SOCKET set, GPT-2 runs in the shared model server
+    and only the heuristic fallback runs here.
     """
-    model = load_text_model()
-    if model is None:
+    fast = parse_text_meal_fast(description)
+    if fast is not None:
+        _count_text_parse("fast_path")
+        return fast
+
+    timeout = TEXT_PARSE_TIMEOUT if timeout is None else timeout
+
+    if MODEL_SERVER_SOCKET:
+        try:
+            # The server enforces the budget itself; allow for the round trip
+            return model_server_client(MODEL_SERVER_SOCKET).call(
+                "parse_text_meal", description, timeout, timeout=timeout + 1.0
+            )
+        except Exception as e:
+            logger.warning("Model server text parsing failed, using fallback: %s", e)
+            return _parse_text_meal_fallback(description)
+
+    if pipeline is None:
+        return _parse_text_meal_fallback(description)
+
+    deadline = time.monotonic() + timeout
+    future = _text_executor.submit(_generate_text_meal, description, deadline)
+    try:
+        foods = future.result(timeout=max(0.0, deadline - time.monotonic()))
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        _count_text_parse("timed_out")
+        logger.warning("Text inference exceeded %.1fs, using fallback", timeout)
         return _parse_text_meal_fallback(description)
+    except Exception as e:  # pragma: no cover
+        logger.error(f"Error in parse_text_meal: {e}")
+        foods = None
+
+    return foods or _parse_text_meal_fallback(description)
+
+
+def _count_text_parse(outcome: str) -> None:
+    with _text_stats_lock:
+        text_parse_stats[outcome] += 1
+
+
+def text_parsing_stats() -> Dict[str, int]:
+    """A consistent copy of ``text_parse_stats``."""
+    with _text_stats_lock:
+        return dict(text_parse_stats)
+
+
+def _generate_text_meal(description: str, deadline: float) -> Optional[List[Dict[str, Any]]]:
+    """Run GPT-2 until ``deadline``; None when it yields nothing usable."""
+    model = load_text_model()
+    remaining = deadline - time.monotonic()
+    if model is None or remaining <= 0:
+        return None
 
     prompt = (
         "You are a nutrition assistant. Extract foods and approximate grams "
@@ -174,171 +357,225 @@ def parse_text_meal(description: str) -> List[Dict[str, Any]]:
         f"Description: {description}\n\nJSON:"
     )
 
-    try:
-        start = time.time()
-        outputs = model(
-            prompt,
-            max_new_tokens=160,
-            num_return_sequences=1,
-            do_sample=False,
-        )
-        elapsed = time.time() - start
-
-        if elapsed > INFERENCE_TIMEOUT:  # pragma: no cover
-            logger.warning(
-                "Text inference took %.1fs (>%ss), using fallback",
-                elapsed,
-                INFERENCE_TIMEOUT,
-            )
-            return _parse_text_meal_fallback(description)
-
-        generated = outputs[0]["generated_text"]
-        json_data = extract_json_from_text(generated)
-
-        foods: List[Dict[str, Any]] = []
-        if json_data and isinstance(json_data, dict) and "foods" in json_data:
-            for item in json_data["foods"][:5]:
-                name = str(item.get("name", "food")).lower()
-                grams = float(item.get("grams", 150) or 150.0)
-                grams = max(10.0, min(grams, 1000.0))
-                foods.append(
-                    {
-                        "name": name,
-                        "grams": grams,
-                        "model_label": name.replace(" ", "_"),
-                        "confidence": 0.8,
-                    }
-                )
-
-        if not foods:
-            return _parse_text_meal_fallback(description)
+    outputs = model(
+        prompt,
+        max_new_tokens=160,
+        max_time=remaining,  # wall-clock stopping criterion inside generate()
+        num_return_sequences=1,
+        do_sample=False,
+    )
+    _count_text_parse("generated")
 
-        return foods
+    generated = outputs[0]["generated_text"]
+    json_data = extract_json_from_text(generated)
 
-    except Exception as e:  # pragma: no cover
-        logger.error(f"Error in parse_text_meal: {e}")
-        return _parse_text_meal_fallback(description)
+    foods: List[Dict[str, Any]] = []
+    if json_data and isinstance(json_data, dict) and "foods" in json_data:
+        for item in json_data["foods"][:5]:
+            name = str(item.get("name", "food")).lower()
+            grams = float(item.get("grams", 150) or 150.0)
+            grams = max(10.0, min(grams, 1000.0))
+            foods.append(
+                {
+                    "name": name,
+                    "grams": grams,
+                    "model_label": name.replace(" ", "_"),
+                    "confidence": 0.8,
+                }
+            )
+    return foods or None
 
 
 # --- Public: image meal parsing -------------------------------------------
 
 
-def parse_image_meal(image_url: str) -> List[Dict[str, Any]]:
+def parse_image_meal(image: ImageSource, filename: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Parse a meal from an image.
 
     Supports:
     - HTTP/HTTPS URLs
-    - Local file paths (what /meals/from-image sends)
-    - Anything accepted by HF pipeline (PIL image, etc.)
+    - Local file paths
+    - Encoded image bytes or a binary file object (what the upload
+      endpoints send, so uploads never touch the disk)
+
+    ``filename`` is only a hint for the keyword heuristic used when no
+    model is available; it defaults to the path when ``image`` is one.
 
     Returns list of foods:
     - name
     - grams
     - model_label
     - confidence
+
+    Tries the hosted vision APIs first and falls back to the local CLIP
+    model. The two stages are exposed separately so the inference
+    executors can run them on different pools.
     """
+    if not isinstance(image, str):
+        # Read a file object once so both stages see the same bytes
+        image = read_image_bytes(image)
+    foods = parse_image_meal_remote(image)
+    if foods:
+        return foods
+    return parse_image_meal_local(image, filename)
+
+
+def _open_image(img_bytes: bytes, short_side: int) -> Image.Image:
+    """Open an encoded image, decoding at no less than ``short_side`` on its short edge."""
+    image = Image.open(io.BytesIO(img_bytes))
+    # Let the JPEG decoder skip detail we are about to throw away (it
+    # only scales by powers of two, so the result is still >= the target)
+    scale = short_side / max(1, min(image.size))
+    if scale < 1.0:
+        image.draft("RGB", (int(image.width * scale) + 1, int(image.height * scale) + 1))
+    return image
+
+
+def prepare_vision_image(
+    img_bytes: bytes,
+    max_side: int,
+    short_side: int,
+    image_format: str = VISION_IMAGE_FORMAT,
+    quality: int = VISION_IMAGE_QUALITY,
+) -> Tuple[bytes, str]:
+    """
+    Shrink an image to a provider's effective resolution before upload.
+
+    Applies EXIF orientation, scales the image to fit ``max_side`` with its
+    short edge at most ``short_side``, and re-encodes it as ``image_format``.
+    Returns ``(bytes, mime_type)``. Images that cannot be decoded, or that
+    would not get smaller, are returned unchanged.
+    """
+    try:
+        image = _open_image(img_bytes, short_side)
+        original_format = image.format or "JPEG"
+        transposed = image.getexif().get(0x0112, 1) != 1  # EXIF Orientation
+        image = ImageOps.exif_transpose(image)
+        scale = min(1.0, max_side / max(image.size), short_side / min(image.size))
+        resized = scale < 1.0
+        if resized:
+            size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+            image = image.resize(size, Image.Resampling.LANCZOS)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        buf = io.BytesIO()
+        image.save(buf, image_format, quality=quality, optimize=True)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.debug("Sending image as-is, could not preprocess it: %s", e)
+        return img_bytes, "image/jpeg"
+
+    if not resized and not transposed and buf.tell() >= len(img_bytes):
+        return img_bytes, Image.MIME.get(original_format, "image/jpeg")
+    return buf.getvalue(), Image.MIME.get(image_format, "image/jpeg")
+
+
+def _openai_vision_image(img_bytes: bytes) -> Tuple[bytes, str]:
+    return prepare_vision_image(img_bytes, OPENAI_IMAGE_MAX_SIDE, OPENAI_IMAGE_SHORT_SIDE)
+
+
+def _huggingface_vision_image(img_bytes: bytes) -> Tuple[bytes, str]:
+    # CLIP processors resize the short edge and center-crop, so only the
+    # short edge matters
+    return prepare_vision_image(img_bytes, 4 * HUGGINGFACE_IMAGE_SHORT_SIDE, HUGGINGFACE_IMAGE_SHORT_SIDE)
+
+
+def _openai_vision_payload(img_bytes: bytes, mime_type: str = "image/jpeg") -> Dict[str, Any]:
+    img_b64 = base64.b64encode(img_bytes).decode()
+    return {
+        "model": OPENAI_VISION_MODEL,
+        "messages": [
+            {"role": "system", "content": "You are a helpful and precise nutrition parsing assistant."},
+            {"role": "user", "content": [
+                {"type": "text", "text": OPENAI_VISION_PROMPT},
+                {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{img_b64}"}}
+            ]}
+        ],
+        "max_tokens": 700,
+        "temperature": 0.0
+    }
+
+
+def _foods_from_openai_content(content: str) -> Optional[List[Dict[str, Any]]]:
+    # Try to extract strict JSON from model output
+    json_data = extract_json_from_text(content)
+    if json_data and isinstance(json_data, dict) and "foods" in json_data:
+        foods = []
+        for item in json_data["foods"][:10]:
+            try:
+                name = str(item.get("name", "food")).lower()
+                grams = float(item.get("grams", 150) or 150.0)
+                calories = float(item.get("calories", 0) or 0.0)
+                protein_g = float(item.get("protein_g", 0) or 0.0)
+                carbs_g = float(item.get("carbs_g", 0) or 0.0)
+                fat_g = float(item.get("fat_g", 0) or 0.0)
+                confidence = float(item.get("confidence", 0.75) or 0.75)
+                foods.append({
+                    "name": name,
+                    "grams": max(5.0, min(grams, 2000.0)),
+                    "calories": calories,
+                    "protein_g": protein_g,
+                    "carbs_g": carbs_g,
+                    "fat_g": fat_g,
+                    "model_label": name.replace(" ", "_"),
+                    "confidence": max(0.0, min(confidence, 1.0))
+                })
+            except Exception:
+                continue
+        if foods:
+            return foods
+    # If JSON extraction failed, fall back to simple line parsing
+    foods = []
+    for line in content.splitlines():
+        if any(x in line.lower() for x in ["calories", "protein", "carb", "fat"]):
+            foods.append({"name": line.strip(), "grams": 250})
+    return foods or None
+
+
+def _foods_from_hf_results(results: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+    foods = []
+    for r in results:
+        score = float(r.get("score", 0.0))
+        if score < 0.25:
+            continue
+        label = str(r.get("label", "meal")).lower()
+        foods.append({
+            "name": label,
+            "grams": 250,
+            "model_label": label.replace(" ", "_"),
+            "confidence": min(score, 0.99),
+        })
+    return foods[:5] or None
+
+
+def parse_image_meal_remote(image: ImageSource, timeout: float = INFERENCE_TIMEOUT) -> Optional[List[Dict[str, Any]]]:
+    """
+    Parse a meal image with the hosted vision APIs (OpenAI, then HuggingFace).
+
+    Returns None when no provider is configured or every provider failed.
+    ``timeout`` bounds each HTTP call. Blocking variant for sync callers;
+    the API uses ``parse_image_meal_remote_async``.
+    """
+    img_bytes: Optional[bytes] = None
+
     # 1. Try OpenAI Vision API if key is set
     if OPENAI_API_KEY:
         try:
-            with open(image_url, "rb") as f:
-                img_bytes = f.read()
+            img_bytes = read_image_bytes(image)
             headers = {
                 "Authorization": f"Bearer {OPENAI_API_KEY}",
                 "Content-Type": "application/json"
             }
-            import base64
-            img_b64 = base64.b64encode(img_bytes).decode()
-            # Strong, structured prompt asking for strict JSON output with macros per item
-            prompt_text = (
-                "You are a professional nutritionist with expertise in food recognition and nutritional analysis. "
-                "Analyze this food image with high accuracy for precise calorie tracking.\n\n"
-                "ANALYSIS REQUIREMENTS:\n"
-                "1. Identify the PRIMARY food item(s) clearly visible in the image\n"
-                "2. Determine the exact food type and preparation method\n"
-                "3. Estimate realistic portion size based on visual cues\n"
-                "4. Calculate accurate nutritional information\n\n"
-                "FOOD IDENTIFICATION RULES:\n"
-                "- Fruits: apple, banana, orange, berries, grapes, etc.\n"
-                "- Proteins: chicken breast/fillet/thigh, beef steak/ground, fish fillet/salmon, eggs, tofu, beans\n"
-                "- Vegetables: broccoli, carrots, spinach, tomatoes, peppers, salad greens\n"
-                "- Grains/Carbs: rice (white/brown), pasta, bread, potatoes, quinoa\n"
-                "- Dairy: yogurt, cheese, milk\n"
-                "- NEVER mistake one food category for another (e.g., don't identify fruit as protein)\n\n"
-                "PORTION SIZE GUIDELINES:\n"
-                "- 1 medium apple/orange = 150-180g\n"
-                "- Chicken breast = 120-150g\n"
-                "- Salmon fillet = 140-160g\n"
-                "- Mixed vegetables = 200g\n"
-                "- Pasta/rice serving = 140-160g\n"
-                "- Yogurt = 170g\n\n"
-                "RESPONSE FORMAT - Return ONLY valid JSON:\n"
-                "{\n"
-                "  \"foods\": [\n"
-                "    {\n"
-                "      \"name\": \"exact food name (e.g., 'grilled chicken breast', 'fresh orange', 'brown rice')\",\n"
-                "      \"grams\": weight_in_grams_number,\n"
-                "      \"calories\": total_calories_number,\n"
-                "      \"protein_g\": protein_grams_number,\n"
-                "      \"carbs_g\": carb_grams_number,\n"
-                "      \"fat_g\": fat_grams_number,\n"
-                "      \"confidence\": confidence_0_to_1\n"
-                "    }\n"
-                "  ]\n"
-                "}\n\n"
-                "Be extremely precise in food identification. Use standard nutritional databases for calculations."
+            resp = requests.post(
+                f"{OPENAI_API_BASE}/chat/completions",
+                headers=headers,
+                json=_openai_vision_payload(*_openai_vision_image(img_bytes)),
+                timeout=timeout,
             )
-
-            payload = {
-                "model": OPENAI_VISION_MODEL,
-                "messages": [
-                    {"role": "system", "content": "You are a helpful and precise nutrition parsing assistant."},
-                    {"role": "user", "content": [
-                        {"type": "text", "text": prompt_text},
-                        {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{img_b64}"}}
-                    ]}
-                ],
-                "max_tokens": 700,
-                "temperature": 0.0
-            }
-            resp = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, json=payload, timeout=30)
-            print(f"OpenAI API Response Status: {resp.status_code}")
             if resp.status_code != 200:
-                print(f"OpenAI API Error Response: {resp.text}")
+                logger.warning("OpenAI API error %s: %s", resp.status_code, resp.text)
             resp.raise_for_status()
-            content = resp.json()["choices"][0]["message"]["content"]
-            # Try to extract strict JSON from model output
-            json_data = extract_json_from_text(content)
-            if json_data and isinstance(json_data, dict) and "foods" in json_data:
-                foods = []
-                for item in json_data["foods"][:10]:
-                    try:
-                        name = str(item.get("name", "food")).lower()
-                        grams = float(item.get("grams", 150) or 150.0)
-                        calories = float(item.get("calories", 0) or 0.0)
-                        protein_g = float(item.get("protein_g", 0) or 0.0)
-                        carbs_g = float(item.get("carbs_g", 0) or 0.0)
-                        fat_g = float(item.get("fat_g", 0) or 0.0)
-                        confidence = float(item.get("confidence", 0.75) or 0.75)
-                        foods.append({
-                            "name": name,
-                            "grams": max(5.0, min(grams, 2000.0)),
-                            "calories": calories,
-                            "protein_g": protein_g,
-                            "carbs_g": carbs_g,
-                            "fat_g": fat_g,
-                            "model_label": name.replace(" ", "_"),
-                            "confidence": max(0.0, min(confidence, 1.0))
-                        })
-                    except Exception:
-                        continue
-                if foods:
-                    return foods
-            # If JSON extraction failed, fall back to simple line parsing
-            foods = []
-            for line in content.splitlines():
-                if any(x in line.lower() for x in ["calories", "protein", "carb", "fat"]):
-                    foods.append({"name": line.strip(), "grams": 250})
+            foods = _foods_from_openai_content(resp.json()["choices"][0]["message"]["content"])
             if foods:
                 return foods
         except Exception as e:
@@ -348,67 +585,193 @@ def parse_image_meal(image_url: str) -> List[Dict[str, Any]]:
     # 2. Try HuggingFace Inference API if key is set
     if HUGGINGFACE_API_KEY:
         try:
-            with open(image_url, "rb") as f:
-                img_bytes = f.read()
-            headers = {"Authorization": f"Bearer {HUGGINGFACE_API_KEY}"}
+            if img_bytes is None:
+                img_bytes = read_image_bytes(image)
+            hf_bytes, mime_type = _huggingface_vision_image(img_bytes)
+            headers = {"Authorization": f"Bearer {HUGGINGFACE_API_KEY}", "Content-Type": mime_type}
             resp = requests.post(
-                f"https://api-inference.huggingface.co/models/{HUGGINGFACE_VISION_MODEL}",
+                f"{HUGGINGFACE_API_BASE}/models/{HUGGINGFACE_VISION_MODEL}",
                 headers=headers,
-                data=img_bytes,
-                timeout=30
+                data=hf_bytes,
+                timeout=timeout
             )
             resp.raise_for_status()
-            results = resp.json()
-            foods = []
-            for r in results:
-                score = float(r.get("score", 0.0))
-                if score < 0.25:
-                    continue
-                label = str(r.get("label", "meal")).lower()
-                foods.append({
-                    "name": label,
-                    "grams": 250,
-                    "model_label": label.replace(" ", "_"),
-                    "confidence": min(score, 0.99),
-                })
+            foods = _foods_from_hf_results(resp.json())
             if foods:
-                return foods[:5]
+                return foods
         except Exception as e:
             logger.error(f"HuggingFace Vision API failed: {e}")
             # fallback to next
 
-    # 3. Local CLIP fallback
-    model = load_image_model()
-    if model is None:
-        return _parse_image_meal_fallback(image_url)
+    return None
+
+
+async def parse_image_meal_remote_async(image: ImageSource, timeout: float = INFERENCE_TIMEOUT) -> Optional[List[Dict[str, Any]]]:
+    """
+    Async ``parse_image_meal_remote`` over the shared pooled provider clients.
+
+    Uses keep-alive connections, retries with backoff and per-provider
+    circuit breakers (see ``services.http_clients``).
+    """
+    from services.http_clients import get_provider
 
-    food_labels = [
-        "pizza", "burger", "fries", "salad", "pasta", "rice", "noodles", "sushi", "chicken", "fish", "steak", "tacos", "biryani", "sandwich", "omelette", "soup", "ice cream", "cake", "fruit", "vegetables",
+    img_bytes: Optional[bytes] = None
+    deadline = time.monotonic() + timeout
+
+    # 1. Try OpenAI Vision API if key is set
+    if OPENAI_API_KEY:
+        try:
+            img_bytes = read_image_bytes(image)
+            # Decoding and re-encoding is CPU work, so keep it off the event loop
+            prepared = await anyio.to_thread.run_sync(_openai_vision_image, img_bytes)
+            resp = await get_provider("openai").post(
+                "/chat/completions",
+                headers={"Authorization": f"Bearer {OPENAI_API_KEY}"},
+                json=_openai_vision_payload(*prepared),
+                timeout=max(deadline - time.monotonic(), 0.001),
+            )
+            if resp.status_code != 200:
+                logger.warning("OpenAI API error %s: %s", resp.status_code, resp.text)
+            resp.raise_for_status()
+            foods = _foods_from_openai_content(resp.json()["choices"][0]["message"]["content"])
+            if foods:
+                return foods
+        except Exception as e:
+            logger.error(f"OpenAI Vision API failed: {e}")
+
+    # 2. Try HuggingFace Inference API if key is set
+    if HUGGINGFACE_API_KEY and deadline > time.monotonic():
+        try:
+            if img_bytes is None:
+                img_bytes = read_image_bytes(image)
+            hf_bytes, mime_type = await anyio.to_thread.run_sync(_huggingface_vision_image, img_bytes)
+            resp = await get_provider("huggingface").post(
+                f"/models/{HUGGINGFACE_VISION_MODEL}",
+                headers={"Authorization": f"Bearer {HUGGINGFACE_API_KEY}", "Content-Type": mime_type},
+                content=hf_bytes,
+                timeout=deadline - time.monotonic(),
+            )
+            resp.raise_for_status()
+            foods = _foods_from_hf_results(resp.json())
+            if foods:
+                return foods
+        except Exception as e:
+            logger.error(f"HuggingFace Vision API failed: {e}")
+
+    return None
+
+
+def read_image_bytes(image: ImageSource) -> bytes:
+    """Encoded bytes of an image given as a path, bytes or binary file object."""
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return bytes(image)
+    if isinstance(image, str):
+        with open(image, "rb") as f:
+            return f.read()
+    if image.seekable():
+        image.seek(0)
+    return image.read()
+
+
+def _clip_input(image: ImageSource) -> Image.Image:
+    # Decode upright and only at the resolution CLIP uses; in-memory
+    # images never need a temp file.
+    if isinstance(image, str) and image.startswith(("http://", "https://")):
+        resp = requests.get(image, timeout=INFERENCE_TIMEOUT)
+        resp.raise_for_status()
+        image = resp.content
+    decoded = _open_image(read_image_bytes(image), HUGGINGFACE_IMAGE_SHORT_SIDE)
+    return ImageOps.exif_transpose(decoded).convert("RGB")
+
+
+def _foods_from_clip_results(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Turn CLIP label scores into foods, one per nutrition key.
+
+    Several labels can name the same food ("taco", "tacos"), so their
+    probabilities are summed per key. Each food is named after its
+    best-scoring label and carries its ``nutrition_key``.
+    """
+    from services.food_index import food_key_for_label
+
+    by_key: Dict[str, Dict[str, Any]] = {}
+    for r in results:  # best first
+        label = str(r.get("label", "meal")).lower()
+        key = food_key_for_label(label) or label.replace(" ", "_")
+        score = float(r.get("score", 0.0))
+        if key in by_key:
+            by_key[key]["confidence"] += score
+            continue
+        by_key[key] = {
+            "name": label,
+            "grams": 250,
+            "model_label": label.replace(" ", "_"),
+            "nutrition_key": key,
+            "confidence": score,
+        }
+
+    foods = sorted(
+        (food for food in by_key.values() if food["confidence"] >= 0.25),
+        key=lambda food: food["confidence"],
+        reverse=True,
+    )
+    for food in foods:
+        food["confidence"] = min(food["confidence"], 0.99)
+    return foods[:5]
+
+
+def parse_image_meal_local(image: ImageSource, filename: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Classify a meal image with the local CLIP model, or fall back to heuristics."""
+    return parse_image_meal_local_batch([(image, filename)])[0]
+
+
+def parse_image_meal_local_batch(
+    items: List[Tuple[ImageSource, Optional[str]]],
+) -> List[List[Dict[str, Any]]]:
+    """
+    Classify several ``(image, filename)`` pairs in one batched CLIP pass
+    against the precomputed label embeddings.
+
+    Returns one food list per item, in order. Items that cannot be decoded
+    or classified fall back to the heuristic individually.
+    """
+    return [foods for foods, _ in recognize_image_meal_local_batch(items)]
+
+
+def recognize_image_meal_local_batch(
+    items: List[Tuple[ImageSource, Optional[str]]],
+) -> List[Tuple[List[Dict[str, Any]], bool]]:
+    """
+    ``parse_image_meal_local_batch`` with, per item, whether CLIP recognised
+    it. False marks a heuristic fallback, which callers must not cache.
+    """
+    names = [
+        filename if filename is not None else (image if isinstance(image, str) else "")
+        for image, filename in items
+    ]
+    results: List[Optional[List[Dict[str, Any]]]] = [None] * len(items)
+
+    model = load_image_model()
+    if model is not None:
+        inputs, positions = [], []
+        for i, (image, _) in enumerate(items):
+            try:
+                inputs.append(_clip_input(image))
+                positions.append(i)
+            except Exception as e:
+                logger.error(f"Could not decode image for parse_image_meal: {e}")
+        if inputs:
+            try:
+                outputs = model(inputs)
+                for i, output in zip(positions, outputs):
+                    results[i] = _foods_from_clip_results(output)
+            except Exception as e:
+                logger.error(f"Error in parse_image_meal: {e}")
+
+    return [
+        (foods, True) if foods else (_parse_image_meal_fallback(names[i]), False)
+        for i, foods in enumerate(results)
     ]
-    try:
-        results = model(
-            image_url,
-            candidate_labels=food_labels,
-            hypothesis_template="a photo of {}",
-        )
-        foods: List[Dict[str, Any]] = []
-        for r in results:
-            score = float(r.get("score", 0.0))
-            if score < 0.25:
-                continue
-            label = str(r.get("label", "meal")).lower()
-            foods.append({
-                "name": label,
-                "grams": 250,
-                "model_label": label.replace(" ", "_"),
-                "confidence": min(score, 0.99),
-            })
-        if not foods:
-            return _parse_image_meal_fallback(image_url)
-        return foods[:5]
-    except Exception as e:
-        logger.error(f"Error in parse_image_meal: {e}")
-        return _parse_image_meal_fallback(image_url)
 
 
 def _parse_image_meal_fallback(image_url: str) -> List[Dict[str, Any]]:
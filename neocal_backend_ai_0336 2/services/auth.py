@@ -1,17 +1,113 @@
+import asyncio
+import hashlib
+import os
 import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 import bcrypt
 from models.database import User, Session as DBSession
 
+TOKEN_CACHE_MAX_SIZE = int(os.environ.get("TOKEN_CACHE_MAX_SIZE", "10000"))
+# Each worker has its own cache, so a session revoked on one worker stays
+# valid on the others for up to this long; keep it short.
+TOKEN_CACHE_TTL_SECONDS = float(os.environ.get("TOKEN_CACHE_TTL_SECONDS", "30"))
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of verified session tokens.
+
+    Entries are keyed by a SHA-256 of the token (raw tokens are never kept
+    in memory longer than the request) and live until the earlier of the
+    cache TTL and the session's own ``expires_at``. ``revoke_session`` drops
+    the token from this process's cache; other processes keep accepting it
+    until their entry's TTL runs out (TOKEN_CACHE_TTL_SECONDS).
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_MAX_SIZE, ttl_seconds: float = TOKEN_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[str, Optional[datetime], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Optional[str]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                user_id, expires_at, cached_until = entry
+                if time.monotonic() < cached_until and (expires_at is None or expires_at > datetime.utcnow()):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return user_id
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, token: str, user_id: str, expires_at: Optional[datetime]) -> None:
+        if self.max_size <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (user_id, expires_at, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token: str) -> None:
+        with self._lock:
+            self._entries.pop(self._key(token), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+            }
+
+
+token_cache = TokenCache()
+
+# bcrypt releases the GIL, so a small dedicated pool keeps hashing off the
+# event loop without letting a login burst starve the default threadpool.
+_password_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
+_password_queue_lock = threading.Lock()
+_password_queue_depth = 0
+
 def generate_token():
     return secrets.token_hex(32)
 
 def hash_password(password: str) -> str:
     # Truncate password to 72 bytes as required by bcrypt
     password_bytes = password.encode('utf-8')[:72]
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     return hashed.decode('utf-8')
 
@@ -23,11 +119,42 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     except ValueError:
         return False
 
-def create_user(db: Session, email: str, password: str, user_id: str = None):
+async def _run_password_job(fn, *args):
+    global _password_queue_depth
+    with _password_queue_lock:
+        _password_queue_depth += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_password_executor, fn, *args)
+    finally:
+        with _password_queue_lock:
+            _password_queue_depth -= 1
+
+async def hash_password_async(password: str) -> str:
+    """Hash ``password`` on the password-hash pool without blocking the loop."""
+    return await _run_password_job(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify ``plain_password`` on the password-hash pool without blocking the loop."""
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+def password_hash_stats() -> Dict[str, int]:
+    """Queued plus running hash jobs, for the /metrics endpoint."""
+    with _password_queue_lock:
+        depth = _password_queue_depth
+    return {
+        "queue_depth": depth,
+        "workers": PASSWORD_HASH_WORKERS,
+        "bcrypt_rounds": BCRYPT_ROUNDS,
+    }
+
+def create_user(db: Session, email: str, password: str = None, user_id: str = None, hashed_password: str = None):
+    """Create a user; pass ``hashed_password`` if it was already hashed off-loop."""
     if not user_id:
         user_id = f"user_{secrets.token_hex(8)}"
 
-    hashed_password = hash_password(password)
+    if hashed_password is None:
+        hashed_password = hash_password(password)
 
     user = User(
         user_id=user_id,
@@ -49,6 +176,15 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
         return None
     return user
 
+async def authenticate_user_async(db: Session, email: str, password: str) -> Optional[User]:
+    """Like ``authenticate_user`` but keeps both the lookup and bcrypt off the loop."""
+    user = await run_in_threadpool(get_user_by_email, db, email)
+    if not user:
+        return None
+    if not await verify_password_async(password, user.hashed_password):
+        return None
+    return user
+
 def create_session(db: Session, user_id: str):
     token = generate_token()
     session_id = f"session_{secrets.token_hex(8)}"
@@ -72,6 +208,10 @@ def verify_token(db: Session, token: str) -> Optional[str]:
     if not token or token == "":
         return None
 
+    cached_user_id = token_cache.get(token)
+    if cached_user_id is not None:
+        return cached_user_id
+
     # Check if token exists and is not expired
     session = db.query(DBSession).filter(
         DBSession.token == token,
@@ -79,10 +219,23 @@ def verify_token(db: Session, token: str) -> Optional[str]:
     ).first()
 
     if session:
+        token_cache.set(token, session.user_id, session.expires_at)
         return session.user_id
 
     return None
 
+def revoke_session(db: Session, token: str) -> bool:
+    """Delete the session for ``token`` and drop it from the token cache."""
+    token_cache.invalidate(token)
+    session = db.query(DBSession).filter(DBSession.token == token).first()
+    if not session:
+        return False
+    db.delete(session)
+    db.commit()
+    # Drop again in case a concurrent request re-cached it before the commit
+    token_cache.invalidate(token)
+    return True
+
 def get_user(db: Session, user_id: str) -> Optional[User]:
     return db.query(User).filter(User.user_id == user_id).first()
 
@@ -0,0 +1,138 @@
+"""
+Micro-batching of local model inference.
+
+On CPU, a CLIP forward pass over a batch of N images costs much less than
+N single-image passes (better BLAS utilisation, one Python dispatch).
+``MicroBatcher`` collects jobs that arrive within a short window (or until
+``max_batch`` are waiting) and hands them to a batch function as one job
+on an ``InferenceExecutor``. It then resolves each caller with its own
+result.
+
+Batch-size and queue-wait histograms are exported under /metrics.
+"""
+
+import asyncio
+import bisect
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+
+class Histogram:
+    """Cumulative histogram over fixed upper bounds (Prometheus-style ``le`` buckets)."""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, value)] += 1
+            self.count += 1
+            self.total += value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            buckets, running = {}, 0
+            for bound, n in zip(self.bounds + ["+Inf"], self.counts):
+                running += n
+                buckets[f"le_{bound}"] = running
+            return {
+                "count": self.count,
+                "sum": round(self.total, 3),
+                "mean": round(self.total / self.count, 3) if self.count else 0.0,
+                "buckets": buckets,
+            }
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent ``submit`` calls into batched executor jobs.
+
+    ``batch_fn`` receives a list of items and must return a list of results
+    in the same order. It runs on ``executor`` (an ``InferenceExecutor``),
+    so the executor's admission limit and timeout still apply, per batch.
+    A caller whose own ``timeout`` passes first gets ``asyncio.TimeoutError``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        executor: Any,
+        max_batch: int,
+        window_ms: float,
+    ):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.executor = executor
+        self.max_batch = max(1, max_batch)
+        self.window = window_ms / 1000.0
+        self.batch_sizes = Histogram([1, 2, 4, 8, 16, 32, 64])
+        self.queue_wait_ms = Histogram([1, 2, 5, 10, 20, 50, 100, 250, 1000])
+        # (item, future, enqueued_at, deadline)
+        self._waiting: List[Tuple[Any, asyncio.Future, float, float]] = []
+        self._flush_handle: Optional[asyncio.Handle] = None
+        self._running: Set[asyncio.Task] = set()
+
+    async def submit(self, item: Any, timeout: float) -> Any:
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        future = loop.create_future()
+        self._waiting.append((item, future, now, now + timeout))
+
+        if len(self._waiting) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window, self._flush)
+
+        # shield: one caller giving up must not cancel its batch-mates
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._waiting = self._waiting[:self.max_batch], self._waiting[self.max_batch:]
+        if self._waiting:
+            # More than one batch's worth arrived; send the rest right away
+            self._flush_handle = asyncio.get_running_loop().call_soon(self._flush)
+        if batch:
+            # Hold a reference so the task is not garbage-collected mid-run
+            task = asyncio.ensure_future(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future, float, float]]) -> None:
+        now = time.monotonic()
+        self.batch_sizes.observe(len(batch))
+        for _, _, enqueued_at, _ in batch:
+            self.queue_wait_ms.observe((now - enqueued_at) * 1000.0)
+
+        # The batch may run as long as its most patient caller will wait
+        timeout = max(deadline for *_, deadline in batch) - now
+        try:
+            results = await self.executor.run(
+                self.batch_fn, [item for item, *_ in batch], timeout=max(timeout, 0.001)
+            )
+        except Exception as e:
+            for _, future, _, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future, _, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_batch": self.max_batch,
+            "window_ms": round(self.window * 1000.0, 3),
+            "waiting": len(self._waiting),
+            "running_batches": len(self._running),
+            "batch_size": self.batch_sizes.stats(),
+            "queue_wait_ms": self.queue_wait_ms.stats(),
+        }
@@ -0,0 +1,172 @@
+"""
+Zero-shot CLIP food classification with precomputed label embeddings.
+
+The transformers ``zero-shot-image-classification`` pipeline re-encodes
+every ``"a photo of {label}"`` prompt with the text tower on every call.
+The prompts never change, so ``ClipClassifier`` encodes them once at load
+time into a normalised ``(labels, dim)`` matrix. Classifying an image is
+then one image-tower pass plus a matrix multiply, and adding labels adds
+no per-request text work.
+
+The label matrix is searched through ``services.food_index``, so the
+vocabulary can hold thousands of foods: each image costs one top-k query,
+and the softmax is taken over the CLIP_CANDIDATES best labels only (with
+CLIP's logit scale of ~100, labels outside them carry negligible mass).
+
+Label matrices are persisted as ``.npy`` files under
+CLIP_EMBEDDING_CACHE_DIR. The file name includes the model name, its hub
+revision and a digest of the prompts, so a new model revision or label
+set computes a new matrix instead of reusing a stale one.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from typing import Any, Callable, Dict, List, Sequence
+
+import numpy as np
+
+from services.food_index import FoodEmbeddingIndex
+
+logger = logging.getLogger(__name__)
+
+CLIP_MODEL_NAME = os.environ.get("CLIP_MODEL_NAME", "openai/clip-vit-base-patch32")
+CLIP_EMBEDDING_CACHE_DIR = os.environ.get(
+    "CLIP_EMBEDDING_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "clip"),
+)
+CLIP_HYPOTHESIS_TEMPLATE = "a photo of {}"
+CLIP_TEXT_BATCH_SIZE = 256
+CLIP_CANDIDATES = int(os.environ.get("CLIP_CANDIDATES", "50"))
+
+try:
+    import torch  # type: ignore
+    from transformers import CLIPModel, CLIPProcessor  # type: ignore
+except Exception:  # pragma: no cover
+    torch = None  # type: ignore
+    CLIPModel = CLIPProcessor = None  # type: ignore
+
+
+def label_embedding_path(
+    model_name: str, revision: str, labels: Sequence[str], template: str = CLIP_HYPOTHESIS_TEMPLATE,
+    cache_dir: str = CLIP_EMBEDDING_CACHE_DIR,
+) -> str:
+    digest = hashlib.sha256("\n".join([template, *labels]).encode("utf-8")).hexdigest()[:16]
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+    return os.path.join(cache_dir, f"{slug}@{revision[:12]}-{digest}.npy")
+
+
+def cached_label_embeddings(
+    model_name: str,
+    revision: str,
+    labels: Sequence[str],
+    encode: Callable[[List[str]], np.ndarray],
+    template: str = CLIP_HYPOTHESIS_TEMPLATE,
+    cache_dir: str = CLIP_EMBEDDING_CACHE_DIR,
+) -> np.ndarray:
+    """
+    L2-normalised prompt embeddings for ``labels``, from disk if available.
+
+    ``encode`` maps a list of prompts to a ``(n, dim)`` array and is only
+    called on a cache miss.
+    """
+    path = label_embedding_path(model_name, revision, labels, template, cache_dir)
+    try:
+        matrix = np.load(path)
+        if matrix.shape[0] == len(labels):
+            return matrix
+    except (OSError, ValueError):
+        pass
+
+    prompts = [template.format(label) for label in labels]
+    chunks = [
+        encode(prompts[i:i + CLIP_TEXT_BATCH_SIZE])
+        for i in range(0, len(prompts), CLIP_TEXT_BATCH_SIZE)
+    ]
+    matrix = normalize_rows(np.concatenate(chunks).astype(np.float32))
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write then rename, so a concurrent reader never sees half a file
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".npy")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, matrix)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning("Could not persist CLIP label embeddings to %s: %s", path, e)
+    return matrix
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def softmax_scores(similarities: np.ndarray, logit_scale: float) -> np.ndarray:
+    """Softmax of scaled cosine similarities, as CLIP's zero-shot head computes it."""
+    logits = logit_scale * similarities
+    logits -= logits.max(axis=1, keepdims=True)
+    probs = np.exp(logits)  # exp(-inf) == 0 for missing candidates
+    return probs / probs.sum(axis=1, keepdims=True)
+
+
+def zero_shot_scores(image_embeddings: np.ndarray, label_embeddings: np.ndarray, logit_scale: float) -> np.ndarray:
+    return softmax_scores(image_embeddings @ label_embeddings.T, logit_scale)
+
+
+class ClipClassifier:
+    """
+    CLIP image tower plus an index over cached label embeddings.
+
+    Called like the transformers pipeline it replaces: a list of PIL
+    images in, and for each one a list of ``{"label", "index", "score"}``
+    dicts sorted by score.
+    """
+
+    def __init__(self, model: Any, processor: Any, model_name: str, labels: Sequence[str], device: str = "cpu"):
+        self.model = model
+        self.processor = processor
+        self.model_name = model_name
+        self.device = device
+        self.revision = getattr(model.config, "_commit_hash", None) or "local"
+        self.logit_scale = float(model.logit_scale.exp().item())
+        self.set_labels(labels)
+
+    @classmethod
+    def load(cls, labels: Sequence[str], model_name: str = CLIP_MODEL_NAME) -> "ClipClassifier":
+        if CLIPModel is None:
+            raise RuntimeError("transformers/torch are not installed")
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        model = CLIPModel.from_pretrained(model_name).to(device).eval()
+        processor = CLIPProcessor.from_pretrained(model_name)
+        return cls(model, processor, model_name, labels, device)
+
+    def set_labels(self, labels: Sequence[str]) -> None:
+        self.labels = list(labels)
+        self.index = FoodEmbeddingIndex(cached_label_embeddings(
+            self.model_name, self.revision, self.labels, self._encode_text
+        ))
+
+    def _encode_text(self, prompts: List[str]) -> np.ndarray:
+        inputs = self.processor(text=prompts, return_tensors="pt", padding=True).to(self.device)
+        with torch.no_grad():
+            return self.model.get_text_features(**inputs).float().cpu().numpy()
+
+    def image_embeddings(self, images: List[Any]) -> np.ndarray:
+        inputs = self.processor(images=images, return_tensors="pt").to(self.device)
+        with torch.no_grad():
+            features = self.model.get_image_features(**inputs).float().cpu().numpy()
+        return normalize_rows(features)
+
+    def __call__(self, images: List[Any], top_k: int = CLIP_CANDIDATES) -> List[List[Dict[str, Any]]]:
+        similarities, indices = self.index.search(self.image_embeddings(images), top_k)
+        scores = softmax_scores(similarities, self.logit_scale)
+        return [
+            [
+                {"label": self.labels[j], "index": int(j), "score": float(p)}
+                for p, j in zip(row_scores, row_indices) if j >= 0
+            ]
+            for row_scores, row_indices in zip(scores, indices)
+        ]
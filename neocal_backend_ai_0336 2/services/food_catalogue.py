@@ -0,0 +1,314 @@
+"""
+The ``foods`` nutrition catalogue: bulk import and an in-memory snapshot.
+
+Nutrition dumps (USDA, Open Food Facts exports...) are imported with
+
+    python -m services.food_catalogue import foods.csv [--map calories=energy_kcal_100g]
+    python -m services.food_catalogue import foods.parquet --source off
+    python -m services.food_catalogue seed          # the built-in NUTRITION_DATABASE
+
+Files are streamed in chunks of FOOD_CATALOGUE_CHUNK_SIZE rows and written
+with one ``executemany`` upsert per chunk, each in its own transaction.
+Rows are keyed on the normalised name (or a ``food_key`` column), so
+re-running an import updates entries in place instead of duplicating
+them, and unchanged rows are not rewritten. Values are per 100 g; rows
+with missing or negative values are skipped and counted.
+
+Lookups never query the table. ``refresh_catalogue`` loads it into a
+read-only ``FoodCatalogueSnapshot``: a key -> row dict, one ``float32``
+array of nutrients and a ``FoodNameIndex`` for fuzzy names, all built
+before the snapshot is swapped in, so no request pays for them. The app loads
+it at startup, and after an import in the same process; inference
+worker processes and the model server load it when they start. Other
+workers pick up a new import on restart. When the table is empty, lookups use
+the built-in ``NUTRITION_DATABASE``.
+"""
+
+import argparse
+import csv
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from services.food_names import FoodNameIndex, normalize_name
+
+logger = logging.getLogger(__name__)
+
+FOOD_CATALOGUE_CHUNK_SIZE = int(os.environ.get("FOOD_CATALOGUE_CHUNK_SIZE", "50000"))
+
+NUTRIENTS = ("calories", "protein_g", "carbs_g", "fat_g")
+COLUMNS = ("food_key", "name") + NUTRIENTS
+
+
+class FoodCatalogueSnapshot:
+    """Read-only, memory-resident copy of the ``foods`` table."""
+
+    def __init__(self, keys: List[str], names: List[str], values: np.ndarray, version: int):
+        self.keys = keys
+        self.names = names
+        self.values = values  # (n, 4) float32 in NUTRIENTS order
+        self.version = version
+        self._row = {key: i for i, key in enumerate(keys)}
+        # Built here, before refresh_catalogue publishes the snapshot: large
+        # catalogues take seconds, which must not land on a request
+        self.name_index = FoodNameIndex(keys)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, food_key: str) -> bool:
+        return food_key in self._row
+
+    def row(self, food_key: str) -> Optional[int]:
+        return self._row.get(food_key)
+
+    def get(self, food_key: str) -> Optional[Dict[str, float]]:
+        row = self._row.get(food_key)
+        if row is None:
+            return None
+        return dict(zip(NUTRIENTS, self.values[row].tolist()))
+
+    def lookup(self, food_name: str) -> Optional[Dict[str, float]]:
+        """Exact normalised-name hit, else the best fuzzy match."""
+        found = self.get(normalize_name(food_name))
+        if found is not None:
+            return found
+        match = self.name_index.best(food_name)
+        return self.get(match) if match is not None else None
+
+
+_snapshot: Optional[FoodCatalogueSnapshot] = None
+_version = 0
+_refresh_lock = threading.Lock()
+
+
+def current_catalogue() -> Optional[FoodCatalogueSnapshot]:
+    return _snapshot
+
+
+def load_snapshot(engine: Any = None) -> Optional[FoodCatalogueSnapshot]:
+    """Read the whole table into a snapshot; None if it is empty or missing."""
+    from sqlalchemy import inspect, text
+
+    engine = engine or _default_engine()
+    if not inspect(engine).has_table("foods"):
+        return None
+    keys: List[str] = []
+    names: List[str] = []
+    values: List[tuple] = []
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True).execute(
+            text(f"SELECT {', '.join(COLUMNS)} FROM foods ORDER BY food_key")
+        )
+        for key, name, *nutrients in result:
+            keys.append(key)
+            names.append(name)
+            values.append(nutrients)
+    if not keys:
+        return None
+    return FoodCatalogueSnapshot(keys, names, np.asarray(values, dtype=np.float32), version=0)
+
+
+def refresh_catalogue(engine: Any = None) -> Optional[FoodCatalogueSnapshot]:
+    """Reload the snapshot and swap it in; readers keep the one they hold."""
+    global _snapshot, _version
+    with _refresh_lock:
+        start = time.monotonic()
+        snapshot = load_snapshot(engine)
+        _version += 1
+        if snapshot is not None:
+            snapshot.version = _version
+            logger.info("Loaded %d catalogue foods in %.1fs", len(snapshot), time.monotonic() - start)
+        _snapshot = snapshot
+        return snapshot
+
+
+def load_catalogue_quietly() -> Optional[FoodCatalogueSnapshot]:
+    """``refresh_catalogue`` for inference workers and the model server.
+
+    They validate recognition labels against the catalogue like the API
+    does, but an unreachable database only means the built-in foods.
+    """
+    try:
+        return refresh_catalogue()
+    except Exception as e:
+        logger.warning("Food catalogue unavailable, using the built-in foods: %s", e)
+        return None
+
+
+def catalogue_version() -> int:
+    """Changes whenever the snapshot is reloaded; for caches derived from it."""
+    return _version
+
+
+# --- Import ----------------------------------------------------------------
+
+
+def _default_engine() -> Any:
+    from database.db import engine
+
+    return engine
+
+
+def _upsert_sql(dialect: Any) -> str:
+    """Driver-level upsert; rows are ``COLUMNS + (source, updated_at)`` tuples."""
+    columns = COLUMNS + ("source", "updated_at")
+    # Positional styles: sqlite3 uses qmark, psycopg2/pymysql format
+    params = ", ".join(["?" if dialect.paramstyle == "qmark" else "%s"] * len(columns))
+    distinct = "IS DISTINCT FROM" if dialect.name == "postgresql" else "IS NOT"
+    updates = ", ".join(f"{c} = excluded.{c}" for c in ("name",) + NUTRIENTS + ("source", "updated_at"))
+    changed = " OR ".join(f"foods.{c} {distinct} excluded.{c}" for c in ("name",) + NUTRIENTS)
+    return (
+        f"INSERT INTO foods ({', '.join(columns)}) VALUES ({params}) "
+        f"ON CONFLICT (food_key) DO UPDATE SET {updates} WHERE {changed}"
+    )
+
+
+def _row_reader(mapping: Dict[str, str]) -> Callable[[Dict[str, Any]], Optional[tuple]]:
+    """Turn a file record into a ``COLUMNS`` tuple, or None if it is unusable."""
+    name_col = mapping.get("name", "name")
+    key_col = mapping.get("food_key", "food_key")
+    nutrient_cols = [mapping.get(n, n) for n in NUTRIENTS]
+
+    def read(record: Dict[str, Any]) -> Optional[tuple]:
+        name = record.get(name_col)
+        name = str(name).strip() if name is not None else ""
+        if not name:
+            return None
+        key = record.get(key_col)
+        food_key = normalize_name(str(key) if key else name)
+        if not food_key:
+            return None
+        try:
+            nutrients = [float(record[col]) for col in nutrient_cols]
+        except (KeyError, TypeError, ValueError):
+            return None
+        if not all(value >= 0 for value in nutrients):  # also rejects NaN
+            return None
+        return (food_key, name, *nutrients)
+
+    return read
+
+
+def iter_csv_records(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        yield from csv.DictReader(f)
+
+
+def iter_parquet_records(path: str, columns: List[str], chunk_size: int) -> Iterator[Dict[str, Any]]:
+    try:
+        import pyarrow.parquet as pq  # type: ignore
+    except Exception as e:
+        raise RuntimeError("Parquet import needs pyarrow") from e
+    parquet = pq.ParquetFile(path)
+    present = [c for c in columns if c in parquet.schema_arrow.names]
+    for batch in parquet.iter_batches(batch_size=chunk_size, columns=present):
+        yield from batch.to_pylist()
+
+
+def import_records(
+    records: Iterable[Dict[str, Any]],
+    engine: Any = None,
+    source: str = "import",
+    mapping: Optional[Dict[str, str]] = None,
+    chunk_size: int = FOOD_CATALOGUE_CHUNK_SIZE,
+) -> Dict[str, Any]:
+    """Upsert ``records`` (dicts with name + per-100 g nutrients) in chunks."""
+    from models.database import Food
+
+    engine = engine or _default_engine()
+    Food.__table__.create(bind=engine, checkfirst=True)
+    statement = _upsert_sql(engine.dialect)
+    read = _row_reader(mapping or {})
+    now = datetime.utcnow()
+    # sqlite3's implicit datetime adapter is deprecated; store SQLAlchemy's text format
+    tail = (source, now.isoformat(" ") if engine.dialect.name == "sqlite" else now)
+    stats = {"rows": 0, "upserted": 0, "skipped": 0, "seconds": 0.0}
+    start = time.monotonic()
+
+    chunk: List[tuple] = []
+
+    def flush() -> None:
+        if chunk:
+            # Straight to cursor.executemany, skipping per-row parameter
+            # processing in SQLAlchemy
+            with engine.begin() as conn:
+                conn.exec_driver_sql(statement, chunk)
+            stats["upserted"] += len(chunk)
+            chunk.clear()
+
+    for record in records:
+        stats["rows"] += 1
+        row = read(record)
+        if row is None:
+            stats["skipped"] += 1
+            continue
+        chunk.append(row + tail)
+        if len(chunk) >= chunk_size:
+            flush()
+    flush()
+
+    stats["seconds"] = round(time.monotonic() - start, 2)
+    logger.info("Upserted %(upserted)d of %(rows)d rows (%(skipped)d skipped) in %(seconds)ss", stats)
+    return stats
+
+
+def import_file(
+    path: str,
+    engine: Any = None,
+    source: Optional[str] = None,
+    mapping: Optional[Dict[str, str]] = None,
+    chunk_size: int = FOOD_CATALOGUE_CHUNK_SIZE,
+) -> Dict[str, Any]:
+    """Import a CSV or Parquet file (by extension)."""
+    mapping = mapping or {}
+    source = source or os.path.basename(path)
+    if path.endswith((".parquet", ".pq")):
+        columns = [mapping.get(c, c) for c in COLUMNS]
+        records = iter_parquet_records(path, columns, chunk_size)
+    else:
+        records = iter_csv_records(path)
+    return import_records(records, engine, source, mapping, chunk_size)
+
+
+def seed_builtin_foods(engine: Any = None) -> Dict[str, Any]:
+    """Import ``NUTRITION_DATABASE`` as source ``builtin``."""
+    from services.nutrition_service import NUTRITION_DATABASE
+
+    records = (
+        {"name": key.replace("_", " "), "food_key": key, **nutrition}
+        for key, nutrition in NUTRITION_DATABASE.items()
+    )
+    return import_records(records, engine, source="builtin")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage the foods nutrition catalogue")
+    commands = parser.add_subparsers(dest="command", required=True)
+    importer = commands.add_parser("import", help="import a CSV or Parquet file")
+    importer.add_argument("path")
+    importer.add_argument("--source", help="source label stored per row (default: file name)")
+    importer.add_argument(
+        "--map", action="append", default=[], metavar="COLUMN=FILE_COLUMN",
+        help=f"read COLUMN ({', '.join(COLUMNS)}) from FILE_COLUMN",
+    )
+    importer.add_argument("--chunk-size", type=int, default=FOOD_CATALOGUE_CHUNK_SIZE)
+    commands.add_parser("seed", help="import the built-in nutrition database")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "seed":
+        stats = seed_builtin_foods()
+    else:
+        mapping = dict(item.split("=", 1) for item in args.map)
+        stats = import_file(args.path, source=args.source, mapping=mapping, chunk_size=args.chunk_size)
+    print(stats)
+
+
+if __name__ == "__main__":
+    main()
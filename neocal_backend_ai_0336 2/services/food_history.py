@@ -0,0 +1,170 @@
+"""
+Per-user food history: how often and how recently each food was logged.
+
+``_create_meal`` calls ``record_logged_foods`` in the meal's transaction,
+which upserts one ``user_food_stats`` row per food (count + 1, last
+grams, last logged time). Reading history is then a small indexed query
+per user. Neither the "recent foods" list nor the search boost scans
+``food_items``.
+
+Foods are keyed on the catalogue key when the recogniser knew it, else on
+the normalised food name, the same key space as ``/meals/search`` ids.
+
+Users who logged meals before the table existed are backfilled with
+
+    python -m services.food_history rebuild
+"""
+
+import math
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from models.database import FoodItem, Meal, UserFoodStat
+from services.food_names import normalize_name
+
+# Days for a food's recency weight to halve
+FOOD_HISTORY_HALF_LIFE_DAYS = float(os.environ.get("FOOD_HISTORY_HALF_LIFE_DAYS", "14"))
+# Most recent foods considered when boosting a user's search results
+FOOD_HISTORY_BOOST_LIMIT = int(os.environ.get("FOOD_HISTORY_BOOST_LIMIT", "200"))
+
+
+def food_history_key(food_data: Dict[str, Any]) -> str:
+    return normalize_name(food_data.get("nutrition_key") or food_data.get("model_label") or food_data["name"])
+
+
+def _upsert(db: Session, rows: List[Dict[str, Any]]) -> None:
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        _merge(db, rows)
+        return
+    statement = insert(UserFoodStat).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=["user_id", "food_key"],
+        set_={
+            "name": statement.excluded.name,
+            "count": UserFoodStat.count + statement.excluded.count,
+            "last_grams": statement.excluded.last_grams,
+            "last_logged_at": statement.excluded.last_logged_at,
+        },
+    )
+    db.execute(statement)
+
+
+def _merge(db: Session, rows: List[Dict[str, Any]]) -> None:
+    # Dialects without ON CONFLICT: read, then update or add
+    for row in rows:
+        stat = db.get(UserFoodStat, (row["user_id"], row["food_key"]))
+        if stat is None:
+            db.add(UserFoodStat(**row))
+        else:
+            stat.name, stat.last_grams, stat.last_logged_at = row["name"], row["last_grams"], row["last_logged_at"]
+            stat.count += row["count"]
+
+
+def record_logged_foods(db: Session, user_id: str, foods: Iterable[Dict[str, Any]], timestamp: datetime) -> None:
+    """Count one meal's foods; the caller commits."""
+    rows: Dict[str, Dict[str, Any]] = {}
+    for food in foods:
+        key = food_history_key(food)
+        if not key:
+            continue
+        row = rows.get(key)
+        if row is None:
+            rows[key] = row = {
+                "user_id": user_id, "food_key": key, "name": food["name"],
+                "count": 0, "last_logged_at": timestamp,
+            }
+        # A food twice in one meal counts twice; the last portion is kept
+        row["count"] += 1
+        row["last_grams"] = food.get("grams")
+    if rows:
+        _upsert(db, list(rows.values()))
+
+
+def _serialize(stat: UserFoodStat) -> Dict[str, Any]:
+    return {
+        "food_key": stat.food_key,
+        "name": stat.name,
+        "count": stat.count,
+        "last_grams": stat.last_grams,
+        "last_logged_at": stat.last_logged_at.isoformat() + "Z",
+    }
+
+
+def recent_foods(db: Session, user_id: str, limit: int = 20, order: str = "recent") -> List[Dict[str, Any]]:
+    """The user's foods, most recently (or most often) logged first."""
+    query = db.query(UserFoodStat).filter(UserFoodStat.user_id == user_id)
+    if order == "frequent":
+        query = query.order_by(UserFoodStat.count.desc(), UserFoodStat.last_logged_at.desc())
+    else:
+        query = query.order_by(UserFoodStat.last_logged_at.desc())
+    return [_serialize(stat) for stat in query.limit(limit)]
+
+
+def affinity(count: int, last_logged_at: datetime, now: Optional[datetime] = None) -> float:
+    """0 for unknown foods, approaching 1 for foods logged often and lately."""
+    now = now or datetime.utcnow()
+    age_days = max(0.0, (now - last_logged_at).total_seconds() / 86400)
+    weight = math.log1p(count) * 0.5 ** (age_days / FOOD_HISTORY_HALF_LIFE_DAYS)
+    return weight / (1 + weight)
+
+
+def search_boosts(db: Session, user_id: str) -> Dict[str, float]:
+    """``food_key -> affinity`` for the user's most recently logged foods."""
+    now = datetime.utcnow()
+    rows = (
+        db.query(UserFoodStat.food_key, UserFoodStat.count, UserFoodStat.last_logged_at)
+        .filter(UserFoodStat.user_id == user_id)
+        .order_by(UserFoodStat.last_logged_at.desc())
+        .limit(FOOD_HISTORY_BOOST_LIMIT)
+    )
+    return {key: affinity(count, logged_at, now) for key, count, logged_at in rows}
+
+
+def rebuild_food_stats(db: Session, user_id: Optional[str] = None) -> int:
+    """Recompute stats from ``food_items``; returns the number of rows written."""
+    query = (
+        db.query(Meal.user_id, Meal.timestamp, FoodItem.name, FoodItem.model_label, FoodItem.grams)
+        .join(FoodItem, FoodItem.meal_id == Meal.meal_id)
+        .order_by(Meal.timestamp)
+    )
+    stats = db.query(UserFoodStat)
+    if user_id is not None:
+        query = query.filter(Meal.user_id == user_id)
+        stats = stats.filter(UserFoodStat.user_id == user_id)
+
+    rows: Dict[tuple, Dict[str, Any]] = {}
+    for owner, timestamp, name, model_label, grams in query.yield_per(10_000):
+        key = food_history_key({"name": name, "model_label": model_label})
+        if not key:
+            continue
+        row = rows.setdefault((owner, key), {"user_id": owner, "food_key": key, "count": 0})
+        row.update(name=name, last_grams=grams, last_logged_at=timestamp)
+        row["count"] += 1
+
+    stats.delete(synchronize_session=False)
+    db.bulk_insert_mappings(UserFoodStat, list(rows.values()))
+    db.commit()
+    return len(rows)
+
+
+if __name__ == "__main__":
+    import sys
+
+    from database.db import Base, SessionLocal, engine
+
+    if sys.argv[1:] != ["rebuild"]:
+        raise SystemExit("usage: python -m services.food_history rebuild")
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        print(f"Rebuilt {rebuild_food_stats(session)} food history rows")
+    finally:
+        session.close()
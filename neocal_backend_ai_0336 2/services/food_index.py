@@ -0,0 +1,223 @@
+"""
+Food vocabulary and a vectorised embedding index for CLIP recognition.
+
+The vocabulary pairs each recognisable label with the nutrition key it
+should be logged as. It is built from the ``NUTRITION_DATABASE`` keys plus
+FOOD_LABELS_FILE, a tab-separated ``label<TAB>nutrition_key`` file that can
+grow to thousands of entries (synonyms, dishes, regional names) without
+code changes. Keys are checked against the foods catalogue when one is
+loaded (it is authoritative for lookups), else against the database;
+unknown ones are skipped, with a warning for label file entries. The
+vocabulary is built once per process, after startup loads the catalogue.
+
+``FoodEmbeddingIndex`` holds the normalised label embeddings and answers
+top-k cosine queries:
+
+- ``exact`` -- one ``(queries, dim) @ (dim, labels)`` product plus
+  ``argpartition``. Fine up to tens of thousands of labels.
+- ``ivf`` -- k-means clusters the labels into ``nlist`` lists and a query
+  only scores the labels in its ``nprobe`` nearest lists.
+- ``ivfpq`` -- IVF plus product quantisation. Vectors are stored as one
+  byte per sub-vector and scored with per-query lookup tables, so the
+  full float matrix is not kept in memory. Scores are approximate.
+
+``auto`` uses exact search below FOOD_INDEX_EXACT_MAX labels and IVF above.
+"""
+
+import hashlib
+import logging
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.food_catalogue import current_catalogue
+from services.food_names import normalize_name
+from services.nutrition_service import NUTRITION_DATABASE
+
+logger = logging.getLogger(__name__)
+
+FOOD_LABELS_FILE = os.environ.get(
+    "FOOD_LABELS_FILE",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "food_labels.tsv"),
+)
+FOOD_INDEX_MODE = os.environ.get("FOOD_INDEX_MODE", "auto")
+FOOD_INDEX_EXACT_MAX = int(os.environ.get("FOOD_INDEX_EXACT_MAX", "20000"))
+FOOD_INDEX_NPROBE = int(os.environ.get("FOOD_INDEX_NPROBE", "8"))
+FOOD_INDEX_PQ_SUBVECTORS = int(os.environ.get("FOOD_INDEX_PQ_SUBVECTORS", "32"))
+
+# Catch-all entries used when nothing matches; never a recognition target
+GENERIC_NUTRITION_KEYS = {"meal", "mixed_meal"}
+
+_vocabulary: Optional[List[Tuple[str, str]]] = None
+_key_by_label: Dict[str, str] = {}
+_digest: Optional[str] = None
+
+
+def _is_known_key(key: str) -> bool:
+    catalogue = current_catalogue()
+    if catalogue is not None:
+        return normalize_name(key) in catalogue
+    return key in NUTRITION_DATABASE
+
+
+def load_food_vocabulary(labels_file: Optional[str] = FOOD_LABELS_FILE) -> List[Tuple[str, str]]:
+    """``(label, nutrition_key)`` pairs; a label file entry overrides a database one."""
+    entries: Dict[str, str] = {}
+    for key in NUTRITION_DATABASE:
+        if key not in GENERIC_NUTRITION_KEYS and _is_known_key(key):
+            entries.setdefault(key.replace("_", " "), key)
+
+    if labels_file and os.path.exists(labels_file):
+        with open(labels_file, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.split("#", 1)[0].strip()
+                if not line:
+                    continue
+                label, _, key = (part.strip() for part in line.partition("\t"))
+                key = key or label.replace(" ", "_")
+                if not _is_known_key(key):
+                    logger.warning("%s:%d: unknown nutrition key %r, skipped", labels_file, line_no, key)
+                    continue
+                entries[label.lower()] = key
+
+    return list(entries.items())
+
+
+def get_food_vocabulary() -> List[Tuple[str, str]]:
+    global _vocabulary, _key_by_label, _digest
+    if _vocabulary is None:
+        _vocabulary = load_food_vocabulary()
+        _key_by_label = dict(_vocabulary)
+        joined = "\n".join(f"{label}\t{key}" for label, key in _vocabulary)
+        _digest = hashlib.sha256(joined.encode("utf-8")).hexdigest()[:12]
+    return _vocabulary
+
+
+def food_vocabulary_digest() -> str:
+    """Short hash of the vocabulary, so caches can tell when it changed."""
+    get_food_vocabulary()
+    return _digest
+
+
+def food_key_for_label(label: str) -> Optional[str]:
+    get_food_vocabulary()
+    return _key_by_label.get(label)
+
+
+def _nearest_centroid(x: np.ndarray, centroids: np.ndarray, spherical: bool) -> np.ndarray:
+    if spherical:
+        return np.argmax(x @ centroids.T, axis=1)
+    # argmin |x - c|^2 == argmin (|c|^2 - 2 x.c); avoids an (n, k, dim) temporary
+    return np.argmin((centroids * centroids).sum(axis=1) - 2 * x @ centroids.T, axis=1)
+
+
+def _kmeans(
+    x: np.ndarray, k: int, spherical: bool = True, iterations: int = 10, seed: int = 0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Lloyd's k-means; returns ``(centroids, assignments)``.
+
+    ``spherical`` clusters unit vectors by cosine similarity (IVF lists);
+    otherwise by Euclidean distance (PQ codebooks).
+    """
+    rng = np.random.default_rng(seed)
+    k = min(k, len(x))
+    centroids = x[rng.choice(len(x), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = _nearest_centroid(x, centroids, spherical)
+        # Sum each cluster's members with one sorted reduceat pass
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=k)
+        filled = counts > 0
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[filled]
+        centroids[filled] = np.add.reduceat(x[order], starts, axis=0) / counts[filled, None]
+        if spherical:
+            centroids = centroids / np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+    return centroids, _nearest_centroid(x, centroids, spherical)
+
+
+def _top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    k = min(k, scores.shape[1])
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1)
+    return np.take_along_axis(part_scores, order, axis=1), np.take_along_axis(part, order, axis=1)
+
+
+class FoodEmbeddingIndex:
+    """Top-k cosine search over L2-normalised label embeddings."""
+
+    def __init__(
+        self,
+        embeddings: np.ndarray,
+        mode: str = FOOD_INDEX_MODE,
+        nlist: Optional[int] = None,
+        nprobe: int = FOOD_INDEX_NPROBE,
+        pq_subvectors: int = FOOD_INDEX_PQ_SUBVECTORS,
+    ):
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if mode == "auto":
+            mode = "exact" if len(embeddings) <= FOOD_INDEX_EXACT_MAX else "ivf"
+        if mode not in ("exact", "ivf", "ivfpq"):
+            raise ValueError(f"Unknown food index mode: {mode}")
+        self.mode = mode
+        self.size, self.dim = embeddings.shape
+        self.nprobe = nprobe
+        self._embeddings: Optional[np.ndarray] = embeddings
+
+        if mode == "exact":
+            return
+
+        self.centroids, assignments = _kmeans(embeddings, nlist or max(1, int(math.sqrt(self.size))))
+        self.lists = [np.flatnonzero(assignments == c) for c in range(len(self.centroids))]
+
+        if mode == "ivfpq":
+            if self.dim % pq_subvectors:
+                raise ValueError(f"dim {self.dim} is not divisible by {pq_subvectors} sub-vectors")
+            self.pq_subvectors = pq_subvectors
+            sub_dim = self.dim // pq_subvectors
+            subs = embeddings.reshape(self.size, pq_subvectors, sub_dim)
+            books = [_kmeans(subs[:, m], 256, spherical=False) for m in range(pq_subvectors)]
+            self.codebooks = np.stack([centroids for centroids, _ in books])  # (m, <=256, sub_dim)
+            self.codes = np.stack([codes for _, codes in books], axis=1).astype(np.uint8)  # (n, m)
+            self._embeddings = None
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return ``(scores, indices)``, each ``(queries, k)`` and best first.
+
+        IVF modes may find fewer than ``k`` candidates; missing slots
+        have index -1 and score -inf.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if self.mode == "exact":
+            return _top_k(queries @ self._embeddings.T, k)
+
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        indices = np.full((len(queries), k), -1, dtype=np.int64)
+        probes = _top_k(queries @ self.centroids.T, min(self.nprobe, len(self.centroids)))[1]
+        for q, query in enumerate(queries):
+            candidates = np.concatenate([self.lists[c] for c in probes[q]])
+            if not len(candidates):
+                continue
+            if self.mode == "ivf":
+                candidate_scores = self._embeddings[candidates] @ query
+            else:
+                sub_query = query.reshape(self.pq_subvectors, -1)
+                lookup = np.einsum("md,mcd->mc", sub_query, self.codebooks)  # (m, 256)
+                codes = self.codes[candidates]
+                candidate_scores = lookup[np.arange(self.pq_subvectors), codes].sum(axis=1)
+            top_scores, top = _top_k(candidate_scores[None, :], k)
+            scores[q, :top.shape[1]] = top_scores[0]
+            indices[q, :top.shape[1]] = candidates[top[0]]
+        return scores, indices
+
+    def memory_bytes(self) -> int:
+        total = 0 if self._embeddings is None else self._embeddings.nbytes
+        if self.mode != "exact":
+            total += self.centroids.nbytes + sum(l.nbytes for l in self.lists)
+        if self.mode == "ivfpq":
+            total += self.codebooks.nbytes + self.codes.nbytes
+        return total
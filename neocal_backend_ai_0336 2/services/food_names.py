@@ -0,0 +1,148 @@
+"""
+Name index for resolving free-form food names to catalogue entries.
+
+``lookup_food_nutrition`` used to scan every entry with a two-way substring
+test and return whichever matched first. ``FoodNameIndex`` precomputes:
+
+- an exact map from the normalised name (lowercase words, simple
+  singulars, joined by ``_``) to the entry;
+- an inverted index from each normalised token to the entries containing
+  it, with an IDF weight per token;
+- a sorted array of all tokens, searched with ``bisect`` as a flattened
+  prefix trie, so a partial word ("brocc") still finds "broccoli".
+
+``best`` scores candidates by IDF-weighted token overlap (weighted
+Jaccard) and breaks ties by fewer tokens, then by name, so the result is
+deterministic. Candidates are gathered from the rarest query tokens first
+and capped at FOOD_NAME_MAX_CANDIDATES. Lookup cost therefore depends on
+the query and the posting lists, not on the catalogue size.
+"""
+
+import bisect
+import math
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+FOOD_NAME_MAX_CANDIDATES = int(os.environ.get("FOOD_NAME_MAX_CANDIDATES", "2000"))
+# A prefix-expanded token counts for less than the word itself
+PREFIX_MATCH_WEIGHT = 0.8
+MIN_PREFIX_LENGTH = 3
+MAX_PREFIX_EXPANSIONS = 8
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _singular(token: str) -> str:
+    if len(token) <= 3 or not token.endswith("s") or token.endswith("ss"):
+        return token
+    if token.endswith("ies"):
+        return token[:-3] + "y"
+    if token.endswith(("ches", "shes", "oes", "xes")):
+        return token[:-2]
+    return token[:-1]
+
+
+def name_tokens(name: str) -> Tuple[str, ...]:
+    return tuple(_singular(t) for t in _WORD_RE.findall(name.lower()))
+
+
+def normalize_name(name: str) -> str:
+    """``"Grilled  Chickens"`` and ``"grilled_chicken"`` both become ``"grilled_chicken"``."""
+    return "_".join(name_tokens(name))
+
+
+class FoodNameIndex:
+    """Best-match lookup of food names; ``best`` returns the matched name."""
+
+    def __init__(self, names: Iterable[str], max_candidates: int = FOOD_NAME_MAX_CANDIDATES):
+        self.max_candidates = max_candidates
+        self.names: List[str] = []
+        self._tokens: List[Tuple[str, ...]] = []
+        self._exact: Dict[str, int] = {}
+        postings: Dict[str, List[int]] = {}
+        for name in names:
+            tokens = name_tokens(name)
+            if not tokens:
+                continue
+            i = len(self.names)
+            self.names.append(name)
+            self._tokens.append(tokens)
+            # First name wins for duplicates, as a dict lookup would
+            self._exact.setdefault("_".join(tokens), i)
+            for token in set(tokens):
+                postings.setdefault(token, []).append(i)
+
+        total = max(1, len(self.names))
+        self._postings = postings
+        self._idf = {t: math.log(1 + total / len(ids)) for t, ids in postings.items()}
+        self._sorted_tokens = sorted(postings)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        """The token itself, or failing that, indexed tokens it is a prefix of."""
+        if token in self._postings:
+            return [(token, 1.0)]
+        if len(token) < MIN_PREFIX_LENGTH:
+            return []
+        start = bisect.bisect_left(self._sorted_tokens, token)
+        matches = []
+        for candidate in self._sorted_tokens[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not candidate.startswith(token):
+                break
+            matches.append((candidate, PREFIX_MATCH_WEIGHT))
+        return matches
+
+    def best(self, name: str) -> Optional[str]:
+        match = self.best_with_score(name)
+        return match[0] if match else None
+
+    def best_with_score(self, name: str) -> Optional[Tuple[str, float]]:
+        tokens = name_tokens(name)
+        if not tokens:
+            return None
+        exact = self._exact.get("_".join(tokens))
+        if exact is not None:
+            return self.names[exact], 1.0
+
+        # query token -> [(indexed token, weight)]
+        expanded = {t: self._expand(t) for t in set(tokens)}
+        query_weight = sum(
+            max((self._idf[m] * w for m, w in matches), default=_unseen_idf(len(self)))
+            for matches in expanded.values()
+        )
+        matched_tokens: Dict[str, float] = {}
+        for matches in expanded.values():
+            for token, weight in matches:
+                matched_tokens[token] = max(weight, matched_tokens.get(token, 0.0))
+        if not matched_tokens:
+            return None
+
+        # Rarest tokens first: their postings are short and most telling
+        candidates: Dict[int, None] = {}
+        for token in sorted(matched_tokens, key=lambda t: len(self._postings[t])):
+            for i in self._postings[token]:
+                candidates.setdefault(i)
+                if len(candidates) >= self.max_candidates:
+                    break
+            if len(candidates) >= self.max_candidates:
+                break
+
+        best_key = None
+        best: Optional[Tuple[float, int, str]] = None
+        for i in candidates:
+            entry_tokens = self._tokens[i]
+            overlap = sum(self._idf[t] * matched_tokens[t] for t in set(entry_tokens) if t in matched_tokens)
+            extra = sum(self._idf[t] for t in set(entry_tokens) if t not in matched_tokens)
+            score = overlap / (query_weight + extra)
+            key = (-score, len(entry_tokens), self.names[i])
+            if best_key is None or key < best_key:
+                best_key, best = key, (score, i, self.names[i])
+        return best[2], round(best[0], 4)
+
+
+def _unseen_idf(total: int) -> float:
+    # A query word no entry contains weighs like the rarest possible token
+    return math.log(1 + max(1, total))
@@ -0,0 +1,243 @@
+"""
+Food search for ``/meals/search`` autocomplete.
+
+``FoodSearchIndex`` is an in-memory index over food names:
+
+- an inverted index from each normalised token (``food_names.name_tokens``)
+  to the foods containing it, with an IDF weight per token;
+- the sorted token vocabulary, searched with ``bisect`` so every query
+  word also matches as a prefix ("chick" finds "chicken", "chickpea");
+- a trigram index over the vocabulary for typos: a word with no exact or
+  prefix match is replaced by the vocabulary words sharing enough
+  trigrams with it ("brocoli" -> "broccoli").
+
+Every query word that matches something must match each result. Results
+are ranked by IDF-weighted overlap (exact > prefix > typo), then by fewer
+words, then by name. Food ids are assigned in that tie-break order, so
+posting lists are already sorted by it. Only the first
+FOOD_SEARCH_MAX_CANDIDATES matching foods are scored, which keeps the
+shortest, best candidates and bounds the cost of broad one-letter
+queries. Multi-word queries intersect the words' posting sets first.
+
+The index is built from the foods catalogue snapshot, or from the built-in
+NUTRITION_DATABASE while the catalogue is empty. It is rebuilt when
+``catalogue_version()`` changes. The endpoint passes the user's food
+history (``food_history.search_boosts``) so foods they log often and
+recently rank first. SQLite FTS5 was not used because lookups
+must also work on Postgres and never hit the database.
+"""
+
+import bisect
+import heapq
+import itertools
+import math
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from services.food_catalogue import FoodCatalogueSnapshot, catalogue_version, current_catalogue
+from services.food_names import name_tokens
+
+FOOD_SEARCH_MAX_CANDIDATES = int(os.environ.get("FOOD_SEARCH_MAX_CANDIDATES", "500"))
+# Minimum trigram Jaccard similarity for a typo match
+FOOD_SEARCH_MIN_SIMILARITY = float(os.environ.get("FOOD_SEARCH_MIN_SIMILARITY", "0.35"))
+# Score multiplier for a food the user logs constantly (affinity 1)
+FOOD_SEARCH_PERSONAL_WEIGHT = float(os.environ.get("FOOD_SEARCH_PERSONAL_WEIGHT", "4.0"))
+MAX_PREFIX_EXPANSIONS = 32
+MAX_TYPO_EXPANSIONS = 8
+MIN_TYPO_LENGTH = 3
+# Typo matches count for less than the word the user may have meant
+TYPO_MATCH_WEIGHT = 0.7
+
+
+def _trigrams(token: str) -> set:
+    padded = f"${token}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class FoodSearchIndex:
+    """Ranked prefix and typo-tolerant search over ``(food_id, name)`` pairs."""
+
+    def __init__(self, entries: Iterable[Tuple[str, str]], max_candidates: int = FOOD_SEARCH_MAX_CANDIDATES):
+        self.max_candidates = max_candidates
+        docs = []
+        for food_id, name in entries:
+            tokens = name_tokens(name)
+            if tokens:
+                docs.append((len(tokens), name, food_id, tokens))
+        docs.sort(key=lambda d: (d[0], d[1]))
+        self.ids: List[str] = [d[2] for d in docs]
+        self.names: List[str] = [d[1] for d in docs]
+        self._tokens: List[Tuple[str, ...]] = [d[3] for d in docs]
+        self._by_key: Dict[str, int] = {}
+        for i, (food_id, tokens) in enumerate(zip(self.ids, self._tokens)):
+            self._by_key.setdefault(food_id, i)
+            self._by_key.setdefault("_".join(tokens), i)
+
+        postings: Dict[str, List[int]] = {}
+        for i, tokens in enumerate(self._tokens):
+            for token in dict.fromkeys(tokens):
+                postings.setdefault(token, []).append(i)
+        total = max(1, len(docs))
+        self._postings = postings
+        self._idf = {t: math.log(1 + total / len(ids)) for t, ids in postings.items()}
+        self._vocab = sorted(postings)
+
+        self._vocab_trigrams: Dict[str, set] = {}
+        trigram_postings: Dict[str, List[str]] = {}
+        for token in self._vocab:
+            if len(token) < MIN_TYPO_LENGTH:
+                continue
+            grams = self._vocab_trigrams[token] = _trigrams(token)
+            for gram in grams:
+                trigram_postings.setdefault(gram, []).append(token)
+        self._trigram_postings = trigram_postings
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _expand(self, token: str) -> Dict[str, float]:
+        """Indexed words ``token`` may stand for, with match weights."""
+        matches: Dict[str, float] = {}
+        if token in self._postings:
+            matches[token] = 1.0
+        start = bisect.bisect_right(self._vocab, token)
+        for word in self._vocab[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not word.startswith(token):
+                break
+            # Completions closer to the typed word rank higher
+            matches[word] = 0.5 + 0.5 * len(token) / len(word)
+        if matches or len(token) < MIN_TYPO_LENGTH:
+            return matches
+
+        grams = _trigrams(token)
+        shared: Dict[str, int] = {}
+        for gram in grams:
+            for word in self._trigram_postings.get(gram, ()):
+                shared[word] = shared.get(word, 0) + 1
+        scored = []
+        for word, count in shared.items():
+            similarity = count / (len(grams) + len(self._vocab_trigrams[word]) - count)
+            if similarity >= FOOD_SEARCH_MIN_SIMILARITY:
+                scored.append((similarity, word))
+        for similarity, word in heapq.nlargest(MAX_TYPO_EXPANSIONS, scored):
+            matches[word] = TYPO_MATCH_WEIGHT * similarity
+        return matches
+
+    def search(
+        self, query: str, limit: int = 20, offset: int = 0, boosts: Optional[Dict[str, float]] = None
+    ) -> Tuple[List[Tuple[str, float]], bool]:
+        """``([(food_id, score)...], has_more)`` for one page of results.
+
+        ``boosts`` maps food ids (or normalised names) to a 0-1 affinity,
+        e.g. ``food_history.search_boosts``; matching foods score up to
+        1 + FOOD_SEARCH_PERSONAL_WEIGHT times higher.
+        """
+        expanded = [m for m in (self._expand(t) for t in dict.fromkeys(name_tokens(query))) if m]
+        if not expanded:
+            return [], False
+
+        weighted = [{w: self._idf[w] * weight for w, weight in m.items()} for m in expanded]
+        query_weight = sum(max(self._idf[w] for w in m) for m in expanded)
+        if len(weighted) == 1:
+            # Posting ids are in tie-break order, so the first ones are the best
+            ids = heapq.merge(*(self._postings[w] for w in weighted[0]))
+        else:
+            # Only the narrowest word becomes a set; the others are streamed
+            # through set.intersection, which needs no set of its own
+            by_size = sorted(weighted, key=lambda m: sum(len(self._postings[w]) for w in m))
+            common = set().union(*(self._postings[w] for w in by_size[0]))
+            for m in by_size[1:]:
+                common = common.intersection(itertools.chain.from_iterable(self._postings[w] for w in m))
+            ids = iter(sorted(common))
+
+        candidates: Dict[int, None] = {}
+        for i in ids:
+            candidates.setdefault(i)  # merged prefix postings repeat ids
+            if len(candidates) >= self.max_candidates:
+                break
+        affinity: Dict[int, float] = {}
+        for key, value in (boosts or {}).items():
+            i = self._by_key.get(key)
+            if i is not None:
+                affinity[i] = max(value, affinity.get(i, 0.0))
+                # Scored even when past the candidate cap
+                candidates.setdefault(i)
+
+        ranked: List[Tuple[float, int]] = []
+        for i in candidates:
+            tokens = self._tokens[i]
+            overlap = 0.0
+            used = set()
+            for m in weighted:
+                value, token = max((m.get(t, 0.0), t) for t in tokens)
+                if not value:
+                    break
+                overlap += value
+                used.add(token)
+            else:
+                extra = sum(self._idf[t] for t in tokens if t not in used)
+                score = overlap / (query_weight + extra)
+                if i in affinity:
+                    score *= 1 + FOOD_SEARCH_PERSONAL_WEIGHT * affinity[i]
+                ranked.append((-score, i))
+
+        page = heapq.nsmallest(offset + limit + 1, ranked)[offset:]
+        results = [(self.ids[i], round(-score, 4)) for score, i in page[:limit]]
+        return results, len(page) > limit
+
+
+_cache: Dict[str, Any] = {"version": None, "index": None, "catalogue": None}
+_cache_lock = threading.Lock()
+
+
+def get_search_index() -> Tuple[FoodSearchIndex, Optional[FoodCatalogueSnapshot]]:
+    """The index and the catalogue it was built from, rebuilt after a refresh.
+
+    Read together so a concurrent refresh cannot pair an index with
+    another catalogue.
+    """
+    with _cache_lock:
+        version = catalogue_version()
+        if _cache["version"] != version:
+            catalogue = current_catalogue()
+            if catalogue is not None:
+                entries = zip(catalogue.keys, catalogue.names)
+            else:
+                from services.nutrition_service import NUTRITION_DATABASE
+
+                entries = ((key, key.replace("_", " ")) for key in NUTRITION_DATABASE)
+            _cache.update(version=version, index=FoodSearchIndex(entries), catalogue=catalogue)
+        return _cache["index"], _cache["catalogue"]
+
+
+def search_foods(
+    query: str, limit: int = 20, offset: int = 0, boosts: Optional[Dict[str, float]] = None
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """One page of ``/meals/search`` results and whether more follow."""
+    index, catalogue = get_search_index()
+    hits, has_more = index.search(query, limit, offset, boosts)
+    results = []
+    for food_id, score in hits:
+        if catalogue is not None:
+            row = catalogue.row(food_id)
+            if row is None:
+                continue
+            name = catalogue.names[row]
+            nutrition = catalogue.get(food_id)
+        else:
+            from services.nutrition_service import NUTRITION_DATABASE
+
+            name = food_id.replace("_", " ").title()
+            nutrition = NUTRITION_DATABASE[food_id]
+        results.append({
+            "id": food_id,
+            "name": name,
+            "serving": "100g",
+            "calories": round(nutrition.get("calories", 0), 2),
+            "protein": round(nutrition.get("protein_g", 0), 2),
+            "carbs": round(nutrition.get("carbs_g", 0), 2),
+            "fat": round(nutrition.get("fat_g", 0), 2),
+            "score": score,
+        })
+    return results, has_more
@@ -0,0 +1,222 @@
+"""
+Shared HTTP clients for the hosted vision providers.
+
+Each provider (OpenAI, HuggingFace) gets one pooled ``httpx.AsyncClient``.
+Its connections are kept alive across requests, so every image does not
+pay for a new TCP and TLS handshake. HTTP/2 is used when the ``h2``
+package is installed. The app lifespan opens the clients on startup and
+closes them on shutdown.
+
+Calls are retried with exponential backoff on transport errors, 429 and
+5xx. A per-provider circuit breaker stops calling a provider after
+repeated failures, so a provider outage fails fast instead of tying up
+requests until their timeouts.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+# ai_service loads .env, so take the provider endpoints from there
+from services.ai_service import HUGGINGFACE_API_BASE, OPENAI_API_BASE
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_MAX_CONNECTIONS = int(os.environ.get("PROVIDER_MAX_CONNECTIONS", "20"))
+PROVIDER_MAX_RETRIES = int(os.environ.get("PROVIDER_MAX_RETRIES", "2"))
+PROVIDER_BACKOFF_SECONDS = float(os.environ.get("PROVIDER_BACKOFF_SECONDS", "0.5"))
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(os.environ.get("CIRCUIT_RESET_SECONDS", "30"))
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+try:
+    import h2  # type: ignore  # noqa: F401
+    HTTP2_AVAILABLE = True
+except Exception:  # pragma: no cover
+    HTTP2_AVAILABLE = False
+
+
+class CircuitOpenError(Exception):
+    """Raised when a provider's circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after ``failure_threshold`` consecutive failures.
+    Open -> half-open once ``reset_timeout`` has passed, letting one trial
+    call through. A success closes the circuit again; a failure reopens it.
+    """
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD, reset_timeout: float = CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = "half_open"
+                return True
+            if self.state == "half_open":
+                # A trial call is already in flight
+                return False
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+
+class ProviderClient:
+    """A pooled async client for one provider, with retries and a circuit breaker."""
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        max_retries: int = PROVIDER_MAX_RETRIES,
+        backoff: float = PROVIDER_BACKOFF_SECONDS,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.name = name
+        self.base_url = base_url
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.requests = 0
+        self.retries = 0
+        self.short_circuited = 0
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=PROVIDER_MAX_CONNECTIONS,
+                    max_keepalive_connections=PROVIDER_MAX_CONNECTIONS,
+                ),
+            )
+        return self._client
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None and response.status_code == 429:
+            try:
+                return min(float(response.headers.get("Retry-After", "")), 10.0)
+            except ValueError:
+                pass
+        return self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+    async def post(self, path: str, *, timeout: float, **kwargs: Any) -> httpx.Response:
+        """
+        POST to ``path``, retrying transient failures within ``timeout``.
+
+        Raises ``CircuitOpenError`` without calling the provider while its
+        breaker is open. Non-retryable responses (e.g. 400/401) are returned
+        as-is; the caller decides whether they are errors.
+        """
+        if not self.breaker.allow_request():
+            self.short_circuited += 1
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+        try:
+            return await self._post_with_retries(path, timeout, **kwargs)
+        except asyncio.CancelledError:
+            # The caller's deadline cancelled us mid-call; treat it as a
+            # failure so a half-open trial does not leave the breaker stuck.
+            self.breaker.record_failure()
+            raise
+
+    async def _post_with_retries(self, path: str, timeout: float, **kwargs: Any) -> httpx.Response:
+        deadline = time.monotonic() + timeout
+        last_error: Exception = httpx.TimeoutException(f"{self.name} call budget exhausted")
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self.requests += 1
+            response = None
+            try:
+                response = await self.client.post(path, timeout=remaining, **kwargs)
+            except httpx.TransportError as e:
+                last_error = e
+            else:
+                if response.status_code not in RETRYABLE_STATUS:
+                    self.breaker.record_success()
+                    return response
+                last_error = httpx.HTTPStatusError(
+                    f"{self.name} returned {response.status_code}",
+                    request=response.request,
+                    response=response,
+                )
+
+            if attempt < self.max_retries:
+                delay = self._retry_delay(attempt, response)
+                if time.monotonic() + delay >= deadline:
+                    break
+                self.retries += 1
+                logger.warning("%s call failed (%s), retrying in %.2fs", self.name, last_error, delay)
+                await asyncio.sleep(delay)
+
+        self.breaker.record_failure()
+        raise last_error
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "short_circuited": self.short_circuited,
+            "circuit": self.breaker.state,
+        }
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+providers: Dict[str, ProviderClient] = {
+    "openai": ProviderClient("openai", OPENAI_API_BASE),
+    "huggingface": ProviderClient("huggingface", HUGGINGFACE_API_BASE),
+}
+
+
+def get_provider(name: str) -> ProviderClient:
+    return providers[name]
+
+
+def open_http_clients() -> None:
+    """Create the pooled clients up front (called from the app lifespan)."""
+    for provider in providers.values():
+        provider.client  # noqa: B018
+
+
+async def close_http_clients() -> None:
+    for provider in providers.values():
+        await provider.aclose()
+
+
+def provider_stats() -> Dict[str, Any]:
+    return {name: provider.stats() for name, provider in providers.items()}
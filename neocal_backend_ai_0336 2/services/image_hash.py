@@ -0,0 +1,157 @@
+"""
+Perceptual hashing and a per-user near-duplicate index for meal photos.
+
+The recognition cache only matches byte-identical uploads. A plate that
+is re-photographed, cropped slightly or re-compressed produces different
+bytes but nearly the same 64-bit perceptual hash. This index keeps the
+hashes of each user's recently recognised photos. A new upload within
+NEAR_DUP_HAMMING_THRESHOLD bits of one of them reuses that result
+instead of calling a vision API.
+
+Two hashes are available (NEAR_DUP_HASH):
+- ``dhash`` -- compares horizontally adjacent pixels of a 9x8 thumbnail.
+  Very cheap and robust to compression and brightness changes.
+- ``phash`` -- takes the low-frequency 8x8 block of a 32x32 DCT. A little
+  more robust to small crops and rescaling.
+"""
+
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageOps
+
+NEAR_DUP_HASH = os.environ.get("NEAR_DUP_HASH", "dhash")
+NEAR_DUP_HAMMING_THRESHOLD = int(os.environ.get("NEAR_DUP_HAMMING_THRESHOLD", "6"))
+NEAR_DUP_MAX_PER_USER = int(os.environ.get("NEAR_DUP_MAX_PER_USER", "32"))
+NEAR_DUP_MAX_USERS = int(os.environ.get("NEAR_DUP_MAX_USERS", "10000"))
+NEAR_DUP_TTL_SECONDS = float(os.environ.get("NEAR_DUP_TTL_SECONDS", str(24 * 3600)))
+
+Foods = List[Dict[str, Any]]
+
+
+def _load_grayscale(image_bytes: bytes, size: Tuple[int, int]) -> Image.Image:
+    image = Image.open(io.BytesIO(image_bytes))
+    # Let the JPEG decoder downscale while decoding; a 12 MP photo
+    # then costs a fraction of a full decode.
+    image.draft("L", (size[0] * 4, size[1] * 4))
+    image = ImageOps.exif_transpose(image).convert("L")
+    return image.resize(size, Image.Resampling.LANCZOS)
+
+
+def dhash(image_bytes: bytes) -> int:
+    pixels = np.asarray(_load_grayscale(image_bytes, (9, 8)), dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int("".join("1" if b else "0" for b in bits), 2)
+
+
+_DCT_32 = np.cos(
+    np.pi / 32 * (np.arange(32)[:, None]) * (np.arange(32)[None, :] + 0.5)
+)
+
+
+def phash(image_bytes: bytes) -> int:
+    pixels = np.asarray(_load_grayscale(image_bytes, (32, 32)), dtype=np.float64)
+    low = (_DCT_32 @ pixels @ _DCT_32.T)[:8, :8].flatten()
+    # Exclude the DC term from the median so overall brightness is ignored
+    bits = low > np.median(low[1:])
+    return int("".join("1" if b else "0" for b in bits), 2)
+
+
+HASHERS = {"dhash": dhash, "phash": phash}
+
+
+def perceptual_hash(image_bytes: bytes, algorithm: str = NEAR_DUP_HASH) -> Optional[int]:
+    """64-bit perceptual hash of an encoded image, or None if it cannot be decoded."""
+    try:
+        return HASHERS[algorithm](image_bytes)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class NearDuplicateIndex:
+    """
+    Per-user ring of ``(hash, foods, recorded_at, signature)`` entries;
+    ``signature`` identifies the recognition pipeline that produced them.
+
+    Each user keeps at most ``max_per_user`` recent photos, and at most
+    ``max_users`` users are tracked (least recently active evicted first).
+    A lookup is a linear Hamming scan of one user's short list, which is
+    a few dozen integer XORs.
+    """
+
+    def __init__(
+        self,
+        threshold: int = NEAR_DUP_HAMMING_THRESHOLD,
+        max_per_user: int = NEAR_DUP_MAX_PER_USER,
+        max_users: int = NEAR_DUP_MAX_USERS,
+        ttl_seconds: float = NEAR_DUP_TTL_SECONDS,
+    ):
+        self.threshold = threshold
+        self.max_per_user = max_per_user
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._users: "OrderedDict[str, List[Tuple[int, Foods, float, str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def find(self, user_id: str, image_hash: int, signature: str = "") -> Optional[Foods]:
+        """Closest earlier result from the same recognition pipeline (``signature``)."""
+        now = time.monotonic()
+        with self._lock:
+            entries = self._users.get(user_id)
+            best: Optional[Tuple[int, Foods]] = None
+            if entries:
+                # Results from another pipeline (model, prompt, vocabulary) are stale
+                entries[:] = [e for e in entries if now - e[2] < self.ttl_seconds and e[3] == signature]
+                for stored_hash, foods, _, _ in entries:
+                    distance = hamming(stored_hash, image_hash)
+                    if distance <= self.threshold and (best is None or distance < best[0]):
+                        best = (distance, foods)
+                self._users.move_to_end(user_id)
+            if best is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return [dict(food) for food in best[1]]
+
+    def add(self, user_id: str, image_hash: int, foods: Foods, signature: str = "") -> None:
+        if not foods:
+            return
+        with self._lock:
+            entries = self._users.setdefault(user_id, [])
+            entries.append((image_hash, [dict(food) for food in foods], time.monotonic(), signature))
+            del entries[:-self.max_per_user]
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._users.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "users": len(self._users),
+                "entries": sum(len(e) for e in self._users.values()),
+                "threshold": self.threshold,
+                "hash": NEAR_DUP_HASH,
+            }
+
+
+near_duplicate_index = NearDuplicateIndex()
@@ -0,0 +1,347 @@
+"""
+Bounded executors for AI inference.
+
+Image recognition can take tens of seconds (remote vision APIs) or pin a
+CPU core (local CLIP), so it never blocks the event loop. Two pools are
+used:
+
+- ``remote`` -- async OpenAI/HuggingFace calls over the pooled clients in
+  ``services.http_clients``. They wait on the network without holding a
+  thread, so this pool only bounds how many are in flight.
+- ``local`` -- a process pool (or thread pool, via INFERENCE_LOCAL_EXECUTOR)
+  for CPU-bound local model inference, so it cannot hold the GIL against
+  request handling. Concurrent images are micro-batched into one CLIP
+  pass (see ``services.batching``).
+
+Each pool admits at most ``workers + max_queue`` jobs; beyond that
+``InferenceBusyError`` is raised so the API can shed load with 503 instead
+of queueing without bound. Every job runs under a timeout. When it
+expires, async jobs are cancelled outright and queued jobs are dropped. A
+process-pool job that is already running is stopped by recycling the
+pool's worker processes. A running thread-pool job cannot be
+interrupted, so callers should pass it the budget as well.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import anyio
+
+from services import ai_service
+from services.ai_service import (
+    HUGGINGFACE_API_KEY,
+    OPENAI_API_KEY,
+    ImageSource,
+    read_image_bytes,
+    parse_image_meal_remote_async,
+    recognize_image_meal_local_batch,
+)
+from services.batching import MicroBatcher
+from services.food_catalogue import load_catalogue_quietly
+from services.model_server import (
+    MODEL_SERVER_SOCKET, ModelServerError, ModelServerUnavailable, SidecarExecutor, model_server_client,
+)
+from services.image_hash import near_duplicate_index, perceptual_hash
+from services.recognition_cache import image_cache_key, pipeline_signature, recognition_cache
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_REMOTE_WORKERS = int(os.environ.get("INFERENCE_REMOTE_WORKERS", "8"))
+INFERENCE_LOCAL_WORKERS = int(os.environ.get("INFERENCE_LOCAL_WORKERS", "1"))
+# With a model server, local models run there instead of in a per-worker pool
+INFERENCE_LOCAL_EXECUTOR = os.environ.get(
+    "INFERENCE_LOCAL_EXECUTOR", "sidecar" if MODEL_SERVER_SOCKET else "process"
+)
+INFERENCE_MAX_QUEUE = int(os.environ.get("INFERENCE_MAX_QUEUE", "16"))
+IMAGE_INFERENCE_TIMEOUT = float(os.environ.get("IMAGE_INFERENCE_TIMEOUT", "45"))
+CLIP_BATCH_MAX_SIZE = int(os.environ.get("CLIP_BATCH_MAX_SIZE", "8"))
+CLIP_BATCH_WINDOW_MS = float(os.environ.get("CLIP_BATCH_WINDOW_MS", "15"))
+
+
+class InferenceBusyError(Exception):
+    """Raised when an inference pool's queue is full."""
+
+
+class InferenceTimeoutError(Exception):
+    """Raised when an inference job exceeds its time budget."""
+
+
+class InferenceExecutor:
+    """
+    A thread or process pool with bounded admission and per-job timeouts.
+
+    ``kind="async"`` runs coroutine functions on the event loop instead;
+    ``max_workers`` then only counts toward the admission limit.
+    ``kind="sidecar"`` sends jobs to the shared model server (see
+    ``services.model_server``); an unreachable server, or a call that
+    failed in the server, counts as busy.
+    """
+
+    def __init__(self, name: str, kind: str, max_workers: int, max_queue: int):
+        if kind not in ("thread", "process", "async", "sidecar"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "thread":
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix=f"inference-{self.name}",
+                    )
+                elif self.kind == "sidecar":
+                    # Client threads only wait on the socket; the server
+                    # bounds model concurrency (MODEL_SERVER_THREADS). One
+                    # thread per admitted job keeps calls from queueing here.
+                    self._executor = SidecarExecutor(model_server_client(), self.max_workers + self.max_queue)
+                else:
+                    # spawn: forking a process that already runs threads
+                    # (uvicorn, the DB pool) can deadlock the child.
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        # Recognition labels are validated against the catalogue
+                        initializer=load_catalogue_quietly,
+                    )
+            return self._executor
+
+    def _discard(self, executor: Executor) -> None:
+        """Stop handing out a pool that has already broken."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _recycle(self, executor: Executor) -> None:
+        """Kill a process pool whose worker is stuck on an overdue job."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        # ProcessPoolExecutor has no public API to stop a running task.
+        for process in list(getattr(executor, "_processes", {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+        logger.warning("Recycled %s inference pool after a timeout", self.name)
+
+    async def run(self, fn: Callable[..., Any], *args: Any, timeout: float) -> Any:
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise InferenceBusyError(f"{self.name} inference queue is full")
+            self._pending += 1
+        try:
+            if self.kind == "async":
+                return await self._run_async(fn, *args, timeout=timeout)
+            deadline = time.monotonic() + timeout
+            for attempt in range(2):
+                executor = self._get_executor()
+                future = None
+                try:
+                    if self.kind == "sidecar":
+                        # Free the client thread soon after the job's own
+                        # deadline rather than after MODEL_SERVER_TIMEOUT
+                        future = executor.submit(fn, *args, timeout=max(0.0, deadline - time.monotonic()) + 1)
+                    else:
+                        future = executor.submit(fn, *args)
+                    # Cancelling the wrapper also cancels the future if still queued
+                    result = await asyncio.wait_for(
+                        asyncio.wrap_future(future), max(0.0, deadline - time.monotonic())
+                    )
+                    break
+                except asyncio.TimeoutError:
+                    with self._lock:
+                        self.timed_out += 1
+                    if self.kind == "process" and future is not None and not future.done():
+                        self._recycle(executor)
+                    raise InferenceTimeoutError(
+                        f"{self.name} inference exceeded {timeout:.1f}s"
+                    ) from None
+                except BrokenExecutor as e:
+                    # Another job's timeout recycled the pool (or a worker
+                    # died); this job was not at fault, so retry it once on
+                    # a fresh pool within its own deadline.
+                    self._discard(executor)
+                    if attempt == 0 and deadline - time.monotonic() > 0:
+                        continue
+                    with self._lock:
+                        self.rejected += 1
+                    raise InferenceBusyError(f"{self.name} inference pool was restarted") from e
+                except (ModelServerUnavailable, ModelServerError) as e:
+                    # The server is down, or its model call failed; either
+                    # way the client should retry later rather than see a 500
+                    with self._lock:
+                        self.rejected += 1
+                    raise InferenceBusyError(str(e)) from e
+            with self._lock:
+                self.completed += 1
+            return result
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    async def _run_async(self, fn: Callable[..., Any], *args: Any, timeout: float) -> Any:
+        try:
+            result = await asyncio.wait_for(fn(*args), timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timed_out += 1
+            raise InferenceTimeoutError(
+                f"{self.name} inference exceeded {timeout:.1f}s"
+            ) from None
+        with self._lock:
+            self.completed += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "pending": self._pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+remote_executor = InferenceExecutor(
+    "remote", "async", INFERENCE_REMOTE_WORKERS, INFERENCE_MAX_QUEUE
+)
+local_executor = InferenceExecutor(
+    "local", INFERENCE_LOCAL_EXECUTOR, INFERENCE_LOCAL_WORKERS, INFERENCE_MAX_QUEUE
+)
+local_batcher = MicroBatcher(
+    "local",
+    recognize_image_meal_local_batch,
+    local_executor,
+    max_batch=CLIP_BATCH_MAX_SIZE,
+    window_ms=CLIP_BATCH_WINDOW_MS,
+)
+
+
+async def parse_image_meal_async(
+    image: ImageSource,
+    timeout: float = IMAGE_INFERENCE_TIMEOUT,
+    user_id: Optional[str] = None,
+    filename: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Async counterpart of ``ai_service.parse_image_meal``.
+
+    The image is resolved to bytes once and passed by value from then on,
+    so uploads go from memory to the providers (or the local pool's
+    worker) without a temp file.
+
+    Results are looked up in the content-addressed recognition cache
+    first, then (when ``user_id`` is given) in that user's index of
+    perceptually similar recent photos. On a miss, hosted providers are
+    called asynchronously under the remote pool's admission limit and the
+    local CLIP fallback runs on the local pool. Both share a single
+    ``timeout`` budget. Heuristic fallback results are returned but never
+    cached.
+    """
+    if isinstance(image, bytes):
+        image_bytes = image
+    else:
+        image_bytes = await anyio.to_thread.run_sync(read_image_bytes, image)
+        if filename is None and isinstance(image, str):
+            filename = image
+    key = image_cache_key(image_bytes)
+
+    cached = await _cache_call(recognition_cache.get, key)
+    if cached is not None:
+        return cached
+
+    image_hash = None
+    if user_id is not None:
+        # Decoding for the hash is CPU work, so keep it off the event loop
+        image_hash = await anyio.to_thread.run_sync(perceptual_hash, image_bytes)
+        if image_hash is not None:
+            # Like the exact cache, only reuse results of the current pipeline
+            signature = pipeline_signature()
+            similar = near_duplicate_index.find(user_id, image_hash, signature)
+            if similar is not None:
+                return similar
+
+    start = time.monotonic()
+    foods, recognised = await _recognize_image(image_bytes, filename, timeout)
+    if not recognised:
+        # A heuristic placeholder (no model, or the providers failed); a
+        # later scan of the same photo should try the models again
+        return foods
+    await _cache_call(recognition_cache.put, key, foods, time.monotonic() - start)
+    if image_hash is not None:
+        near_duplicate_index.add(user_id, image_hash, foods, signature)
+    return foods
+
+
+async def _recognize_image(
+    image_bytes: bytes, filename: Optional[str], timeout: float
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """``(foods, recognised)``; ``recognised`` is False for the heuristic fallback."""
+    deadline = time.monotonic() + timeout
+
+    if OPENAI_API_KEY or HUGGINGFACE_API_KEY:
+        foods = await remote_executor.run(
+            parse_image_meal_remote_async, image_bytes, timeout, timeout=timeout
+        )
+        if foods:
+            return foods, True
+
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise InferenceTimeoutError("image inference budget exhausted")
+    try:
+        return await local_batcher.submit((image_bytes, filename or ""), timeout=remaining)
+    except asyncio.TimeoutError:
+        raise InferenceTimeoutError(
+            f"local inference exceeded {remaining:.1f}s"
+        ) from None
+
+
+async def _cache_call(fn: Callable[..., Any], *args: Any) -> Any:
+    # The SQLite tier does file I/O, so keep it off the event loop
+    if recognition_cache.has_disk_tier:
+        return await anyio.to_thread.run_sync(fn, *args)
+    return fn(*args)
+
+
+def inference_stats() -> Dict[str, Any]:
+    return {
+        "remote": remote_executor.stats(),
+        "local": local_executor.stats(),
+        "local_batching": local_batcher.stats(),
+        "recognition_cache": recognition_cache.stats(),
+        "near_duplicates": near_duplicate_index.stats(),
+        # Models loaded in this process (pool workers keep their own)
+        "models": ai_service.model_cache.stats(),
+        "text_parsing": ai_service.text_parsing_stats(),
+    }
+
+
+def shutdown_executors() -> None:
+    remote_executor.shutdown()
+    local_executor.shutdown()
@@ -1,17 +1,22 @@
 import secrets
 from datetime import datetime
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from models.database import Meal, FoodItem, User
 from models.schemas import MealResponse, Food, Macros
-from services.nutrition_service import lookup_food_nutrition, scale_nutrition_by_grams
+from services.nutrition_service import nutrition_for_grams
 from services.ai_service import parse_text_meal, parse_image_meal, parse_barcode_meal
+from services.food_history import record_logged_foods
 
-def create_meal_from_text(db: Session, user_id: str, description: str):
-    parsed_foods = parse_text_meal(description)
+def create_meal_from_text(db: Session, user_id: str, description: str, timeout: float = None):
+    parsed_foods = parse_text_meal(description, timeout=timeout)
     return _create_meal(db, user_id, description, parsed_foods, "text")
 
 def create_meal_from_image(db: Session, user_id: str, image_url: str):
     parsed_foods = parse_image_meal(image_url)
+    return create_meal_from_parsed_image(db, user_id, image_url, parsed_foods)
+
+def create_meal_from_parsed_image(db: Session, user_id: str, image_url: str, parsed_foods: list):
+    """Persist an image meal whose foods were already recognised elsewhere."""
     # If AI returned explicit calories/macros, trust them and skip lookup
     has_macros = False
     for f in parsed_foods:
@@ -54,25 +59,23 @@ def _create_meal(db: Session, user_id: str, original_input: str, parsed_foods: l
     
     for food_data in parsed_foods:
         if skip_lookup and "calories" in food_data:
-            nutrition = {
-                "calories": food_data["calories"],
-                "protein_g": food_data["protein_g"],
-                "carbs_g": food_data["carbs_g"],
-                "fat_g": food_data["fat_g"]
-            }
+            calories, protein, carbs, fat = (
+                food_data["calories"], food_data["protein_g"], food_data["carbs_g"], food_data["fat_g"]
+            )
         else:
-            base_nutrition = lookup_food_nutrition(food_data["name"])
-            nutrition = scale_nutrition_by_grams(base_nutrition, food_data["grams"])
+            calories, protein, carbs, fat = nutrition_for_grams(
+                food_data["name"], food_data["grams"], food_data.get("nutrition_key")
+            )
         
         food_item = FoodItem(
             food_item_id=f"food_{secrets.token_hex(8)}",
             meal_id=meal_id,
             name=food_data["name"],
             grams=food_data["grams"],
-            calories=nutrition["calories"],
-            protein_g=nutrition["protein_g"],
-            carbs_g=nutrition["carbs_g"],
-            fat_g=nutrition["fat_g"],
+            calories=calories,
+            protein_g=protein,
+            carbs_g=carbs,
+            fat_g=fat,
             model_label=food_data.get("model_label", food_data["name"]),
             confidence=food_data.get("confidence", 0.75)
         )
@@ -80,10 +83,10 @@ def _create_meal(db: Session, user_id: str, original_input: str, parsed_foods: l
         db.add(food_item)
         food_items.append(food_item)
         
-        total_calories += nutrition["calories"]
-        total_protein += nutrition["protein_g"]
-        total_carbs += nutrition["carbs_g"]
-        total_fat += nutrition["fat_g"]
+        total_calories += calories
+        total_protein += protein
+        total_carbs += carbs
+        total_fat += fat
         confidence_scores.append(food_data.get("confidence", 0.75))
     
     avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0.75
@@ -102,6 +105,8 @@ def _create_meal(db: Session, user_id: str, original_input: str, parsed_foods: l
     )
     
     db.add(meal)
+    # Same transaction as the meal, so history never counts a failed log
+    record_logged_foods(db, user_id, parsed_foods, timestamp)
     db.commit()
     db.refresh(meal)
     
@@ -126,18 +131,7 @@ def get_meals_for_date(db: Session, user_id: str, date_str: str):
     start_time = dt.combine(date_obj.date(), dt.min.time())
     end_time = dt.combine(date_obj.date(), dt.max.time())
     
-    meals = db.query(Meal).filter(
-        Meal.user_id == user_id,
-        Meal.timestamp >= start_time,
-        Meal.timestamp <= end_time
-    ).order_by(Meal.timestamp).all()
-    
-    results = []
-    for meal in meals:
-        food_items = db.query(FoodItem).filter(FoodItem.meal_id == meal.meal_id).all()
-        results.append(format_meal_response(meal, food_items))
-    
-    return results
+    return _get_meals_between(db, user_id, start_time, end_time)
 
 
 def get_meals_for_range(db: Session, user_id: str, start_date_str: str, end_date_str: str):
@@ -151,18 +145,25 @@ def get_meals_for_range(db: Session, user_id: str, start_date_str: str, end_date
     start_time = dt.combine(start_obj.date(), dt.min.time())
     end_time = dt.combine(end_obj.date(), dt.max.time())
 
-    meals = db.query(Meal).filter(
-        Meal.user_id == user_id,
-        Meal.timestamp >= start_time,
-        Meal.timestamp <= end_time
-    ).order_by(Meal.timestamp).all()
+    return _get_meals_between(db, user_id, start_time, end_time)
+
 
-    results = []
-    for meal in meals:
-        food_items = db.query(FoodItem).filter(FoodItem.meal_id == meal.meal_id).all()
-        results.append(format_meal_response(meal, food_items))
+def _get_meals_between(db: Session, user_id: str, start_time, end_time):
+    # Load every meal's food items with a single extra IN query rather than
+    # one query per meal, so long history ranges stay at two round trips.
+    meals = (
+        db.query(Meal)
+        .options(selectinload(Meal.food_items))
+        .filter(
+            Meal.user_id == user_id,
+            Meal.timestamp >= start_time,
+            Meal.timestamp <= end_time
+        )
+        .order_by(Meal.timestamp)
+        .all()
+    )
 
-    return results
+    return [format_meal_response(meal, meal.food_items) for meal in meals]
 
 
 def create_meal_from_structured(db: Session, user_id: str, foods: list, original_input: str = "manual"):
@@ -0,0 +1,148 @@
+"""
+Process-wide registry of loaded models.
+
+Loading GPT-2 or CLIP takes seconds and hundreds of MB, and inference runs
+on worker threads, so concurrent first requests used to each load their
+own copy. ``ModelRegistry.get`` is single-flight: the first caller for a
+name runs the loader under that name's lock, and the others wait for its
+result. Different models still load in parallel.
+
+With MODEL_IDLE_UNLOAD_SECONDS > 0, a background thread drops models not
+used within that window, so a worker that stopped getting image requests
+gives the memory back. The next request loads the model again, so leave
+it at 0 (never unload) where load latency matters more than memory.
+"""
+
+import gc
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MODEL_IDLE_UNLOAD_SECONDS = float(os.environ.get("MODEL_IDLE_UNLOAD_SECONDS", "0"))
+
+
+class _Entry:
+    __slots__ = ("lock", "loaded", "last_used")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # ``(model,)`` once loaded (the model may be None, a fallback), else
+        # None. One attribute, so a lock-free reader never sees a loaded
+        # entry without its model.
+        self.loaded: Optional[Tuple[Any]] = None
+        self.last_used = 0.0
+
+
+class ModelRegistry:
+    """Single-flight lazy loading with optional idle unloading."""
+
+    def __init__(self, idle_seconds: float = MODEL_IDLE_UNLOAD_SECONDS):
+        self.idle_seconds = idle_seconds
+        self.loads = 0
+        self.unloads = 0
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self._reaper: Optional[threading.Thread] = None
+
+    def _entry(self, name: str) -> _Entry:
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                entry = self._entries[name] = _Entry()
+            return entry
+
+    def get(self, name: str, loader: Callable[[], Any]) -> Any:
+        """The model called ``name``, loading it with ``loader`` if needed."""
+        entry = self._entry(name)
+        entry.last_used = time.monotonic()
+        loaded = entry.loaded
+        if loaded is not None:
+            return loaded[0]
+        with entry.lock:
+            if entry.loaded is None:
+                start = time.monotonic()
+                entry.loaded = (loader(),)
+                with self._lock:
+                    self.loads += 1
+                logger.info("Loaded %s in %.1fs", name, time.monotonic() - start)
+                self._start_reaper()
+            entry.last_used = time.monotonic()
+            return entry.loaded[0]
+
+    def __contains__(self, name: str) -> bool:
+        entry = self._entries.get(name)
+        return entry is not None and entry.loaded is not None
+
+    def unload(self, name: str) -> bool:
+        """Drop ``name``; callers still holding the model keep it until they finish."""
+        entry = self._entries.get(name)
+        if entry is None:
+            return False
+        with entry.lock:
+            if entry.loaded is None:
+                return False
+            entry.loaded = None
+        with self._lock:
+            self.unloads += 1
+        gc.collect()
+        _release_accelerator_memory()
+        logger.info("Unloaded %s", name)
+        return True
+
+    def unload_idle(self, now: Optional[float] = None) -> int:
+        if self.idle_seconds <= 0:
+            return 0
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entries = list(self._entries.items())
+        idle = []
+        for name, entry in entries:
+            loaded = entry.loaded
+            # Fallback-only entries hold nothing worth freeing
+            if loaded is not None and loaded[0] is not None and now - entry.last_used >= self.idle_seconds:
+                idle.append(name)
+        return sum(self.unload(name) for name in idle)
+
+    def _start_reaper(self) -> None:
+        with self._lock:
+            if self.idle_seconds <= 0 or self._reaper is not None:
+                return
+            self._reaper = threading.Thread(target=self._reap, name="model-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap(self) -> None:
+        interval = min(60.0, max(1.0, self.idle_seconds / 4))
+        while True:
+            time.sleep(interval)
+            try:
+                self.unload_idle()
+            except Exception:  # pragma: no cover
+                logger.exception("Idle model unloading failed")
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            models = {}
+            for name, entry in self._entries.items():
+                loaded = entry.loaded
+                if loaded is not None:
+                    models[name] = {"idle_seconds": round(now - entry.last_used, 1), "fallback": loaded[0] is None}
+            return {
+                "idle_unload_seconds": self.idle_seconds,
+                "loads": self.loads,
+                "unloads": self.unloads,
+                "loaded": models,
+            }
+
+
+def _release_accelerator_memory() -> None:
+    try:
+        import torch  # type: ignore
+    except Exception:
+        return
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
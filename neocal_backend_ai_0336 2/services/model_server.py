@@ -0,0 +1,287 @@
+"""
+A local model server (sidecar) shared by all API workers on a node.
+
+With ``uvicorn --workers N`` every worker, and every process in its local
+inference pool, loads its own GPT-2 and CLIP, so model memory grows with
+the worker count. Preloading in a master process and sharing pages
+copy-on-write does not work here: uvicorn and the inference pools start
+their children with spawn (forking a threaded process can deadlock), and
+even after a fork, CPython refcount updates would dirty most pages.
+
+Instead, one ``python -m services.model_server`` process per node loads
+the models once and serves calls over a Unix socket. Workers set
+MODEL_SERVER_SOCKET to use it:
+
+- ``parse_text_meal`` and ``warm_up_text_model`` are forwarded to it
+  (see ``services.ai_service``);
+- the local inference executor defaults to kind ``sidecar`` (see
+  ``services.inference``), so micro-batched CLIP jobs run in the server.
+
+Memory per node is then one copy of each model plus N small API workers.
+
+Only the functions in ``SERVED_FUNCTIONS`` can be called. Messages are
+pickled, so the socket is created with mode 0600; set
+MODEL_SERVER_AUTHKEY to also require a shared-secret handshake.
+"""
+
+import argparse
+import concurrent.futures
+import logging
+import os
+import threading
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MODEL_SERVER_SOCKET = os.environ.get("MODEL_SERVER_SOCKET") or None
+MODEL_SERVER_AUTHKEY = os.environ.get("MODEL_SERVER_AUTHKEY") or None
+# Concurrent model calls in the server; the rest wait their turn
+MODEL_SERVER_THREADS = int(os.environ.get("MODEL_SERVER_THREADS", "2"))
+# Client-side cap on one call, so a hung server cannot pin a worker thread
+MODEL_SERVER_TIMEOUT = float(os.environ.get("MODEL_SERVER_TIMEOUT", "120"))
+MODEL_SERVER_POOL_SIZE = int(os.environ.get("MODEL_SERVER_POOL_SIZE", "8"))
+
+SERVED_FUNCTIONS = (
+    "ping",
+    "parse_text_meal",
+    "parse_image_meal_local",
+    "parse_image_meal_local_batch",
+    "recognize_image_meal_local_batch",
+    "warm_up_text_model",
+    "warm_up_image_model",
+)
+
+
+class ModelServerUnavailable(ConnectionError):
+    """The model server cannot be reached, or dropped the connection."""
+
+
+class ModelServerError(RuntimeError):
+    """The model server ran the call and it raised."""
+
+
+def _authkey(authkey: Optional[str]) -> Optional[bytes]:
+    return authkey.encode("utf-8") if authkey else None
+
+
+def _served_functions() -> Dict[str, Callable[..., Any]]:
+    from services import ai_service
+
+    functions: Dict[str, Callable[..., Any]] = {"ping": lambda: "pong"}
+    for name in SERVED_FUNCTIONS[1:]:
+        functions[name] = getattr(ai_service, name)
+    return functions
+
+
+class ModelServer:
+    """Accepts connections on a Unix socket and runs served functions for them."""
+
+    def __init__(
+        self,
+        socket_path: str,
+        authkey: Optional[str] = MODEL_SERVER_AUTHKEY,
+        threads: int = MODEL_SERVER_THREADS,
+        functions: Optional[Dict[str, Callable[..., Any]]] = None,
+    ):
+        self.socket_path = socket_path
+        self.functions = functions if functions is not None else _served_functions()
+        self.calls = 0
+        self.errors = 0
+        self._slots = threading.BoundedSemaphore(max(1, threads))
+        self._lock = threading.Lock()
+        self._closed = False
+
+        if os.path.exists(socket_path):
+            # Left over from a server that did not shut down cleanly
+            os.unlink(socket_path)
+        # Create the socket owner-only; umask avoids a window before a chmod
+        old_umask = os.umask(0o177)
+        try:
+            self._listener = Listener(socket_path, family="AF_UNIX", authkey=_authkey(authkey))
+        finally:
+            os.umask(old_umask)
+
+    def serve_forever(self) -> None:
+        logger.info("Model server listening on %s", self.socket_path)
+        while not self._closed:
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                if self._closed:
+                    break
+                raise
+            except Exception as e:  # failed authkey handshake
+                logger.warning("Rejected model server connection: %s", e)
+                continue
+            threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+    def _serve_connection(self, conn: Connection) -> None:
+        with conn:
+            while True:
+                try:
+                    name, args = conn.recv()
+                except (EOFError, OSError):
+                    return
+                conn.send(self._call(name, args))
+
+    def _call(self, name: str, args: tuple) -> tuple:
+        fn = self.functions.get(name)
+        if fn is None:
+            return ("error", f"unknown function {name!r}")
+        with self._slots:
+            try:
+                result = fn(*args)
+            except Exception as e:
+                logger.exception("Model server call %s failed", name)
+                with self._lock:
+                    self.errors += 1
+                return ("error", f"{type(e).__name__}: {e}")
+        with self._lock:
+            self.calls += 1
+        return ("ok", result)
+
+    def close(self) -> None:
+        self._closed = True
+        self._listener.close()
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
+
+
+class ModelServerClient:
+    """Blocking, thread-safe client with a small pool of reusable connections."""
+
+    def __init__(
+        self,
+        socket_path: str,
+        authkey: Optional[str] = MODEL_SERVER_AUTHKEY,
+        timeout: float = MODEL_SERVER_TIMEOUT,
+        pool_size: int = MODEL_SERVER_POOL_SIZE,
+    ):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._authkey = _authkey(authkey)
+        self._idle: List[Connection] = []
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> Connection:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        try:
+            return Client(self.socket_path, family="AF_UNIX", authkey=self._authkey)
+        except Exception as e:
+            raise ModelServerUnavailable(f"model server at {self.socket_path}: {e}") from e
+
+    def _release(self, conn: Connection) -> None:
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def call(self, name: str, *args: Any, timeout: Optional[float] = None) -> Any:
+        timeout = self.timeout if timeout is None else timeout
+        conn = self._acquire()
+        try:
+            conn.send((name, args))
+            if not conn.poll(timeout):
+                raise ModelServerUnavailable(f"model server call {name} exceeded {timeout:.1f}s")
+            status, result = conn.recv()
+        except ModelServerUnavailable:
+            conn.close()
+            raise
+        except (EOFError, OSError) as e:
+            # e.g. the server restarted; drop the stale connection
+            conn.close()
+            raise ModelServerUnavailable(f"model server connection lost: {e}") from e
+        self._release(conn)
+        if status != "ok":
+            raise ModelServerError(result)
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+_client: Optional[ModelServerClient] = None
+_client_lock = threading.Lock()
+
+
+def model_server_client(socket_path: Optional[str] = None) -> ModelServerClient:
+    """The process-wide client for ``socket_path`` (default MODEL_SERVER_SOCKET)."""
+    global _client
+    socket_path = socket_path or MODEL_SERVER_SOCKET
+    if not socket_path:
+        raise ModelServerUnavailable("MODEL_SERVER_SOCKET is not set")
+    with _client_lock:
+        if _client is None or _client.socket_path != socket_path:
+            _client = ModelServerClient(socket_path)
+        return _client
+
+
+class SidecarExecutor(concurrent.futures.Executor):
+    """
+    ``concurrent.futures`` executor that runs jobs in the model server.
+
+    ``submit(fn, *args)`` calls the served function named ``fn.__name__``;
+    local threads only wait on the socket, so there can be one per
+    admitted job.
+    """
+
+    def __init__(self, client: ModelServerClient, max_workers: int):
+        self.client = client
+        self._threads = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="model-server-client"
+        )
+
+    def submit(
+        self, fn: Callable[..., Any], /, *args: Any, timeout: Optional[float] = None, **kwargs: Any
+    ) -> concurrent.futures.Future:
+        """``timeout`` bounds how long the client thread waits (default MODEL_SERVER_TIMEOUT)."""
+        if kwargs:
+            raise TypeError("SidecarExecutor does not pass keyword arguments")
+        return self._threads.submit(self.client.call, fn.__name__, *args, timeout=timeout)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        self._threads.shutdown(wait=wait, cancel_futures=cancel_futures)
+        self.client.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve local models to API workers over a Unix socket")
+    parser.add_argument("--socket", default=MODEL_SERVER_SOCKET, help="socket path (default: MODEL_SERVER_SOCKET)")
+    parser.add_argument("--preload", default="text,image", help="models to load before serving")
+    args = parser.parse_args(argv)
+    if not args.socket:
+        parser.error("--socket or MODEL_SERVER_SOCKET is required")
+
+    logging.basicConfig(level=logging.INFO)
+    from services import ai_service
+    from services.food_catalogue import load_catalogue_quietly
+
+    # The server runs the models itself; never forward to its own socket
+    ai_service.MODEL_SERVER_SOCKET = None
+    # Before preloading, so CLIP labels are validated like the API's
+    load_catalogue_quietly()
+    warmers = {"text": ai_service.warm_up_text_model, "image": ai_service.warm_up_image_model}
+    for name in filter(None, (m.strip() for m in args.preload.split(","))):
+        logger.info("Preloading %s model: %s", name, "ok" if warmers[name]() else "fallback only")
+
+    server = ModelServer(args.socket)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,16 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from services.food_catalogue import catalogue_version, current_catalogue
+from services.food_names import FoodNameIndex, normalize_name
+
+NUTRITION_CACHE_SIZE = int(os.environ.get("NUTRITION_CACHE_SIZE", "4096"))
+
+# (calories, protein_g, carbs_g, fat_g), per gram when cached
+NutritionValues = Tuple[float, float, float, float]
+
 NUTRITION_DATABASE = {
     "chicken_grilled": {"calories": 165, "protein_g": 31, "carbs_g": 0, "fat_g": 3.6},
     "chicken_breast": {"calories": 165, "protein_g": 31, "carbs_g": 0, "fat_g": 3.6},
@@ -33,21 +46,124 @@ NUTRITION_DATABASE = {
     "burger": {"calories": 540, "protein_g": 25, "carbs_g": 45, "fat_g": 28},
     "fries": {"calories": 365, "protein_g": 3.4, "carbs_g": 48, "fat_g": 17},
     "dressing": {"calories": 440, "protein_g": 1, "carbs_g": 2, "fat_g": 48},
+    "salad": {"calories": 30, "protein_g": 1.7, "carbs_g": 5.7, "fat_g": 0.8},
+    "noodles": {"calories": 138, "protein_g": 4.5, "carbs_g": 25, "fat_g": 2.1},
+    "sushi": {"calories": 143, "protein_g": 6, "carbs_g": 29, "fat_g": 0.6},
+    "fish": {"calories": 128, "protein_g": 26, "carbs_g": 0, "fat_g": 2.7},
+    "steak": {"calories": 271, "protein_g": 25, "carbs_g": 0, "fat_g": 19},
+    "tacos": {"calories": 226, "protein_g": 9, "carbs_g": 20, "fat_g": 12},
+    "biryani": {"calories": 170, "protein_g": 7.6, "carbs_g": 21, "fat_g": 6},
+    "sandwich": {"calories": 250, "protein_g": 11, "carbs_g": 28, "fat_g": 10},
+    "omelette": {"calories": 154, "protein_g": 11, "carbs_g": 0.6, "fat_g": 12},
+    "soup": {"calories": 40, "protein_g": 2, "carbs_g": 6, "fat_g": 1},
+    "ice_cream": {"calories": 207, "protein_g": 3.5, "carbs_g": 24, "fat_g": 11},
+    "cake": {"calories": 350, "protein_g": 4, "carbs_g": 50, "fat_g": 15},
+    "fruit": {"calories": 55, "protein_g": 0.7, "carbs_g": 14, "fat_g": 0.2},
     "meal": {"calories": 300, "protein_g": 15, "carbs_g": 35, "fat_g": 10},
     "mixed_meal": {"calories": 300, "protein_g": 15, "carbs_g": 35, "fat_g": 10},
 }
 
-def lookup_food_nutrition(food_name: str):
+DEFAULT_NUTRITION = {"calories": 250, "protein_g": 10, "carbs_g": 35, "fat_g": 8}
+
+_name_index = None
+
+
+def get_name_index() -> FoodNameIndex:
+    global _name_index
+    if _name_index is None:
+        _name_index = FoodNameIndex(NUTRITION_DATABASE)
+    return _name_index
+
+
+def lookup_food_nutrition(food_name: str, nutrition_key: str = None):
+    # A loaded catalogue is authoritative; the built-in foods are only
+    # used while the foods table is empty
+    catalogue = current_catalogue()
+    if catalogue is not None:
+        found = catalogue.get(normalize_name(nutrition_key)) if nutrition_key else None
+        return found or catalogue.lookup(food_name) or DEFAULT_NUTRITION
+
+    # Recognisers that already know the database entry skip the name match
+    if nutrition_key in NUTRITION_DATABASE:
+        return NUTRITION_DATABASE[nutrition_key]
+
     food_key = food_name.lower().replace(" ", "_")
     
     if food_key in NUTRITION_DATABASE:
         return NUTRITION_DATABASE[food_key]
+
+    match = get_name_index().best(food_name)
+    if match is not None:
+        return NUTRITION_DATABASE[match]
     
-    for key, nutrition in NUTRITION_DATABASE.items():
-        if key in food_key or food_key in key:
-            return nutrition
-    
-    return {"calories": 250, "protein_g": 10, "carbs_g": 35, "fat_g": 8}
+    return DEFAULT_NUTRITION
+
+class NutritionCache:
+    """LRU of resolved per-gram nutrition, keyed by normalised food name.
+
+    Meal logging resolves the same few hundred foods over and over; each
+    resolution is a name-index lookup plus a dict. Entries are dropped
+    whenever ``catalogue_version()`` changes.
+    """
+
+    def __init__(self, max_size: int = NUTRITION_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, Optional[str]], NutritionValues]" = OrderedDict()
+        self._version = catalogue_version()
+        self._lock = threading.Lock()
+
+    def get(self, food_name: str, nutrition_key: Optional[str] = None) -> NutritionValues:
+        key = (normalize_name(food_name), nutrition_key)
+        version = catalogue_version()
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            values = self._entries.get(key)
+            if values is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return values
+            self.misses += 1
+
+        nutrition = lookup_food_nutrition(food_name, nutrition_key)
+        values = (
+            nutrition["calories"] / 100, nutrition["protein_g"] / 100,
+            nutrition["carbs_g"] / 100, nutrition["fat_g"] / 100,
+        )
+        with self._lock:
+            if version == self._version:
+                self._entries[key] = values
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return values
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+nutrition_cache = NutritionCache()
+
+
+def nutrition_for_grams(food_name: str, grams: float, nutrition_key: Optional[str] = None) -> NutritionValues:
+    """``(calories, protein_g, carbs_g, fat_g)`` for ``grams`` of the food."""
+    calories, protein, carbs, fat = nutrition_cache.get(food_name, nutrition_key)
+    return calories * grams, protein * grams, carbs * grams, fat * grams
+
 
 def scale_nutrition_by_grams(nutrition: dict, grams: float):
     per_100g = {k: v / 100 for k, v in nutrition.items()}
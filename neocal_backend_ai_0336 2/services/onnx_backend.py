@@ -0,0 +1,189 @@
+"""
+ONNX Runtime backend for the local models, for CPU-only nodes.
+
+MODEL_BACKEND selects how GPT-2 and CLIP run:
+
+- ``torch`` (default) -- the fp32 PyTorch models via transformers.
+- ``onnx`` -- the models are exported to ONNX once, cached under
+  ONNX_CACHE_DIR, and run through ONNX Runtime with full graph
+  optimisation.
+- ``onnx-int8`` -- as ``onnx``, with int8 dynamic quantisation of the
+  weights (about 4x smaller, usually faster on CPU; scores shift slightly,
+  see ``scripts/bench_model_backends.py`` for top-1 agreement).
+
+For CLIP only the image tower is exported. The label embeddings are
+computed once by the PyTorch text tower and cached on disk (see
+``services.clip_classifier``), so per-request work is one ONNX Runtime
+call plus the index search. GPT-2 is exported through optimum's
+``ORTModelForCausalLM``, which plugs into the transformers pipeline.
+
+ONNX Runtime sizes its intra-op pool to every core by default. With
+several pool processes per node that oversubscribes the CPU, so
+ONNX_INTRA_OP_THREADS defaults to the cores divided by
+INFERENCE_LOCAL_WORKERS.
+
+onnxruntime (and optimum, for GPT-2) are optional; when missing, loading
+fails and the caller falls back to the torch backend.
+"""
+
+import logging
+import os
+import re
+import tempfile
+from typing import Any, List, Sequence
+
+import numpy as np
+
+from services.clip_classifier import CLIP_MODEL_NAME, ClipClassifier, normalize_rows
+
+logger = logging.getLogger(__name__)
+
+MODEL_BACKENDS = ("torch", "onnx", "onnx-int8")
+MODEL_BACKEND = os.environ.get("MODEL_BACKEND", "torch").lower()
+ONNX_CACHE_DIR = os.environ.get(
+    "ONNX_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "onnx"),
+)
+ONNX_INTRA_OP_THREADS = int(os.environ.get("ONNX_INTRA_OP_THREADS", "0"))
+ONNX_OPSET = 17
+
+try:
+    import onnxruntime as ort  # type: ignore
+except Exception:  # pragma: no cover
+    ort = None  # type: ignore
+
+if MODEL_BACKEND not in MODEL_BACKENDS:
+    raise ValueError(f"MODEL_BACKEND must be one of {', '.join(MODEL_BACKENDS)}, not {MODEL_BACKEND!r}")
+
+
+def intra_op_threads(workers: int = 0) -> int:
+    """ONNX_INTRA_OP_THREADS, or the cores shared out between ``workers`` pool processes."""
+    if ONNX_INTRA_OP_THREADS > 0:
+        return ONNX_INTRA_OP_THREADS
+    if workers <= 0:
+        workers = int(os.environ.get("INFERENCE_LOCAL_WORKERS", "1"))
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def session_options(threads: int = 0) -> Any:
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = threads or intra_op_threads()
+    # One model call at a time per session; parallelism comes from intra-op
+    options.inter_op_num_threads = 1
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return options
+
+
+def onnx_model_dir(model_name: str, revision: str, quantize: bool, cache_dir: str = ONNX_CACHE_DIR) -> str:
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+    return os.path.join(cache_dir, f"{slug}@{revision[:12]}{'-int8' if quantize else ''}")
+
+
+def _quantize(source: str, target: str) -> None:
+    from onnxruntime.quantization import QuantType, quantize_dynamic  # type: ignore
+
+    quantize_dynamic(source, target, weight_type=QuantType.QInt8)
+
+
+def export_clip_vision(model: Any, path: str, quantize: bool = False) -> str:
+    """Export CLIP's image tower plus projection to ``path`` (written atomically)."""
+    import torch  # type: ignore
+
+    class VisionTower(torch.nn.Module):
+        def __init__(self, clip):
+            super().__init__()
+            self.clip = clip
+
+        def forward(self, pixel_values):
+            return self.clip.get_image_features(pixel_values=pixel_values)
+
+    size = model.config.vision_config.image_size
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(path)) as tmp:
+        fp32_path = os.path.join(tmp, "vision.onnx")
+        with torch.no_grad():
+            torch.onnx.export(
+                VisionTower(model).eval().cpu(),
+                (torch.zeros(1, 3, size, size),),
+                fp32_path,
+                input_names=["pixel_values"],
+                output_names=["image_embeds"],
+                dynamic_axes={"pixel_values": {0: "batch"}, "image_embeds": {0: "batch"}},
+                opset_version=ONNX_OPSET,
+            )
+        out_path = os.path.join(tmp, "vision-int8.onnx") if quantize else fp32_path
+        if quantize:
+            _quantize(fp32_path, out_path)
+        os.replace(out_path, path)
+    return path
+
+
+class OnnxClipClassifier(ClipClassifier):
+    """``ClipClassifier`` whose image tower runs in ONNX Runtime."""
+
+    def __init__(self, model: Any, processor: Any, model_name: str, labels: Sequence[str],
+                 quantize: bool = False):
+        super().__init__(model, processor, model_name, labels, device="cpu")
+        path = os.path.join(onnx_model_dir(model_name, self.revision, quantize), "vision.onnx")
+        if not os.path.exists(path):
+            logger.info("Exporting CLIP image tower to %s", path)
+            export_clip_vision(model, path, quantize)
+        self.session = ort.InferenceSession(path, session_options(), providers=["CPUExecutionProvider"])
+        # The torch image tower is no longer needed; keep the text tower
+        # for set_labels and release the vision weights.
+        model.vision_model = None
+
+    @classmethod
+    def load(cls, labels: Sequence[str], model_name: str = CLIP_MODEL_NAME,
+             quantize: bool = False) -> "OnnxClipClassifier":
+        if ort is None:
+            raise RuntimeError("onnxruntime is not installed")
+        from services.clip_classifier import CLIPModel, CLIPProcessor
+
+        if CLIPModel is None:
+            raise RuntimeError("transformers/torch are not installed")
+        model = CLIPModel.from_pretrained(model_name).eval()
+        processor = CLIPProcessor.from_pretrained(model_name)
+        return cls(model, processor, model_name, labels, quantize)
+
+    def image_embeddings(self, images: List[Any]) -> np.ndarray:
+        pixel_values = self.processor(images=images, return_tensors="np")["pixel_values"]
+        (features,) = self.session.run(None, {"pixel_values": pixel_values.astype(np.float32)})
+        return normalize_rows(features)
+
+
+def load_onnx_text_pipeline(model_name: str = "gpt2", quantize: bool = False) -> Any:
+    """A transformers text-generation pipeline over an ONNX Runtime GPT-2."""
+    if ort is None:
+        raise RuntimeError("onnxruntime is not installed")
+    try:
+        from optimum.onnxruntime import ORTModelForCausalLM, ORTQuantizer  # type: ignore
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig  # type: ignore
+        from transformers import AutoTokenizer, pipeline  # type: ignore
+    except Exception as e:
+        raise RuntimeError(f"optimum[onnxruntime] is not installed: {e}") from e
+
+    export_dir = onnx_model_dir(model_name, "main", quantize=False)
+    if not os.path.exists(os.path.join(export_dir, "config.json")):
+        logger.info("Exporting %s to %s", model_name, export_dir)
+        ORTModelForCausalLM.from_pretrained(model_name, export=True).save_pretrained(export_dir)
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(export_dir)
+
+    model_dir, file_name = export_dir, None
+    if quantize:
+        model_dir = onnx_model_dir(model_name, "main", quantize=True)
+        if not os.path.exists(os.path.join(model_dir, "config.json")):
+            quantizer = ORTQuantizer.from_pretrained(export_dir)
+            quantizer.quantize(
+                save_dir=model_dir,
+                quantization_config=AutoQuantizationConfig.avx2(is_static=False, per_channel=False),
+            )
+            AutoTokenizer.from_pretrained(export_dir).save_pretrained(model_dir)
+        file_name = next(f for f in os.listdir(model_dir) if f.endswith("_quantized.onnx"))
+
+    model = ORTModelForCausalLM.from_pretrained(
+        model_dir, file_name=file_name, session_options=session_options(),
+        provider="CPUExecutionProvider",
+    )
+    return pipeline("text-generation", model=model, tokenizer=AutoTokenizer.from_pretrained(model_dir))
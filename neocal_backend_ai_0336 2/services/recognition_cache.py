@@ -0,0 +1,207 @@
+"""
+Content-addressed cache of image recognition results.
+
+Clients usually preview a photo with /meals/scan and then commit the same
+photo with /meals/from-image. Keying results on a hash of the image bytes
+plus the recognition pipeline's signature (models and prompt version)
+lets the second call skip the vision API entirely. A change of model or
+prompt changes the signature, which invalidates old entries.
+
+The in-memory tier is a bounded LRU. When RECOGNITION_CACHE_PATH is set,
+results are also written through to a SQLite file. That tier survives
+restarts and is shared by workers on the same host. Expired rows, and the
+oldest rows beyond RECOGNITION_CACHE_DISK_MAX_ROWS, are deleted when the
+file is opened and every RECOGNITION_CACHE_PRUNE_EVERY writes.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from services import ai_service
+from services.clip_classifier import CLIP_MODEL_NAME
+from services.food_index import food_vocabulary_digest
+from services.onnx_backend import MODEL_BACKEND
+
+logger = logging.getLogger(__name__)
+
+RECOGNITION_CACHE_SIZE = int(os.environ.get("RECOGNITION_CACHE_SIZE", "1024"))
+RECOGNITION_CACHE_PATH = os.environ.get("RECOGNITION_CACHE_PATH")
+RECOGNITION_CACHE_TTL_SECONDS = float(os.environ.get("RECOGNITION_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+RECOGNITION_CACHE_DISK_MAX_ROWS = int(os.environ.get("RECOGNITION_CACHE_DISK_MAX_ROWS", "100000"))
+# Expired and surplus rows are deleted on open and after this many writes
+RECOGNITION_CACHE_PRUNE_EVERY = 500
+
+Foods = List[Dict[str, Any]]
+
+
+def pipeline_signature() -> str:
+    """Identify the models and prompt that would produce a recognition result."""
+    prompt_version = hashlib.sha256(ai_service.OPENAI_VISION_PROMPT.encode("utf-8")).hexdigest()[:12]
+    parts = [f"prompt={prompt_version}"]
+    if ai_service.OPENAI_API_KEY:
+        parts.append(f"openai={ai_service.OPENAI_VISION_MODEL}")
+    if ai_service.HUGGINGFACE_API_KEY:
+        parts.append(f"hf={ai_service.HUGGINGFACE_VISION_MODEL}")
+    # Quantised backends score slightly differently, so they get their own entries
+    parts.append(f"local={CLIP_MODEL_NAME}:{MODEL_BACKEND}:{food_vocabulary_digest()}")
+    return "|".join(parts)
+
+
+def image_cache_key(image_bytes: bytes) -> str:
+    digest = hashlib.sha256(image_bytes).hexdigest()
+    signature = hashlib.sha256(pipeline_signature().encode("utf-8")).hexdigest()[:16]
+    return f"{digest}:{signature}"
+
+
+class RecognitionCache:
+    """LRU of ``key -> (foods, inference_seconds)`` with an optional SQLite tier."""
+
+    def __init__(
+        self,
+        max_size: int = RECOGNITION_CACHE_SIZE,
+        db_path: Optional[str] = RECOGNITION_CACHE_PATH,
+        ttl_seconds: float = RECOGNITION_CACHE_TTL_SECONDS,
+        max_disk_rows: int = RECOGNITION_CACHE_DISK_MAX_ROWS,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_rows = max_disk_rows
+        self.pruned = 0
+        self._writes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._entries: "OrderedDict[str, Tuple[Foods, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS recognition_cache ("
+                " cache_key TEXT PRIMARY KEY,"
+                " foods TEXT NOT NULL,"
+                " inference_seconds REAL NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_recognition_cache_created_at"
+                " ON recognition_cache (created_at)"
+            )
+            self._db.commit()
+            with self._lock:
+                self._prune()
+
+    @property
+    def has_disk_tier(self) -> bool:
+        return self._db is not None
+
+    @staticmethod
+    def _copy(foods: Foods) -> Foods:
+        return [dict(food) for food in foods]
+
+    def _remember(self, key: str, foods: Foods, seconds: float) -> None:
+        self._entries[key] = (foods, seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _prune(self) -> None:
+        """Delete expired rows, then the oldest beyond max_disk_rows. Holds _lock."""
+        try:
+            deleted = self._db.execute(
+                "DELETE FROM recognition_cache WHERE created_at <= ?",
+                (time.time() - self.ttl_seconds,),
+            ).rowcount
+            # Other workers share the file, so count rather than track
+            surplus = self._db.execute("SELECT COUNT(*) FROM recognition_cache").fetchone()[0] - self.max_disk_rows
+            if surplus > 0:
+                deleted += self._db.execute(
+                    "DELETE FROM recognition_cache WHERE cache_key IN ("
+                    " SELECT cache_key FROM recognition_cache ORDER BY created_at LIMIT ?)",
+                    (surplus,),
+                ).rowcount
+            self._db.commit()
+            self.pruned += deleted
+        except sqlite3.Error as e:
+            logger.warning("Recognition cache prune failed: %s", e)
+
+    def get(self, key: str) -> Optional[Foods]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.saved_seconds += entry[1]
+                return self._copy(entry[0])
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT foods, inference_seconds FROM recognition_cache"
+                    " WHERE cache_key = ? AND created_at > ?",
+                    (key, time.time() - self.ttl_seconds),
+                ).fetchone()
+                if row is not None:
+                    foods, seconds = json.loads(row[0]), row[1]
+                    self._remember(key, foods, seconds)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    self.saved_seconds += seconds
+                    return self._copy(foods)
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, foods: Foods, inference_seconds: float) -> None:
+        if not foods:
+            return
+        foods = self._copy(foods)
+        with self._lock:
+            if self.max_size > 0:
+                self._remember(key, foods, inference_seconds)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO recognition_cache VALUES (?, ?, ?, ?)",
+                        (key, json.dumps(foods), inference_seconds, time.time()),
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    logger.warning("Recognition cache write failed: %s", e)
+                self._writes += 1
+                if self._writes % RECOGNITION_CACHE_PRUNE_EVERY == 0:
+                    self._prune()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = 0
+            self.saved_seconds = 0.0
+            if self._db is not None:
+                self._db.execute("DELETE FROM recognition_cache")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "saved_inference_seconds": round(self.saved_seconds, 3),
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "disk_tier": self._db is not None,
+                "disk_pruned": self.pruned,
+            }
+
+
+recognition_cache = RecognitionCache()
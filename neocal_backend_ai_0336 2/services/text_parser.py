@@ -0,0 +1,239 @@
+"""
+Rule-based fast path for text meal parsing.
+
+Most descriptions are short lists like "2 eggs and toast" or "200g
+chicken breast with a cup of rice". They do not need a 160-token GPT-2
+generation. ``parse_text_meal_fast`` tokenises the description and scans
+it once, left to right:
+
+- food names are matched against the food vocabulary
+  (``services.food_index``: database keys plus FOOD_LABELS_FILE synonyms)
+  with a word-level trie, taking the longest match at each position, so
+  "chicken breast" wins over "chicken";
+- quantities (``2``, ``1.5``, ``1/2``, ``two``, ``a``, ``half``), units
+  (``g``, ``oz``, ``cup``, ``slice``...) and size words before a food set
+  its grams; a weight, count or measure right after a food with no
+  quantity of its own ("chicken 200g", "eggs 2", "eggs x2", "rice 2 cups")
+  applies to it;
+- filler words ("and", "with", "for lunch") are recognised and skipped.
+
+A food's grams are the weight given, or the count times the unit's grams,
+or the count times the food's typical serving (SERVING_GRAMS).
+
+The result is only trusted when enough of the description was understood
+(FAST_TEXT_PARSE_MIN_COVERAGE of its tokens, by default all of them, so an
+unknown food is never silently dropped). Otherwise the function returns
+None and the caller falls through to the model.
+"""
+
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.food_index import get_food_vocabulary
+
+FAST_TEXT_PARSE_MIN_COVERAGE = float(os.environ.get("FAST_TEXT_PARSE_MIN_COVERAGE", "1.0"))
+
+DEFAULT_SERVING_GRAMS = 150.0
+# Typical single serving, for counts without a weight ("2 eggs", "a burger")
+SERVING_GRAMS = {
+    "egg": 50, "omelette": 150, "apple": 180, "banana": 120, "orange": 130,
+    "bread": 30, "pizza": 110, "burger": 220, "sandwich": 200, "tacos": 80,
+    "fries": 120, "cheese": 30, "butter": 10, "olive_oil": 14, "peanut_butter": 32,
+    "almonds": 28, "carrot": 60, "tomato": 120, "milk": 250, "yogurt": 170,
+    "yogurt_plain": 170, "cake": 100, "ice_cream": 100, "sushi": 30, "salad": 150,
+    "soup": 250, "steak": 225, "chicken_breast": 170, "salmon": 150, "dressing": 15,
+}
+
+# Weight (and, at water density, volume) units in grams
+WEIGHT_UNITS = {
+    "g": 1.0, "gr": 1.0, "gram": 1.0, "grams": 1.0, "kg": 1000.0,
+    "oz": 28.35, "ounce": 28.35, "ounces": 28.35, "lb": 453.6, "lbs": 453.6,
+    "pound": 453.6, "pounds": 453.6, "ml": 1.0, "l": 1000.0,
+}
+# Household measures; None means "one serving of the food"
+MEASURE_UNITS = {
+    "cup": 200.0, "cups": 200.0, "tbsp": 15.0, "tablespoon": 15.0, "tablespoons": 15.0,
+    "tsp": 5.0, "teaspoon": 5.0, "teaspoons": 5.0, "bowl": 300.0, "bowls": 300.0,
+    "plate": 350.0, "plates": 350.0, "glass": 250.0, "glasses": 250.0,
+    "handful": 30.0, "handfuls": 30.0, "can": 150.0, "cans": 150.0,
+    "slice": None, "slices": None, "piece": None, "pieces": None,
+    "serving": None, "servings": None, "portion": None, "portions": None,
+}
+SIZE_WORDS = {"small": 0.7, "little": 0.7, "medium": 1.0, "regular": 1.0, "large": 1.4, "big": 1.4, "huge": 1.8}
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "twelve": 12, "dozen": 12,
+    "half": 0.5, "quarter": 0.25, "couple": 2, "few": 3, "some": 1,
+}
+FILLER_WORDS = {
+    "and", "with", "of", "the", "plus", "on", "in", "side", "for", "had", "ate", "i",
+    "my", "me", "some", "little", "bit", "then", "also", "breakfast", "lunch", "dinner",
+    "snack", "brunch", "today", "morning", "afternoon", "evening", "tonight", "just",
+    "about", "around", "approx", "approximately", "x", "or", "cooked", "homemade",
+}
+
+_TOKEN_RE = re.compile(r"\d+(?:[./]\d+)?|[a-z]+")
+
+# word -> node; a node's "" entry holds the (label, nutrition_key) ending there
+_trie: Optional[Dict[str, Any]] = None
+
+
+def _build_trie() -> Dict[str, Any]:
+    root: Dict[str, Any] = {}
+    for label, key in get_food_vocabulary():
+        node = root
+        for word in label.split():
+            node = node.setdefault(word, {})
+        node[""] = (label, key)
+    return root
+
+
+def _variants(token: str) -> Tuple[str, ...]:
+    """The token plus singular guesses ("berries" -> "berry", "eggs" -> "egg")."""
+    if len(token) <= 3 or not token.endswith("s"):
+        return (token,)
+    if token.endswith("ies"):
+        return (token, token[:-3] + "y", token[:-1])
+    if token.endswith(("ches", "shes", "oes", "xes")):
+        return (token, token[:-2], token[:-1])
+    return (token, token[:-1])
+
+
+def _match_food(tokens: List[str], start: int) -> Optional[Tuple[int, str, str]]:
+    """Longest vocabulary match starting at ``start``: ``(end, label, key)``."""
+    best = None
+    # Breadth over plural variants; labels are a few words, so this stays tiny
+    frontier = [_trie]
+    i = start
+    while frontier and i < len(tokens):
+        frontier = [node[v] for node in frontier for v in _variants(tokens[i]) if v in node]
+        i += 1
+        for node in frontier:
+            if "" in node:
+                best = (i, *node[""])
+                break
+    return best
+
+
+def _number(token: str) -> Optional[float]:
+    if token in NUMBER_WORDS:
+        return float(NUMBER_WORDS[token])
+    try:
+        if "/" in token:
+            num, den = token.split("/")
+            return float(num) / float(den) if float(den) else None
+        return float(token)
+    except ValueError:
+        return None
+
+
+def _grams(count: Optional[float], unit: Optional[str], size: float, key: str) -> float:
+    serving = float(SERVING_GRAMS.get(key, DEFAULT_SERVING_GRAMS))
+    count = 1.0 if count is None else count
+    if unit in WEIGHT_UNITS:
+        return count * WEIGHT_UNITS[unit]
+    per_unit = MEASURE_UNITS.get(unit) if unit else None
+    return count * (per_unit if per_unit is not None else serving) * size
+
+
+def _ends_quantity(tokens: List[str], i: int) -> bool:
+    """True if nothing at ``i`` continues a quantity or starts a food."""
+    if i >= len(tokens):
+        return True
+    token = tokens[i]
+    if token in WEIGHT_UNITS or token in MEASURE_UNITS or token in SIZE_WORDS or _number(token) is not None:
+        return False
+    return _match_food(tokens, i) is None
+
+
+def _clamp_grams(grams: float) -> float:
+    # Same bounds as the model path in ai_service.parse_text_meal
+    return round(max(10.0, min(grams, 1000.0)), 1)
+
+
+def parse_text_meal_fast(
+    description: str, min_coverage: float = FAST_TEXT_PARSE_MIN_COVERAGE
+) -> Optional[List[Dict[str, Any]]]:
+    """Foods in ``description`` in the ``parse_text_meal`` format, or None if unsure."""
+    global _trie
+    if _trie is None:
+        _trie = _build_trie()
+
+    tokens = _TOKEN_RE.findall(description.lower())
+    if not tokens:
+        return None
+
+    foods: List[Dict[str, Any]] = []
+    count: Optional[float] = None
+    unit: Optional[str] = None
+    size = 1.0
+    covered = 0
+    # Index of the last food parsed without a quantity, for "chicken 200g",
+    # and its unclamped grams for one serving, for "eggs 2"
+    open_food: Optional[int] = None
+    open_grams = 0.0
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        match = _match_food(tokens, i)
+        if match is not None:
+            end, label, key = match
+            explicit = count is not None or unit is not None
+            grams = _grams(count, unit, size, key)
+            foods.append({
+                "name": label,
+                "grams": _clamp_grams(grams),
+                "model_label": key,
+                "nutrition_key": key,
+                "confidence": 0.9 if explicit else 0.85,
+            })
+            open_food = None if explicit else len(foods) - 1
+            open_grams = grams
+            count, unit, size = None, None, 1.0
+            covered += end - i
+            i = end
+            continue
+
+        value = _number(token)
+        if value is not None:
+            if count is None:
+                count = value
+            elif token not in ("a", "an", "some"):
+                count *= value  # "two dozen", "half a" stays 0.5
+            if open_food is not None and token not in ("a", "an", "some") and _ends_quantity(tokens, i + 1):
+                # A count after a food with no quantity of its own
+                foods[open_food]["grams"] = _clamp_grams(count * open_grams)
+                foods[open_food]["confidence"] = 0.9
+                open_food, count = None, None
+        elif token in WEIGHT_UNITS and count is not None:
+            unit = token
+            following = tokens[i + 1] if i + 1 < len(tokens) else None
+            if open_food is not None and following != "of" and (
+                following is None or _match_food(tokens, i + 1) is None
+            ):
+                # A weight after a food with no quantity of its own
+                foods[open_food]["grams"] = _clamp_grams(count * WEIGHT_UNITS[unit])
+                foods[open_food]["confidence"] = 0.9
+                open_food, count, unit = None, None, None
+        elif token in MEASURE_UNITS:
+            unit = token
+            if open_food is not None and count is not None and _ends_quantity(tokens, i + 1):
+                # A measure after a food with no quantity of its own
+                per_unit = MEASURE_UNITS[unit]
+                foods[open_food]["grams"] = _clamp_grams(count * (per_unit if per_unit is not None else open_grams))
+                foods[open_food]["confidence"] = 0.9
+                open_food, count, unit = None, None, None
+        elif token in SIZE_WORDS:
+            size = SIZE_WORDS[token]
+        elif token not in FILLER_WORDS:
+            # Unknown word; a pending quantity belonged to it, not the next food
+            count, unit, size = None, None, 1.0
+            i += 1
+            continue
+        covered += 1
+        i += 1
+
+    if not foods or covered / len(tokens) < min_coverage:
+        return None
+    return foods
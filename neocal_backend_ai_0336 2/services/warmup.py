@@ -0,0 +1,107 @@
+"""
+Model preloading at startup and the readiness state behind /ready.
+
+The text and image models load lazily, so without preloading the first
+request after a deploy or scale-out pays for loading GPT-2 or CLIP. When
+PRELOAD_MODELS is set (e.g. ``text,image``), the app lifespan starts
+``warm_up_models`` in the background. It loads each model where requests
+will use it and runs one dummy inference. /ready answers 503 until that
+has finished, so a load balancer only routes to warm workers. /health
+stays a plain liveness check.
+
+Local image recognition runs in the local inference pool's workers (see
+``services.inference``), so the image model is warmed there, with one job
+per worker process. The text model runs in the API process. With a
+shared model server (MODEL_SERVER_SOCKET), both are warmed in the server.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List
+
+import anyio
+
+from services import ai_service
+from services.ai_service import warm_up_image_model, warm_up_text_model
+from services.inference import local_executor
+
+logger = logging.getLogger(__name__)
+
+PRELOAD_MODELS = [m.strip() for m in os.environ.get("PRELOAD_MODELS", "").split(",") if m.strip()]
+MODEL_WARMUP_TIMEOUT = float(os.environ.get("MODEL_WARMUP_TIMEOUT", "600"))
+
+
+class Readiness:
+    """
+    starting -> warming -> ready | degraded, and stopping on shutdown.
+
+    ``degraded`` means a model failed to warm up; the app still serves
+    (that model's requests use the fallback) and reports ready.
+    """
+
+    def __init__(self):
+        self.state = "starting"
+        self.models: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def is_ready(self) -> bool:
+        return self.state in ("ready", "degraded")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"status": self.state, "models": {name: dict(m) for name, m in self.models.items()}}
+
+
+readiness = Readiness()
+
+
+async def _warm_text() -> bool:
+    return await anyio.to_thread.run_sync(warm_up_text_model)
+
+
+async def _warm_image() -> bool:
+    if ai_service.MODEL_SERVER_SOCKET:
+        # Images are recognised in the model server whatever the local pool
+        # is, so warm the model there
+        return await anyio.to_thread.run_sync(warm_up_image_model)
+    # A pool only starts workers as jobs arrive, so one job per worker
+    # gets (best effort) every process loaded.
+    workers = local_executor.max_workers if local_executor.kind == "process" else 1
+    results = await asyncio.gather(*(
+        local_executor.run(warm_up_image_model, timeout=MODEL_WARMUP_TIMEOUT)
+        for _ in range(workers)
+    ))
+    return all(results)
+
+
+WARMERS = {"text": _warm_text, "image": _warm_image}
+
+
+async def _warm_one(name: str) -> None:
+    warmer = WARMERS.get(name)
+    if warmer is None:
+        readiness.models[name] = {"state": "failed", "error": "unknown model"}
+        logger.error("PRELOAD_MODELS names unknown model %r", name)
+        return
+
+    readiness.models[name] = {"state": "loading"}
+    start = time.monotonic()
+    try:
+        loaded = await asyncio.wait_for(warmer(), MODEL_WARMUP_TIMEOUT)
+    except Exception as e:
+        readiness.models[name] = {"state": "failed", "error": str(e) or type(e).__name__}
+        logger.error("Warm-up of %s model failed: %s", name, e)
+    else:
+        # "fallback": the ML dependencies are missing, so requests will use
+        # the heuristic parser, which needs no warm-up.
+        readiness.models[name] = {"state": "ready" if loaded else "fallback"}
+    readiness.models[name]["seconds"] = round(time.monotonic() - start, 3)
+
+
+async def warm_up_models(models: List[str] = PRELOAD_MODELS) -> None:
+    readiness.state = "warming"
+    await asyncio.gather(*(_warm_one(name) for name in models))
+    failed = any(m["state"] == "failed" for m in readiness.models.values())
+    readiness.state = "degraded" if failed else "ready"
+    logger.info("Model warm-up finished: %s", readiness.stats())
@@ -0,0 +1,46 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Point the app at a throwaway SQLite file before database.db is imported.
+_tmp_dir = tempfile.mkdtemp(prefix="neocal_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'neocal_test.db')}"
+
+from database.db import Base, SessionLocal, engine  # noqa: E402
+from models import database as models  # noqa: E402,F401
+
+
+@pytest.fixture
+def db():
+    from services.auth import token_cache
+
+    token_cache.clear()
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def query_counter():
+    """Count SQL statements issued against the engine while active."""
+    from sqlalchemy import event
+
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
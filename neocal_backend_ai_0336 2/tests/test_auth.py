@@ -0,0 +1,103 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from services import auth
+
+from models.database import Session as DBSession
+from services.auth import (
+    TokenCache,
+    create_session,
+    create_user,
+    hash_password_async,
+    password_hash_stats,
+    revoke_session,
+    token_cache,
+    verify_password_async,
+    verify_token,
+)
+
+
+def _login(db):
+    user = create_user(db, "cache@example.com", "secret")
+    return user, create_session(db, user.user_id)
+
+
+def test_verify_token_is_served_from_cache(db, query_counter):
+    user, session = _login(db)
+    token, user_id = session.token, user.user_id
+
+    query_counter.clear()
+    assert verify_token(db, token) == user_id
+    assert verify_token(db, token) == user_id
+    assert verify_token(db, token) == user_id
+
+    assert len(query_counter) == 1
+    stats = token_cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+
+def test_revoked_session_is_rejected_immediately(db):
+    _, session = _login(db)
+    assert verify_token(db, session.token)
+
+    assert revoke_session(db, session.token)
+
+    assert verify_token(db, session.token) is None
+    assert db.query(DBSession).count() == 0
+
+
+def test_cache_honours_session_expiry():
+    cache = TokenCache(max_size=10, ttl_seconds=300)
+    cache.set("live", "user_a", datetime.utcnow() + timedelta(hours=1))
+    cache.set("stale", "user_b", datetime.utcnow() - timedelta(seconds=1))
+
+    assert cache.get("live") == "user_a"
+    assert cache.get("stale") is None
+    assert cache.stats()["size"] == 1
+
+
+def test_cache_is_bounded_lru():
+    cache = TokenCache(max_size=2, ttl_seconds=300)
+    cache.set("a", "user_a", None)
+    cache.set("b", "user_b", None)
+    cache.get("a")
+    cache.set("c", "user_c", None)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "user_a"
+    assert cache.get("c") == "user_c"
+
+
+def test_unknown_token_is_not_cached(db):
+    assert verify_token(db, "does-not-exist") is None
+    assert token_cache.stats()["size"] == 0
+
+
+def test_password_hashing_does_not_block_event_loop(monkeypatch):
+    monkeypatch.setattr(auth, "BCRYPT_ROUNDS", 10)
+
+    async def scenario():
+        ticks = 0
+        stop = False
+
+        async def ticker():
+            nonlocal ticks
+            while not stop:
+                ticks += 1
+                await asyncio.sleep(0.001)
+
+        task = asyncio.create_task(ticker())
+        hashed = await hash_password_async("hunter2")
+        ok = await verify_password_async("hunter2", hashed)
+        stop = True
+        await task
+        return hashed, ok, ticks
+
+    hashed, ok, ticks = asyncio.run(scenario())
+
+    assert ok
+    assert hashed.startswith("$2b$10$")
+    # The loop kept servicing other coroutines while bcrypt ran.
+    assert ticks > 5
+    assert password_hash_stats()["queue_depth"] == 0
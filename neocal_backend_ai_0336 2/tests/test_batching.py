@@ -0,0 +1,102 @@
+import asyncio
+import time
+
+import pytest
+
+from services import ai_service
+from services.batching import Histogram, MicroBatcher
+from services.inference import InferenceExecutor
+
+
+@pytest.fixture
+def executor():
+    executor = InferenceExecutor("test", "thread", max_workers=1, max_queue=4)
+    yield executor
+    executor.shutdown()
+
+
+def test_concurrent_requests_share_one_batch(executor):
+    batches = []
+
+    def square_all(items):
+        batches.append(list(items))
+        return [x * x for x in items]
+
+    batcher = MicroBatcher("test", square_all, executor, max_batch=8, window_ms=20)
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit(i, timeout=5) for i in range(5)))
+
+    assert asyncio.run(scenario()) == [0, 1, 4, 9, 16]
+    assert batches == [[0, 1, 2, 3, 4]]
+    stats = batcher.stats()
+    assert stats["batch_size"]["count"] == 1
+    assert stats["batch_size"]["buckets"]["le_8"] == 1
+    assert stats["queue_wait_ms"]["count"] == 5
+
+
+def test_full_batches_are_sent_without_waiting_for_the_window(executor):
+    batches = []
+
+    def identity(items):
+        batches.append(len(items))
+        return items
+
+    batcher = MicroBatcher("test", identity, executor, max_batch=3, window_ms=10_000)
+
+    async def scenario():
+        start = time.monotonic()
+        await asyncio.gather(*(batcher.submit(i, timeout=5) for i in range(6)))
+        return time.monotonic() - start
+
+    assert asyncio.run(scenario()) < 1.0
+    assert batches == [3, 3]
+
+
+def test_failures_reach_every_caller_and_timeouts_only_their_own(executor):
+    def slow_or_broken(items):
+        if "boom" in items:
+            raise ValueError("boom")
+        time.sleep(0.3)
+        return items
+
+    batcher = MicroBatcher("test", slow_or_broken, executor, max_batch=2, window_ms=5)
+
+    async def scenario():
+        broken = await asyncio.gather(
+            batcher.submit("boom", timeout=5), batcher.submit("ok", timeout=5),
+            return_exceptions=True,
+        )
+        impatient = asyncio.create_task(batcher.submit("a", timeout=0.05))
+        patient = asyncio.create_task(batcher.submit("b", timeout=5))
+        return broken, await asyncio.gather(impatient, patient, return_exceptions=True)
+
+    broken, (impatient, patient) = asyncio.run(scenario())
+    assert all(isinstance(e, ValueError) for e in broken)
+    assert isinstance(impatient, asyncio.TimeoutError)
+    assert patient == "b"
+
+
+def test_histogram_buckets_are_cumulative():
+    hist = Histogram([1, 5, 10])
+    for value in (0.5, 3, 3, 7, 50):
+        hist.observe(value)
+    stats = hist.stats()
+    assert stats["buckets"] == {"le_1": 1, "le_5": 3, "le_10": 4, "le_+Inf": 5}
+    assert stats["count"] == 5
+
+
+def test_local_batch_runs_one_clip_pass(monkeypatch):
+    calls = []
+
+    def fake_clip(images):
+        calls.append(len(images))
+        return [[{"label": "sushi", "score": 0.9}] for _ in images]
+
+    monkeypatch.setattr(ai_service, "load_image_model", lambda: fake_clip)
+    monkeypatch.setattr(ai_service, "_clip_input", lambda image: image)
+
+    results = ai_service.parse_image_meal_local_batch([(b"a", "a.jpg"), (b"b", "b.jpg")])
+
+    assert calls == [2]
+    assert [foods[0]["name"] for foods in results] == ["sushi", "sushi"]
@@ -0,0 +1,41 @@
+import numpy as np
+
+from services.clip_classifier import cached_label_embeddings, normalize_rows, zero_shot_scores
+
+LABELS = ["pizza", "salad", "sushi"]
+
+
+def _encoder(calls):
+    def encode(prompts):
+        calls.append(list(prompts))
+        return np.arange(len(prompts) * 4, dtype=np.float32).reshape(len(prompts), 4) + 1
+    return encode
+
+
+def test_label_embeddings_are_computed_once_and_persisted(tmp_path):
+    calls = []
+    first = cached_label_embeddings("clip", "rev1", LABELS, _encoder(calls), cache_dir=str(tmp_path))
+    again = cached_label_embeddings("clip", "rev1", LABELS, _encoder(calls), cache_dir=str(tmp_path))
+
+    assert calls == [["a photo of pizza", "a photo of salad", "a photo of sushi"]]
+    np.testing.assert_array_equal(first, again)
+    np.testing.assert_allclose(np.linalg.norm(first, axis=1), 1.0, rtol=1e-6)
+
+
+def test_new_revision_or_labels_recompute(tmp_path):
+    calls = []
+    cached_label_embeddings("clip", "rev1", LABELS, _encoder(calls), cache_dir=str(tmp_path))
+    cached_label_embeddings("clip", "rev2", LABELS, _encoder(calls), cache_dir=str(tmp_path))
+    cached_label_embeddings("clip", "rev2", LABELS + ["tacos"], _encoder(calls), cache_dir=str(tmp_path))
+
+    assert len(calls) == 3
+
+
+def test_zero_shot_scores_pick_the_closest_label():
+    labels = normalize_rows(np.eye(3, dtype=np.float32))
+    images = normalize_rows(np.array([[0.1, 0.9, 0.0], [1.0, 0.0, 0.2]], dtype=np.float32))
+
+    scores = zero_shot_scores(images, labels, logit_scale=100.0)
+
+    assert scores.argmax(axis=1).tolist() == [1, 0]
+    np.testing.assert_allclose(scores.sum(axis=1), 1.0, rtol=1e-6)
@@ -0,0 +1,21 @@
+import asyncio
+import threading
+
+from sqlalchemy import text
+
+from database import db as database
+
+
+def test_session_scope_closes_used_sessions_off_the_event_loop(db):
+    closed_on = []
+
+    async def scenario():
+        async with database.session_scope() as session:
+            session.execute(text("SELECT 1"))  # now holds a pooled connection
+            close = session.close
+            session.close = lambda: closed_on.append(threading.get_ident()) or close()
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+
+    assert len(closed_on) == 1 and closed_on[0] != loop_thread
@@ -0,0 +1,95 @@
+import pytest
+
+from database.db import engine
+from models.database import Food
+from services import food_catalogue
+from services.food_catalogue import import_file, refresh_catalogue, seed_builtin_foods
+from services.food_index import load_food_vocabulary
+from services.nutrition_service import NUTRITION_DATABASE, lookup_food_nutrition
+
+
+@pytest.fixture(autouse=True)
+def no_snapshot():
+    yield
+    food_catalogue._snapshot = None
+
+
+def write_csv(path, rows):
+    path.write_text("description,kcal,protein_g,carbs_g,fat_g\n" + "".join(f"{r}\n" for r in rows))
+    return str(path)
+
+
+MAPPING = {"name": "description", "calories": "kcal"}
+
+
+def test_import_maps_columns_and_skips_bad_rows(db, tmp_path):
+    path = write_csv(tmp_path / "foods.csv", [
+        "Greek Yogurt,97,9,3.6,5",
+        "Rolled Oats,379,13,68,6.5",
+        ",10,1,1,1",
+        "Mystery,n/a,1,1,1",
+        "Negative,-5,1,1,1",
+    ])
+
+    stats = import_file(path, engine, mapping=MAPPING, chunk_size=2)
+
+    assert (stats["rows"], stats["upserted"], stats["skipped"]) == (5, 2, 3)
+    oats = db.get(Food, "rolled_oat")
+    assert (oats.name, oats.calories, oats.source) == ("Rolled Oats", 379, "foods.csv")
+
+
+def test_reimport_updates_in_place(db, tmp_path):
+    import_file(write_csv(tmp_path / "v1.csv", ["Greek Yogurt,97,9,3.6,5"]), engine, mapping=MAPPING)
+    import_file(write_csv(tmp_path / "v2.csv", ["greek yogurt,100,10,4,5"]), engine, mapping=MAPPING)
+
+    assert db.query(Food).count() == 1
+    yogurt = db.get(Food, "greek_yogurt")
+    assert (yogurt.calories, yogurt.protein_g, yogurt.source) == (100, 10, "v2.csv")
+
+
+def test_lookup_uses_the_loaded_snapshot(db, tmp_path):
+    seed_builtin_foods(engine)
+    import_file(write_csv(tmp_path / "foods.csv", ["Greek Yogurt,97,9,3.6,5"]), engine, mapping=MAPPING)
+    version = food_catalogue.catalogue_version()
+
+    snapshot = refresh_catalogue(engine)
+
+    assert len(snapshot) == len(NUTRITION_DATABASE) + 1
+    assert food_catalogue.catalogue_version() == version + 1
+    assert lookup_food_nutrition("Greek yogurts") == pytest.approx(
+        {"calories": 97, "protein_g": 9, "carbs_g": 3.6, "fat_g": 5}
+    )
+    assert lookup_food_nutrition("brocc") == pytest.approx(NUTRITION_DATABASE["broccoli"])
+
+
+def test_empty_table_keeps_builtin_lookup(db):
+    assert refresh_catalogue(engine) is None
+    assert lookup_food_nutrition("salmon") is NUTRITION_DATABASE["salmon"]
+
+
+def test_catalogue_overrides_builtin_values_and_labels(db, tmp_path):
+    import_file(write_csv(tmp_path / "foods.csv", ["Banana,95,1.2,24,0.3", "Sushi,150,6,30,1"]), engine, mapping=MAPPING)
+    refresh_catalogue(engine)
+
+    expected = pytest.approx({"calories": 95, "protein_g": 1.2, "carbs_g": 24, "fat_g": 0.3})
+    assert lookup_food_nutrition("banana") == expected
+    assert lookup_food_nutrition("Bananas", nutrition_key="banana") == expected
+
+    labels_file = tmp_path / "labels.tsv"
+    labels_file.write_text("cheeseburger\tburger\nnigiri\tsushi\n")
+    vocabulary = dict(load_food_vocabulary(str(labels_file)))
+    # Only keys the catalogue can resolve exactly become labels
+    assert vocabulary == {"banana": "banana", "sushi": "sushi", "nigiri": "sushi"}
+
+
+def test_fuzzy_index_is_built_before_the_snapshot_is_published(db, monkeypatch):
+    seed_builtin_foods(engine)
+    builds = []
+    real_index = food_catalogue.FoodNameIndex
+    monkeypatch.setattr(food_catalogue, "FoodNameIndex", lambda keys: builds.append(1) or real_index(keys))
+
+    refresh_catalogue(engine)
+    assert builds == [1]
+
+    lookup_food_nutrition("brocoli")
+    assert builds == [1]
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from models.database import User, UserFoodStat
+from routers.dependencies import get_current_user
+from services.food_history import affinity, rebuild_food_stats, recent_foods, search_boosts
+from services.food_search import FoodSearchIndex
+from services.meal_service import create_meal_from_structured
+
+
+def _seed_user(db, user_id="user_1"):
+    db.add(User(user_id=user_id, email=f"{user_id}@example.com", hashed_password="x"))
+    db.commit()
+    return user_id
+
+
+def _log(db, user_id, *names):
+    foods = [{"name": n, "grams": 100, "calories": 100, "protein_g": 1, "carbs_g": 1, "fat_g": 1} for n in names]
+    return create_meal_from_structured(db, user_id, foods)
+
+
+@pytest.fixture
+def client(db):
+    from main import app
+
+    app.dependency_overrides[get_current_user] = lambda: "user_1"
+    try:
+        with TestClient(app) as c:
+            yield c
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_meals_update_history_incrementally(db, query_counter):
+    user_id = _seed_user(db)
+    _log(db, user_id, "Rice", "Chicken Breast")
+    _log(db, user_id, "rice", "Broccoli")
+
+    recent = recent_foods(db, user_id)
+    assert [f["food_key"] for f in recent][0] in ("rice", "broccoli")
+    assert {f["food_key"]: f["count"] for f in recent} == {"rice": 2, "chicken_breast": 1, "broccoli": 1}
+    assert recent_foods(db, user_id, order="frequent")[0]["food_key"] == "rice"
+
+    # Reading history is one query, however many meals were logged
+    query_counter.clear()
+    recent_foods(db, user_id, limit=5)
+    assert len(query_counter) == 1
+
+
+def test_rebuild_matches_incremental_counts(db):
+    user_id = _seed_user(db)
+    for _ in range(3):
+        _log(db, user_id, "Salmon", "Rice")
+    incremental = {s.food_key: s.count for s in db.query(UserFoodStat)}
+
+    assert rebuild_food_stats(db) == 2
+    assert {s.food_key: s.count for s in db.query(UserFoodStat)} == incremental == {"salmon": 3, "rice": 3}
+
+
+def test_frequent_recent_foods_rank_first():
+    now = datetime.utcnow()
+    assert affinity(10, now, now) > affinity(1, now, now) > 0
+    assert affinity(10, now - timedelta(days=60), now) < affinity(10, now, now)
+
+    index = FoodSearchIndex([("chicken", "chicken"), ("chicken_grilled", "chicken grilled")])
+    assert index.search("chicken")[0][0][0] == "chicken"
+    boosted, _ = index.search("chicken", boosts={"chicken_grilled": affinity(20, now, now)})
+    assert boosted[0][0] == "chicken_grilled"
+
+
+def test_endpoints_use_history(client, db):
+    user_id = _seed_user(db)
+    for _ in range(5):
+        _log(db, user_id, "Chicken Grilled")
+
+    assert search_boosts(db, user_id).keys() == {"chicken_grilled"}
+    results = client.get("/meals/search", params={"q": "chicken"}).json()["results"]
+    assert results[0]["id"] == "chicken_grilled"
+
+    recent = client.get("/meals/recent-foods", params={"limit": 5}).json()["results"]
+    assert recent[0]["food_key"] == "chicken_grilled" and recent[0]["count"] == 5
+    assert client.get("/meals/recent-foods", params={"order": "oldest"}).status_code == 422
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from services import ai_service
+from services.clip_classifier import normalize_rows
+from services.food_index import FoodEmbeddingIndex, load_food_vocabulary
+from services.nutrition_service import NUTRITION_DATABASE, lookup_food_nutrition
+
+
+def _clustered(n, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = normalize_rows(rng.normal(size=(max(2, n // 50), dim)))
+    points = centers[rng.integers(0, len(centers), n)] + rng.normal(scale=0.15, size=(n, dim))
+    return normalize_rows(points.astype(np.float32))
+
+
+def test_vocabulary_maps_labels_to_nutrition_keys(tmp_path):
+    labels_file = tmp_path / "labels.tsv"
+    labels_file.write_text(
+        "# comment\n"
+        "cheeseburger\tburger\n"
+        "mystery stew\tnot_a_key\n"
+        "sushi\n"
+    )
+
+    vocabulary = dict(load_food_vocabulary(str(labels_file)))
+
+    assert vocabulary["cheeseburger"] == "burger"
+    assert vocabulary["sushi"] == "sushi"
+    assert vocabulary["sweet potato"] == "sweet_potato"  # from the database
+    assert "mystery stew" not in vocabulary
+    assert "meal" not in vocabulary
+    assert all(key in NUTRITION_DATABASE for key in vocabulary.values())
+
+
+def test_exact_search_returns_best_first():
+    embeddings = normalize_rows(np.eye(4, dtype=np.float32) + 0.1)
+    query = normalize_rows(np.array([[0.0, 0.2, 1.0, 0.1]], dtype=np.float32))
+
+    scores, indices = FoodEmbeddingIndex(embeddings, mode="exact").search(query, 2)
+
+    assert indices[0].tolist()[0] == 2
+    assert scores[0, 0] >= scores[0, 1]
+
+
+@pytest.mark.parametrize("mode", ["ivf", "ivfpq"])
+def test_approximate_modes_agree_with_exact(mode):
+    embeddings = _clustered(3000, 64)
+    queries = normalize_rows(embeddings[:100] + np.random.default_rng(1).normal(scale=0.02, size=(100, 64)))
+    _, exact = FoodEmbeddingIndex(embeddings, mode="exact").search(queries, 1)
+
+    index = FoodEmbeddingIndex(embeddings, mode=mode, nprobe=6, pq_subvectors=16)
+    _, approx = index.search(queries, 1)
+
+    assert (approx[:, 0] == exact[:, 0]).mean() >= 0.9
+    if mode == "ivfpq":
+        assert index.memory_bytes() < embeddings.nbytes / 4
+
+
+def test_clip_scores_are_grouped_by_nutrition_key():
+    foods = ai_service._foods_from_clip_results([
+        {"label": "tacos", "score": 0.2},
+        {"label": "taco", "score": 0.15},
+        {"label": "salad", "score": 0.1},
+    ])
+
+    assert [(f["name"], f["nutrition_key"]) for f in foods] == [("tacos", "tacos")]
+    assert foods[0]["confidence"] == pytest.approx(0.35)
+    assert lookup_food_nutrition("tacos", foods[0]["nutrition_key"]) is NUTRITION_DATABASE["tacos"]
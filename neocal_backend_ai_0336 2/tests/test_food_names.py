@@ -0,0 +1,40 @@
+import time
+
+from services.food_names import FoodNameIndex, normalize_name
+from services.nutrition_service import NUTRITION_DATABASE, lookup_food_nutrition
+
+
+def test_normalisation():
+    assert normalize_name("Grilled  Chickens") == "grilled_chicken"
+    assert normalize_name("sweet_potatoes") == "sweet_potato"
+    assert normalize_name("Berries!") == "berry"
+
+
+def test_best_match_is_scored_and_deterministic():
+    index = FoodNameIndex(["chicken", "chicken_grilled", "grilled chicken", "rice", "chicken soup"])
+
+    assert index.best("Chickens") == "chicken"
+    # Both grilled-chicken entries score 1.0; fewer tokens, then name, decides
+    assert index.best("grilled chicken salad") == "chicken_grilled"
+    assert index.best("brocc") is None
+    assert index.best("ric") == "rice"  # prefix of an indexed word
+
+
+def test_lookup_prefers_the_closest_entry():
+    assert lookup_food_nutrition("scrambled eggs") is NUTRITION_DATABASE["egg"]
+    assert lookup_food_nutrition("a few sweet potatoes") is NUTRITION_DATABASE["sweet_potato"]
+    assert lookup_food_nutrition("brocc") is NUTRITION_DATABASE["broccoli"]
+    assert lookup_food_nutrition("unobtainium") == {"calories": 250, "protein_g": 10, "carbs_g": 35, "fat_g": 8}
+
+
+def test_lookup_cost_does_not_grow_with_catalogue_size():
+    names = [f"brand{i} product{i % 997} flavour{i % 31}" for i in range(200_000)] + ["dark chocolate bar"]
+    index = FoodNameIndex(names, max_candidates=500)
+
+    start = time.perf_counter()
+    for _ in range(100):
+        assert index.best("dark chocolate") == "dark chocolate bar"
+        assert index.best("brand123456 product") == names[123456]
+    per_lookup = (time.perf_counter() - start) / 200
+    # Only postings of the query's words are scanned, never the whole catalogue
+    assert per_lookup < 0.01
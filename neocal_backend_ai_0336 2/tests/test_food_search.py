@@ -0,0 +1,91 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from routers.dependencies import get_current_user
+from services.food_search import FoodSearchIndex
+
+
+@pytest.fixture
+def client(db):
+    from main import app
+
+    app.dependency_overrides[get_current_user] = lambda: "user_1"
+    try:
+        with TestClient(app) as c:
+            yield c
+    finally:
+        app.dependency_overrides.clear()
+
+
+def ids(results):
+    return [food_id for food_id, _ in results[0]]
+
+
+def test_prefix_typo_and_ranking():
+    index = FoodSearchIndex([
+        ("1", "chicken"), ("2", "chicken soup"), ("3", "chickpea curry"),
+        ("4", "broccoli"), ("5", "grilled chicken breast"), ("6", "rice"),
+    ])
+
+    assert ids(index.search("chicken")) == ["1", "2", "5"]
+    # A prefix finds every completion; the shortest name matching it best leads
+    found = ids(index.search("chick"))
+    assert found[0] == "1" and sorted(found) == ["1", "2", "3", "5"]
+    assert ids(index.search("brocoli")) == ["4"]
+    assert ids(index.search("chiken soup")) == ["2"]
+    assert ids(index.search("unobtainium")) == []
+
+
+def test_pages_do_not_overlap():
+    index = FoodSearchIndex((str(i), f"apple variety{i}") for i in range(25))
+
+    first, more = index.search("apple", limit=10)
+    second, _ = index.search("apple", limit=10, offset=10)
+    last, no_more = index.search("apple", limit=10, offset=20)
+
+    assert more and not no_more and len(last) == 5
+    assert not {f for f, _ in first} & {f for f, _ in second}
+
+
+def test_search_stays_fast_on_a_large_catalogue():
+    words = ["chicken", "rice", "soup", "cheese", "yogurt", "apple", "bread", "spicy", "grilled", "frozen"]
+    names = [f"{words[i % 10]} {words[i // 10 % 10]} brand{i % 5000} item{i}" for i in range(200_000)]
+    index = FoodSearchIndex((str(i), name) for i, name in enumerate(names))
+
+    start = time.perf_counter()
+    for query in ["c", "chick", "grilled chiken", "brand123 rice"] * 10:
+        assert index.search(query, limit=20)[0]
+    per_query = (time.perf_counter() - start) / 40
+    assert per_query < 0.05
+
+
+def test_search_endpoint_paginates(client):
+    page = client.get("/meals/search", params={"q": "chick", "limit": 2}).json()
+    assert len(page["results"]) == 2
+    assert page["results"][0]["id"] == "chicken"
+    assert page["next_cursor"] == "2"
+
+    rest = client.get("/meals/search", params={"q": "chick", "limit": 2, "cursor": page["next_cursor"]}).json()
+    assert {r["id"] for r in rest["results"]}.isdisjoint(r["id"] for r in page["results"])
+
+    assert client.get("/meals/search", params={"q": "brocoli"}).json()["results"][0]["name"] == "Broccoli"
+    assert client.get("/meals/search", params={"q": "x", "cursor": "bogus"}).status_code == 400
+
+
+def test_results_come_from_the_catalogue_the_index_was_built_from(monkeypatch):
+    import numpy as np
+
+    from services import food_search
+    from services.food_catalogue import FoodCatalogueSnapshot
+
+    catalogue = FoodCatalogueSnapshot(["salmon"], ["Salmon"], np.array([[208, 20, 0, 13]], dtype=np.float32), 7)
+    # An index entry the catalogue no longer has is skipped, not a 500
+    index = FoodSearchIndex([("salmon", "salmon"), ("salmon_roe", "salmon roe")])
+    monkeypatch.setattr(food_search, "catalogue_version", lambda: 7)
+    monkeypatch.setattr(food_search, "_cache", {"version": 7, "index": index, "catalogue": catalogue})
+
+    results, _ = food_search.search_foods("salmon")
+
+    assert [(r["id"], r["name"], r["calories"]) for r in results] == [("salmon", "Salmon", 208)]
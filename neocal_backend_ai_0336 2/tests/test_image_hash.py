@@ -0,0 +1,102 @@
+import asyncio
+import io
+
+import pytest
+from PIL import Image, ImageDraw
+
+from services import inference
+from services.image_hash import NearDuplicateIndex, hamming, perceptual_hash
+from services.recognition_cache import RecognitionCache
+
+FOODS = [{"name": "salad", "grams": 150, "model_label": "salad", "confidence": 0.8}]
+
+
+def _plate(seed, size=(640, 480)):
+    # A lit tabletop: a gradient background avoids flat regions, where
+    # adjacent-pixel comparisons are decided by compression noise.
+    ramp = Image.linear_gradient("L").resize(size).rotate(seed * 37)
+    image = Image.merge("RGB", (ramp, ramp.point(lambda v: v * 0.9), ramp.point(lambda v: v * 0.8)))
+    draw = ImageDraw.Draw(image)
+    w, h = size
+    draw.ellipse((w * 0.1, h * 0.1, w * 0.9, h * 0.9), fill=(250, 250, 250))
+    for i in range(6):
+        x = (seed * 97 + i * 131) % int(w * 0.6) + w * 0.15
+        y = (seed * 53 + i * 71) % int(h * 0.6) + h * 0.15
+        r = 30 + (seed * 17 + i * 29) % 60
+        color = ((seed * 40 + i * 70) % 255, (seed * 90 + i * 30) % 255, (i * 50) % 255)
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=color)
+    return image
+
+
+def _jpeg(image, quality=90):
+    buf = io.BytesIO()
+    image.save(buf, "JPEG", quality=quality)
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize("algorithm", ["dhash", "phash"])
+def test_recompressed_crop_is_near_duplicate(algorithm):
+    original = _plate(1)
+    retake = original.crop((8, 6, 632, 474)).resize((800, 600))
+
+    a = perceptual_hash(_jpeg(original), algorithm)
+    b = perceptual_hash(_jpeg(retake, quality=60), algorithm)
+    other = perceptual_hash(_jpeg(_plate(7)), algorithm)
+
+    assert hamming(a, b) <= 6
+    assert hamming(a, other) > 12
+
+
+def test_undecodable_bytes_have_no_hash():
+    assert perceptual_hash(b"not an image") is None
+
+
+def test_index_is_per_user_and_bounded():
+    index = NearDuplicateIndex(threshold=4, max_per_user=2, max_users=2)
+    index.add("alice", 0b1111, FOODS)
+
+    assert index.find("alice", 0b1110) == FOODS
+    assert index.find("bob", 0b1111) is None
+
+    index.add("alice", 1 << 40, FOODS)
+    index.add("alice", 1 << 50, FOODS)
+    assert index.find("alice", 0b1111) is None  # evicted by newer photos
+
+    index.add("bob", 1, FOODS)
+    index.add("carol", 1, FOODS)
+    assert index.stats()["users"] == 2
+
+
+def test_results_of_another_pipeline_are_not_reused():
+    index = NearDuplicateIndex(threshold=4)
+    index.add("alice", 0b1111, FOODS, signature="clip-v1")
+
+    assert index.find("alice", 0b1111, signature="clip-v1") == FOODS
+    assert index.find("alice", 0b1111, signature="clip-v2") is None
+    assert index.stats()["entries"] == 0  # stale entries are dropped
+
+
+def test_rephotographed_plate_reuses_prior_recognition(monkeypatch):
+    calls = []
+
+    async def fake_recognize(image_bytes, filename, timeout):
+        calls.append(filename)
+        return [dict(f) for f in FOODS], True
+
+    monkeypatch.setattr(inference, "_recognize_image", fake_recognize)
+    monkeypatch.setattr(inference, "recognition_cache", RecognitionCache(max_size=8, db_path=None))
+    monkeypatch.setattr(inference, "near_duplicate_index", NearDuplicateIndex(threshold=6))
+
+    original = _jpeg(_plate(3))
+    retake = _jpeg(_plate(3).crop((6, 4, 634, 476)), quality=70)
+
+    async def scenario():
+        await inference.parse_image_meal_async(original, filename="first.jpg", user_id="u1")
+        again = await inference.parse_image_meal_async(retake, filename="retake.jpg", user_id="u1")
+        other_user = await inference.parse_image_meal_async(retake, filename="theirs.jpg", user_id="u2")
+        return again, other_user
+
+    again, other_user = asyncio.run(scenario())
+
+    assert again == FOODS == other_user
+    assert calls == ["first.jpg", "theirs.jpg"]
@@ -0,0 +1,52 @@
+import io
+
+from PIL import Image
+
+from services.ai_service import prepare_vision_image
+
+
+def _photo(size, orientation=None, quality=95):
+    image = Image.linear_gradient("L").resize(size).convert("RGB")
+    buf = io.BytesIO()
+    if orientation is None:
+        image.save(buf, "JPEG", quality=quality, optimize=True)
+    else:
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        image.save(buf, "JPEG", quality=quality, exif=exif)
+    return buf.getvalue()
+
+
+def _size(data):
+    return Image.open(io.BytesIO(data)).size
+
+
+def test_large_photo_is_scaled_to_provider_resolution():
+    original = _photo((4032, 3024))
+    data, mime = prepare_vision_image(original, max_side=2048, short_side=768)
+
+    assert mime == "image/jpeg"
+    assert _size(data) == (1024, 768)
+    assert len(data) < len(original)
+
+
+def test_exif_orientation_is_applied():
+    # Orientation 6: stored landscape, displayed rotated to portrait
+    data, _ = prepare_vision_image(_photo((400, 300), orientation=6), max_side=2048, short_side=768)
+
+    assert _size(data) == (300, 400)
+    assert Image.open(io.BytesIO(data)).getexif().get(0x0112, 1) == 1
+
+
+def test_small_or_undecodable_images_are_sent_as_is():
+    # Already small and compressed harder than we would
+    small = _photo((64, 48), quality=50)
+    assert prepare_vision_image(small, 2048, 768) == (small, "image/jpeg")
+    assert prepare_vision_image(b"not an image", 2048, 768) == (b"not an image", "image/jpeg")
+
+
+def test_webp_output():
+    data, mime = prepare_vision_image(_photo((2000, 1500)), 2048, 224, image_format="WEBP")
+
+    assert mime == "image/webp"
+    assert _size(data) == (299, 224)
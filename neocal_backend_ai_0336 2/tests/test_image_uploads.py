@@ -0,0 +1,100 @@
+import io
+import os
+import tempfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+from routers import meals
+from routers.dependencies import get_current_user, get_current_user_released
+from services import ai_service
+
+
+@pytest.fixture
+def no_providers(monkeypatch):
+    monkeypatch.setattr(ai_service, "OPENAI_API_KEY", None)
+    monkeypatch.setattr(ai_service, "HUGGINGFACE_API_KEY", None)
+    monkeypatch.setattr(ai_service, "load_image_model", lambda: None)
+
+
+@pytest.fixture
+def client(db):
+    from main import app
+
+    app.dependency_overrides[get_current_user] = lambda: "user_1"
+    app.dependency_overrides[get_current_user_released] = lambda: "user_1"
+    try:
+        with TestClient(app) as c:
+            yield c
+    finally:
+        app.dependency_overrides.clear()
+
+
+def _tmp_uploads():
+    return {n for n in os.listdir(tempfile.gettempdir()) if n.startswith("neocal_")}
+
+
+@pytest.mark.parametrize("source", [b"\xff\xd8jpeg", io.BytesIO(b"\xff\xd8jpeg")])
+def test_parse_image_meal_accepts_in_memory_images(no_providers, source):
+    foods = ai_service.parse_image_meal(source, filename="pizza.jpg")
+    assert foods[0]["model_label"] == "pizza"
+
+
+def test_scan_recognises_upload_without_temp_files(client, monkeypatch):
+    seen = {}
+
+    async def fake_parse(image, user_id=None, filename=None):
+        seen.update(image=image, user_id=user_id, filename=filename)
+        return [{"name": "salad", "grams": 150, "model_label": "salad", "confidence": 0.8}]
+
+    monkeypatch.setattr(meals, "parse_image_meal_async", fake_parse)
+    before = _tmp_uploads()
+
+    resp = client.post(
+        "/meals/scan",
+        files={"file": ("lunch.jpg", b"\xff\xd8photo-bytes", "image/jpeg")},
+    )
+
+    assert resp.status_code == 200
+    assert resp.json()[0]["name"] == "salad"
+    assert seen == {"image": b"\xff\xd8photo-bytes", "user_id": "user_1", "filename": "lunch.jpg"}
+    assert _tmp_uploads() == before
+
+
+def test_oversized_upload_is_rejected(client, monkeypatch):
+    monkeypatch.setattr(meals, "MAX_UPLOAD_BYTES", 1024)
+    monkeypatch.setattr(meals, "UPLOAD_CHUNK_SIZE", 256)
+
+    resp = client.post(
+        "/meals/from-image",
+        files={"file": ("big.jpg", b"x" * 4096, "image/jpeg")},
+    )
+
+    assert resp.status_code == 413
+
+
+def test_image_meal_holds_no_db_session_during_inference(db, monkeypatch):
+    from database import db as database
+    from main import app
+    from services.auth import create_session, create_user, token_cache
+
+    user = create_user(db, "scan@example.com", hashed_password="x")
+    token = create_session(db, user.user_id).token
+    token_cache.clear()  # authenticate through the database
+    free = {}
+
+    async def fake_parse(image, user_id=None, filename=None):
+        free["during"] = database._session_slots.value
+        return [{"name": "salad", "grams": 150, "model_label": "salad", "confidence": 0.8}]
+
+    monkeypatch.setattr(meals, "parse_image_meal_async", fake_parse)
+    with TestClient(app) as c:
+        resp = c.post(
+            "/meals/from-image",
+            files={"file": ("lunch.jpg", b"\xff\xd8photo-bytes", "image/jpeg")},
+            headers={"X-Auth-Token": token},
+        )
+
+    assert resp.status_code == 201
+    assert resp.json()["foods"][0]["name"] == "salad"
+    assert free["during"] == database.DB_POOL_SIZE + database.DB_MAX_OVERFLOW
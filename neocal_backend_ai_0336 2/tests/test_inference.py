@@ -0,0 +1,76 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services.inference import (
+    InferenceBusyError,
+    InferenceExecutor,
+    InferenceTimeoutError,
+)
+
+
+def test_rejects_jobs_beyond_queue_capacity():
+    executor = InferenceExecutor("test", "thread", max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        first = asyncio.create_task(executor.run(release.wait, 5, timeout=5))
+        second = asyncio.create_task(executor.run(release.wait, 5, timeout=5))
+        await asyncio.sleep(0.05)
+        with pytest.raises(InferenceBusyError):
+            await executor.run(release.wait, 5, timeout=5)
+        release.set()
+        return await asyncio.gather(first, second)
+
+    try:
+        assert asyncio.run(scenario()) == [True, True]
+    finally:
+        executor.shutdown()
+
+    stats = executor.stats()
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 2
+    assert stats["pending"] == 0
+
+
+def test_thread_job_times_out_without_blocking_caller():
+    executor = InferenceExecutor("test", "thread", max_workers=1, max_queue=1)
+    try:
+        start = time.monotonic()
+        with pytest.raises(InferenceTimeoutError):
+            asyncio.run(executor.run(time.sleep, 2, timeout=0.1))
+        assert time.monotonic() - start < 1
+    finally:
+        executor.shutdown()
+    assert executor.stats()["timed_out"] == 1
+
+
+def test_process_job_is_killed_on_timeout():
+    executor = InferenceExecutor("test", "process", max_workers=1, max_queue=1)
+    try:
+        with pytest.raises(InferenceTimeoutError):
+            asyncio.run(executor.run(time.sleep, 30, timeout=3))
+        # The stuck worker was terminated; a fresh pool serves the next job.
+        assert asyncio.run(executor.run(abs, -3, timeout=30)) == 3
+    finally:
+        executor.shutdown()
+
+
+def test_recycling_retries_other_jobs_on_a_fresh_pool():
+    executor = InferenceExecutor("test", "process", max_workers=2, max_queue=1)
+
+    async def scenario():
+        stuck = asyncio.create_task(executor.run(time.sleep, 30, timeout=3))
+        healthy = asyncio.create_task(executor.run(time.sleep, 5, timeout=30))
+        with pytest.raises(InferenceTimeoutError):
+            await stuck
+        # Its worker was killed with the stuck one; the job reruns instead of failing
+        return await healthy
+
+    try:
+        assert asyncio.run(scenario()) is None
+    finally:
+        executor.shutdown()
+    assert executor.stats()["completed"] == 1
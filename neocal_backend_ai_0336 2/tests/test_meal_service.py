@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+from models.database import Meal, User
+from services.meal_service import (
+    create_meal_from_structured,
+    get_meals_for_date,
+    get_meals_for_range,
+)
+
+
+def _seed_user(db, user_id="user_test"):
+    db.add(User(user_id=user_id, email=f"{user_id}@example.com", hashed_password="x"))
+    db.commit()
+    return user_id
+
+
+def _seed_meals(db, user_id, days, meals_per_day=3):
+    base = datetime.utcnow().replace(hour=8, minute=0, second=0, microsecond=0)
+    for day in range(days):
+        for n in range(meals_per_day):
+            meal = create_meal_from_structured(
+                db,
+                user_id,
+                [
+                    {"name": "rice", "grams": 150, "calories": 195, "protein_g": 4, "carbs_g": 42, "fat_g": 0.5},
+                    {"name": "chicken", "grams": 120, "calories": 198, "protein_g": 37, "carbs_g": 0, "fat_g": 4},
+                ],
+            )
+            row = db.query(Meal).filter(Meal.meal_id == meal.meal_id).one()
+            row.timestamp = base - timedelta(days=day) + timedelta(hours=n)
+    db.commit()
+    return base
+
+
+def test_meals_for_range_uses_constant_number_of_queries(db, query_counter):
+    user_id = _seed_user(db)
+    base = _seed_meals(db, user_id, days=30)
+    db.expire_all()
+
+    start = (base - timedelta(days=29)).strftime("%Y-%m-%d")
+    end = base.strftime("%Y-%m-%d")
+    query_counter.clear()
+    meals = get_meals_for_range(db, user_id, start, end)
+
+    assert len(meals) == 90
+    assert all(len(m.foods) == 2 for m in meals)
+    # One query for the meals plus one batched query for their food items.
+    assert len(query_counter) == 2
+
+
+def test_meals_for_date_returns_foods_in_timestamp_order(db, query_counter):
+    user_id = _seed_user(db)
+    base = _seed_meals(db, user_id, days=2)
+    db.expire_all()
+
+    query_counter.clear()
+    meals = get_meals_for_date(db, user_id, base.strftime("%Y-%m-%d"))
+
+    assert len(meals) == 3
+    assert [m.timestamp for m in meals] == sorted(m.timestamp for m in meals)
+    assert {f.name for f in meals[0].foods} == {"rice", "chicken"}
+    assert len(query_counter) == 2
+
+
+def test_meals_for_date_rejects_bad_date(db):
+    assert get_meals_for_date(db, "user_test", "not-a-date") is None
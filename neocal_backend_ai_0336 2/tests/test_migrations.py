@@ -0,0 +1,44 @@
+from sqlalchemy import inspect, text
+
+from database.db import engine
+from database.migrations import ensure_indexes
+
+EXPECTED = {
+    "meals": "idx_meals_user_timestamp",
+    "food_items": "idx_food_items_meal",
+    "sessions": "idx_sessions_expires_at",
+    "water_logs": "idx_water_logs_user_timestamp",
+    "exercise_logs": "idx_exercise_logs_user_timestamp",
+    "weight_logs": "idx_weight_logs_user_timestamp",
+}
+
+
+def _index_names(table):
+    return {ix["name"] for ix in inspect(engine).get_indexes(table)}
+
+
+def test_ensure_indexes_backfills_legacy_database(db):
+    # Simulate a database created before the indexes were declared.
+    with engine.begin() as conn:
+        for name in EXPECTED.values():
+            conn.execute(text(f"DROP INDEX {name}"))
+
+    created = ensure_indexes(engine)
+
+    assert set(created) == set(EXPECTED.values())
+    for table, name in EXPECTED.items():
+        assert name in _index_names(table)
+    # Second run is a no-op.
+    assert ensure_indexes(engine) == []
+
+
+def test_meal_range_query_uses_composite_index(db):
+    with engine.connect() as conn:
+        plan = conn.execute(
+            text(
+                "EXPLAIN QUERY PLAN SELECT * FROM meals "
+                "WHERE user_id = :u AND timestamp >= :s AND timestamp <= :e"
+            ),
+            {"u": "user_x", "s": "2024-01-01", "e": "2024-01-02"},
+        ).fetchall()
+    assert any("idx_meals_user_timestamp" in str(row) for row in plan)
@@ -0,0 +1,86 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from services.model_registry import ModelRegistry
+
+
+def test_concurrent_first_callers_share_one_load():
+    registry = ModelRegistry()
+    calls = []
+    started = threading.Event()
+
+    def slow_loader():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return object()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        models = list(pool.map(lambda _: registry.get("clip", slow_loader), range(8)))
+
+    assert len(calls) == 1
+    assert all(model is models[0] for model in models)
+    assert registry.stats()["loads"] == 1
+
+
+def test_different_models_load_in_parallel():
+    registry = ModelRegistry()
+    barrier = threading.Barrier(2, timeout=2)
+
+    def loader():
+        # Deadlocks (BrokenBarrierError) if the loads were serialised
+        barrier.wait()
+        return object()
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(lambda name: registry.get(name, loader), ["text", "image"]))
+
+    assert "text" in registry and "image" in registry
+
+
+def test_idle_models_are_unloaded_and_reloaded_on_demand():
+    registry = ModelRegistry(idle_seconds=60)
+    registry.get("text", lambda: "gpt2")
+    registry.get("image", lambda: None)  # fallback only, nothing to free
+    now = time.monotonic()
+
+    assert registry.unload_idle(now + 30) == 0
+    assert registry.unload_idle(now + 61) == 1
+    assert "text" not in registry and "image" in registry
+
+    assert registry.get("text", lambda: "gpt2 again") == "gpt2 again"
+    assert registry.stats()["loads"] == 3
+    assert registry.stats()["unloads"] == 1
+
+
+
+def test_get_never_sees_a_half_unloaded_model(monkeypatch):
+    from services import model_registry
+
+    registry = ModelRegistry()
+    results = []
+    readers = []
+    racing = threading.Event()
+
+    class RacingEntry(model_registry._Entry):
+        __slots__ = ()
+
+        def __setattr__(self, name, value):
+            super().__setattr__(name, value)
+            if racing.is_set() and value is None:
+                # Another thread calls get() right after each write of the unload
+                reader = threading.Thread(target=lambda: results.append(registry.get("image", object)))
+                reader.start()
+                reader.join(0.2)  # it may rightly wait for the entry lock
+                readers.append(reader)
+
+    monkeypatch.setattr(model_registry, "_Entry", RacingEntry)
+    registry.get("image", object)
+
+    racing.set()
+    assert registry.unload("image")
+    for reader in readers:
+        reader.join()
+
+    assert results and None not in results
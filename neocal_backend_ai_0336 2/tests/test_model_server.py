@@ -0,0 +1,126 @@
+import asyncio
+import threading
+
+import pytest
+
+from services import ai_service
+from services.inference import InferenceBusyError, InferenceExecutor
+from services.model_server import (
+    ModelServer, ModelServerClient, ModelServerError, ModelServerUnavailable,
+    SidecarExecutor,
+)
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = ModelServer(str(tmp_path / "models.sock"), authkey="secret")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.close()
+
+
+def test_client_calls_served_functions(server):
+    client = ModelServerClient(server.socket_path, authkey="secret")
+
+    assert client.call("ping") == "pong"
+    foods = client.call("parse_text_meal", "2 eggs and toast")
+    assert foods == ai_service.parse_text_meal("2 eggs and toast")
+    # The connection was returned to the pool and reused
+    assert len(client._idle) == 1
+    assert server.calls == 2
+
+    with pytest.raises(ModelServerError, match="unknown function"):
+        client.call("open", "/etc/passwd")
+    client.close()
+
+
+def test_wrong_authkey_and_missing_server_are_unavailable(server, tmp_path):
+    with pytest.raises(ModelServerUnavailable):
+        ModelServerClient(server.socket_path, authkey="wrong").call("ping")
+    with pytest.raises(ModelServerUnavailable):
+        ModelServerClient(str(tmp_path / "nothing.sock")).call("ping")
+    # The server keeps serving after a failed handshake
+    assert ModelServerClient(server.socket_path, authkey="secret").call("ping") == "pong"
+
+
+def test_sidecar_executor_runs_batches_in_the_server(server, tmp_path):
+    executor = InferenceExecutor("local", "sidecar", max_workers=2, max_queue=4)
+    executor._executor = SidecarExecutor(ModelServerClient(server.socket_path, authkey="secret"), 2)
+    items = [(b"not an image", "pizza.jpg"), (b"not an image", "salad.jpg")]
+
+    results = asyncio.run(executor.run(ai_service.parse_image_meal_local_batch, items, timeout=10))
+
+    assert results == ai_service.parse_image_meal_local_batch(items)
+    executor.shutdown()
+
+    offline = InferenceExecutor("local", "sidecar", max_workers=1, max_queue=1)
+    offline._executor = SidecarExecutor(ModelServerClient(str(tmp_path / "nothing.sock")), 1)
+    with pytest.raises(InferenceBusyError):
+        asyncio.run(offline.run(ai_service.parse_image_meal_local_batch, items, timeout=10))
+    assert offline.stats()["rejected"] == 1
+    offline.shutdown()
+
+
+def test_sidecar_model_errors_are_busy_and_client_threads_cover_admissions(monkeypatch):
+    from services import inference
+
+    class FailingClient:
+        def call(self, name, *args, timeout=None):
+            assert timeout is not None and timeout <= 11
+            raise ModelServerError("CUDA out of memory")
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(inference, "model_server_client", lambda: FailingClient())
+    executor = InferenceExecutor("local", "sidecar", max_workers=1, max_queue=4)
+    # One client thread per admitted job, not per INFERENCE_LOCAL_WORKERS
+    assert executor._get_executor()._threads._max_workers == 5
+
+    with pytest.raises(InferenceBusyError, match="out of memory"):
+        asyncio.run(executor.run(ai_service.parse_image_meal_local_batch, [], timeout=10))
+    assert executor.stats()["rejected"] == 1
+    executor.shutdown()
+
+
+def test_image_warm_up_runs_in_the_model_server(monkeypatch):
+    from services import warmup
+
+    calls = []
+
+    class FakeClient:
+        def call(self, name, *args, timeout=None):
+            calls.append(name)
+            return True
+
+    monkeypatch.setattr(ai_service, "MODEL_SERVER_SOCKET", "/tmp/models.sock")
+    monkeypatch.setattr(ai_service, "model_server_client", lambda path: FakeClient())
+    monkeypatch.setattr(ai_service, "load_image_model", lambda: pytest.fail("loaded CLIP in the API process"))
+
+    assert asyncio.run(warmup._warm_image()) is True
+    assert calls == ["warm_up_image_model"]
+
+
+def test_main_loads_the_catalogue_and_serves(monkeypatch, tmp_path):
+    from services import food_catalogue, model_server
+
+    served = []
+
+    class FakeServer:
+        def __init__(self, socket_path):
+            self.socket_path = socket_path
+
+        def serve_forever(self):
+            served.append(self.socket_path)
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(ai_service, "MODEL_SERVER_SOCKET", None)
+    monkeypatch.setattr(food_catalogue, "refresh_catalogue", lambda: served.append("catalogue"))
+    monkeypatch.setattr(model_server, "ModelServer", FakeServer)
+
+    model_server.main(["--socket", str(tmp_path / "models.sock"), "--preload", ""])
+
+    assert served == ["catalogue", str(tmp_path / "models.sock")]
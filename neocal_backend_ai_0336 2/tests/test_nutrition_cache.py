@@ -0,0 +1,44 @@
+import pytest
+
+from database.db import engine
+from services import food_catalogue
+from services.food_catalogue import import_records, refresh_catalogue
+from services.nutrition_service import (
+    NutritionCache, lookup_food_nutrition, nutrition_for_grams, nutrition_cache, scale_nutrition_by_grams,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    nutrition_cache.clear()
+    yield
+    food_catalogue._snapshot = None
+    nutrition_cache.clear()
+
+
+def test_matches_uncached_scaling():
+    for name, key, grams in [("Grilled Chicken", None, 150), ("eggs", None, 100), ("x", "broccoli", 80.5)]:
+        expected = scale_nutrition_by_grams(lookup_food_nutrition(name, key), grams)
+        assert nutrition_for_grams(name, grams, key) == (
+            expected["calories"], expected["protein_g"], expected["carbs_g"], expected["fat_g"]
+        )
+
+
+def test_lru_is_bounded_and_keyed_by_normalised_name():
+    cache = NutritionCache(max_size=2)
+    cache.get("Bananas")
+    cache.get("banana")  # same normalised name
+    cache.get("rice")
+    cache.get("salmon")
+
+    stats = cache.stats()
+    assert (stats["size"], stats["hits"], stats["misses"]) == (2, 1, 3)
+
+
+def test_catalogue_refresh_invalidates(db):
+    before = nutrition_for_grams("greek yogurt", 100)
+    import_records([{"name": "Greek Yogurt", "calories": 97, "protein_g": 9, "carbs_g": 3.6, "fat_g": 5}], engine)
+    refresh_catalogue(engine)
+
+    assert nutrition_for_grams("greek yogurt", 100) == pytest.approx((97, 9, 3.6, 5))
+    assert before != nutrition_for_grams("greek yogurt", 100)
@@ -0,0 +1,30 @@
+from services import onnx_backend, recognition_cache
+
+
+def test_intra_op_threads_share_cores_between_pool_workers(monkeypatch):
+    monkeypatch.setattr(onnx_backend.os, "cpu_count", lambda: 8)
+    monkeypatch.setattr(onnx_backend, "ONNX_INTRA_OP_THREADS", 0)
+
+    assert onnx_backend.intra_op_threads(workers=1) == 8
+    assert onnx_backend.intra_op_threads(workers=3) == 2
+    assert onnx_backend.intra_op_threads(workers=16) == 1
+
+    monkeypatch.setattr(onnx_backend, "ONNX_INTRA_OP_THREADS", 4)
+    assert onnx_backend.intra_op_threads(workers=1) == 4
+
+
+def test_exports_are_cached_per_model_revision_and_precision(tmp_path):
+    fp32 = onnx_backend.onnx_model_dir("openai/clip-vit-base-patch32", "abcdef0123456789", False, str(tmp_path))
+    int8 = onnx_backend.onnx_model_dir("openai/clip-vit-base-patch32", "abcdef0123456789", True, str(tmp_path))
+
+    assert fp32 != int8
+    assert fp32.startswith(str(tmp_path))
+    assert "/" not in fp32[len(str(tmp_path)) + 1:]
+    assert "abcdef012345" in fp32 and int8.endswith("-int8")
+
+
+def test_backend_is_part_of_the_recognition_signature(monkeypatch):
+    before = recognition_cache.pipeline_signature()
+    monkeypatch.setattr(recognition_cache, "MODEL_BACKEND", "onnx-int8")
+
+    assert recognition_cache.pipeline_signature() != before
@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+from services import ai_service, inference
+from services.recognition_cache import RecognitionCache, image_cache_key
+
+FOODS = [{"name": "pizza", "grams": 250, "model_label": "pizza", "confidence": 0.9}]
+
+
+def test_lru_evicts_oldest_and_reports_saved_time():
+    cache = RecognitionCache(max_size=2, db_path=None)
+    cache.put("a", FOODS, 1.5)
+    cache.put("b", FOODS, 2.0)
+    cache.get("a")
+    cache.put("c", FOODS, 0.5)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == FOODS
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["saved_inference_seconds"] == 3.0
+
+
+def test_returned_results_are_copies():
+    cache = RecognitionCache(max_size=4, db_path=None)
+    cache.put("a", FOODS, 1.0)
+    cache.get("a")[0]["name"] = "mutated"
+    assert cache.get("a")[0]["name"] == "pizza"
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "recognition.db")
+    RecognitionCache(max_size=4, db_path=path).put("k", FOODS, 3.0)
+
+    fresh = RecognitionCache(max_size=4, db_path=path)
+    assert fresh.get("k") == FOODS
+    assert fresh.stats()["disk_hits"] == 1
+
+
+def test_disk_tier_prunes_expired_and_surplus_rows(tmp_path):
+    path = str(tmp_path / "recognition.db")
+    cache = RecognitionCache(max_size=0, db_path=path, ttl_seconds=3600)
+    for i in range(5):
+        cache.put(f"k{i}", FOODS, 1.0)
+    # k0 expired; the rest written one second apart
+    now = time.time()
+    cache._db.executemany(
+        "UPDATE recognition_cache SET created_at = ? WHERE cache_key = ?",
+        [(0 if i == 0 else now - 10 + i, f"k{i}") for i in range(5)],
+    )
+    cache._db.commit()
+
+    reopened = RecognitionCache(max_size=0, db_path=path, ttl_seconds=3600, max_disk_rows=3)
+
+    keys = {k for (k,) in reopened._db.execute("SELECT cache_key FROM recognition_cache")}
+    assert keys == {"k2", "k3", "k4"}
+    assert reopened.stats()["disk_pruned"] == 2
+
+
+def test_key_changes_with_model(monkeypatch):
+    before = image_cache_key(b"same-bytes")
+    monkeypatch.setattr(ai_service, "OPENAI_API_KEY", "k")
+    monkeypatch.setattr(ai_service, "OPENAI_VISION_MODEL", "another-model")
+    assert image_cache_key(b"same-bytes") != before
+
+
+def test_rescanning_same_photo_skips_inference(monkeypatch):
+    calls = []
+
+    async def fake_recognize(image_bytes, filename, timeout):
+        calls.append(filename)
+        return [dict(f) for f in FOODS], True
+
+    monkeypatch.setattr(inference, "_recognize_image", fake_recognize)
+    monkeypatch.setattr(inference, "recognition_cache", RecognitionCache(max_size=8, db_path=None))
+
+    async def scenario():
+        first = await inference.parse_image_meal_async(b"photo", filename="a.jpg")
+        second = await inference.parse_image_meal_async(b"photo", filename="b.jpg")
+        other = await inference.parse_image_meal_async(b"other", filename="c.jpg")
+        return first, second, other
+
+    first, second, _ = asyncio.run(scenario())
+
+    assert first == second == FOODS
+    assert calls == ["a.jpg", "c.jpg"]
+    assert inference.recognition_cache.stats()["hits"] == 1
+
+
+def test_fallback_after_a_provider_timeout_is_not_cached(monkeypatch):
+    from services.batching import MicroBatcher
+    from services.image_hash import NearDuplicateIndex
+
+    async def timed_out(image_bytes, timeout):
+        return None  # the provider client gave up at its deadline
+
+    executor = inference.InferenceExecutor("local", "thread", max_workers=1, max_queue=4)
+    monkeypatch.setattr(inference, "OPENAI_API_KEY", "k")
+    monkeypatch.setattr(inference, "parse_image_meal_remote_async", timed_out)
+    monkeypatch.setattr(ai_service, "load_image_model", lambda: None)
+    monkeypatch.setattr(inference, "local_batcher", MicroBatcher(
+        "local", ai_service.recognize_image_meal_local_batch, executor, max_batch=4, window_ms=1
+    ))
+    monkeypatch.setattr(inference, "recognition_cache", RecognitionCache(max_size=8, db_path=None))
+    monkeypatch.setattr(inference, "near_duplicate_index", NearDuplicateIndex(threshold=6))
+
+    foods = asyncio.run(inference.parse_image_meal_async(b"photo", filename="pizza.jpg", user_id="u1"))
+
+    assert foods[0]["model_label"] == "pizza"  # the filename heuristic
+    assert inference.recognition_cache.stats()["size"] == 0
+    assert inference.near_duplicate_index.stats()["entries"] == 0
+    executor.shutdown()
@@ -0,0 +1,65 @@
+import concurrent.futures
+
+from services import ai_service
+from services.text_parser import parse_text_meal_fast
+
+
+def _summary(foods):
+    return [(f["nutrition_key"], f["grams"]) for f in foods]
+
+
+def test_counts_units_and_servings():
+    assert _summary(parse_text_meal_fast("2 eggs and toast")) == [("egg", 100.0), ("bread", 30.0)]
+    assert _summary(parse_text_meal_fast("200g chicken breast with a cup of rice")) == [
+        ("chicken_breast", 200.0), ("rice", 200.0)
+    ]
+    assert _summary(parse_text_meal_fast("1/2 cup rice and 2 slices of bread")) == [("rice", 100.0), ("bread", 60.0)]
+    assert _summary(parse_text_meal_fast("a large burger and fries")) == [("burger", 308.0), ("fries", 120.0)]
+
+
+def test_weight_after_food_and_longest_match():
+    assert _summary(parse_text_meal_fast("chicken 200g and rice")) == [("chicken", 200.0), ("rice", 150.0)]
+    # "scrambled eggs" is one vocabulary entry, matched through its plural
+    foods = parse_text_meal_fast("3 scrambled eggs")
+    assert [f["name"] for f in foods] == ["scrambled eggs"]
+    assert foods[0]["grams"] == 150.0
+
+
+def test_unknown_words_fall_through():
+    assert parse_text_meal_fast("a bowl of oatmeal with banana") is None
+    assert parse_text_meal_fast("mom's famous casserole") is None
+    assert parse_text_meal_fast("") is None
+    # A lower bar accepts partial parses
+    assert _summary(parse_text_meal_fast("a bowl of oatmeal with banana", min_coverage=0.75)) == [("banana", 120.0)]
+
+
+def test_parse_text_meal_uses_fast_path_before_the_model(monkeypatch):
+    def no_model():
+        raise AssertionError("fast path should have answered")
+
+    monkeypatch.setattr(ai_service, "load_text_model", no_model)
+    before = ai_service.text_parse_stats["fast_path"]
+
+    foods = ai_service.parse_text_meal("greek yogurt with berries")
+
+    assert [f["model_label"] for f in foods] == ["yogurt", "fruit"]
+    assert ai_service.text_parse_stats["fast_path"] == before + 1
+
+
+
+def test_trailing_counts_apply_to_the_food_before_them():
+    assert _summary(parse_text_meal_fast("eggs 2")) == [("egg", 100.0)]
+    assert _summary(parse_text_meal_fast("eggs x2")) == [("egg", 100.0)]
+    assert _summary(parse_text_meal_fast("rice 2")) == [("rice", 300.0)]
+    assert _summary(parse_text_meal_fast("eggs 3 and toast")) == [("egg", 150.0), ("bread", 30.0)]
+    assert _summary(parse_text_meal_fast("rice 2 cups")) == [("rice", 400.0)]
+    # A count before the next food still belongs to that food
+    assert _summary(parse_text_meal_fast("eggs and 2 toast")) == [("egg", 50.0), ("bread", 60.0)]
+
+def test_fast_path_counts_are_exact_across_threads():
+    before = ai_service.text_parsing_stats()["fast_path"]
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(ai_service.parse_text_meal, ["2 eggs and toast"] * 400))
+
+    assert ai_service.text_parsing_stats()["fast_path"] == before + 400
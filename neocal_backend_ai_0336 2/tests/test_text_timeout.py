@@ -0,0 +1,56 @@
+import json
+import threading
+import time
+
+import pytest
+
+from services import ai_service
+
+
+class FakeGPT2:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.kwargs = None
+        self.done = threading.Event()
+
+    def __call__(self, prompt, **kwargs):
+        self.kwargs = kwargs
+        time.sleep(self.delay)
+        self.done.set()
+        foods = {"foods": [{"name": "Omelette", "grams": 180}]}
+        return [{"generated_text": json.dumps(foods)}]
+
+
+@pytest.fixture
+def gpt2(monkeypatch):
+    def install(delay):
+        model = FakeGPT2(delay)
+        monkeypatch.setattr(ai_service, "pipeline", object())
+        monkeypatch.setattr(ai_service, "load_text_model", lambda: model)
+        return model
+    return install
+
+
+def test_generation_within_budget_is_used(gpt2):
+    model = gpt2(delay=0.0)
+
+    foods = ai_service.parse_text_meal("breakfast", timeout=5)
+
+    assert [(f["name"], f["grams"]) for f in foods] == [("omelette", 180.0)]
+    assert 0 < model.kwargs["max_time"] <= 5
+
+
+def test_slow_generation_returns_fallback_at_the_deadline(gpt2):
+    model = gpt2(delay=1.0)
+    timed_out = ai_service.text_parse_stats["timed_out"]
+
+    start = time.monotonic()
+    foods = ai_service.parse_text_meal("grandma's famous casserole", timeout=0.2)
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 0.8
+    assert foods == ai_service._parse_text_meal_fallback("grandma's famous casserole")
+    assert ai_service.text_parse_stats["timed_out"] == timed_out + 1
+    # The abandoned generation was told to stop at the same deadline
+    assert model.done.wait(2.0)
+    assert model.kwargs["max_time"] <= 0.2
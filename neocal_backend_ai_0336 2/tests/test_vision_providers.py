@@ -0,0 +1,139 @@
+"""
+Hosted vision calls against a local stub standing in for OpenAI and HuggingFace.
+"""
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services import ai_service, http_clients
+from services.http_clients import CircuitBreaker, ProviderClient
+
+OPENAI_REPLY = {
+    "choices": [{"message": {"content": json.dumps({"foods": [
+        {"name": "Grilled Chicken", "grams": 150, "calories": 248,
+         "protein_g": 46, "carbs_g": 0, "fat_g": 5.4, "confidence": 0.9},
+    ]})}}]
+}
+HF_REPLY = [{"label": "pizza", "score": 0.8}, {"label": "salad", "score": 0.1}]
+
+
+class StubProviders:
+    """Serves scripted (status, body) replies per path and records connections."""
+
+    def __init__(self):
+        self.replies = {}
+        self.hits = {}
+        self.client_ports = set()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                stub.client_ports.add(self.client_address[1])
+                stub.hits[self.path] = stub.hits.get(self.path, 0) + 1
+                queue = stub.replies.get(self.path, [(404, {})])
+                status, body = queue.pop(0) if len(queue) > 1 else queue[0]
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+HF_PATH = f"/models/{ai_service.HUGGINGFACE_VISION_MODEL}"
+
+
+@pytest.fixture
+def stub(monkeypatch, tmp_path):
+    server = StubProviders()
+    monkeypatch.setattr(ai_service, "OPENAI_API_KEY", "test-openai")
+    monkeypatch.setattr(ai_service, "HUGGINGFACE_API_KEY", "test-hf")
+    monkeypatch.setitem(http_clients.providers, "openai", ProviderClient(
+        "openai", server.url + "/v1", max_retries=2, backoff=0.01,
+        breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60),
+    ))
+    monkeypatch.setitem(http_clients.providers, "huggingface", ProviderClient(
+        "huggingface", server.url, max_retries=1, backoff=0.01,
+        breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60),
+    ))
+    image = tmp_path / "meal.jpg"
+    image.write_bytes(b"\xff\xd8\xff\xe0fake-jpeg")
+    server.image = str(image)
+    yield server
+    server.close()
+
+
+def _recognize(image, calls=1):
+    async def scenario():
+        try:
+            return [
+                await ai_service.parse_image_meal_remote_async(image, timeout=5)
+                for _ in range(calls)
+            ]
+        finally:
+            await http_clients.close_http_clients()
+
+    return asyncio.run(scenario())
+
+
+def test_openai_reply_is_parsed_over_one_pooled_connection(stub):
+    stub.replies["/v1/chat/completions"] = [(200, OPENAI_REPLY)]
+
+    results = _recognize(stub.image, calls=3)
+
+    assert all(r[0]["name"] == "grilled chicken" and r[0]["calories"] == 248 for r in results)
+    assert stub.hits["/v1/chat/completions"] == 3
+    # Keep-alive: all three requests reused a single TCP connection.
+    assert len(stub.client_ports) == 1
+
+
+def test_transient_errors_are_retried(stub):
+    stub.replies["/v1/chat/completions"] = [(503, {}), (200, OPENAI_REPLY)]
+
+    [foods] = _recognize(stub.image)
+
+    assert foods[0]["name"] == "grilled chicken"
+    assert http_clients.get_provider("openai").retries == 1
+
+
+def test_falls_back_to_huggingface_when_openai_rejects(stub):
+    stub.replies["/v1/chat/completions"] = [(401, {"error": "bad key"})]
+    stub.replies[HF_PATH] = [(200, HF_REPLY)]
+
+    [foods] = _recognize(stub.image)
+
+    assert [f["name"] for f in foods] == ["pizza"]
+    # 4xx is not retried.
+    assert stub.hits["/v1/chat/completions"] == 1
+
+
+def test_circuit_opens_after_repeated_failures(stub):
+    stub.replies["/v1/chat/completions"] = [(500, {})]
+    stub.replies[HF_PATH] = [(500, {})]
+
+    results = _recognize(stub.image, calls=4)
+
+    assert results == [None] * 4
+    openai = http_clients.get_provider("openai")
+    # Two failed calls (3 attempts each) open the circuit; the rest short-circuit.
+    assert stub.hits["/v1/chat/completions"] == 6
+    assert openai.breaker.state == "open"
+    assert openai.short_circuited == 2
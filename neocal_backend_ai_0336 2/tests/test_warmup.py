@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from services import warmup
+
+
+@pytest.fixture
+def fresh_readiness(monkeypatch):
+    state = warmup.Readiness()
+    monkeypatch.setattr(warmup, "readiness", state)
+    return state
+
+
+def test_warm_up_reports_each_model(monkeypatch, fresh_readiness):
+    async def loaded():
+        await asyncio.sleep(0.01)
+        return True
+
+    async def no_ml_deps():
+        return False
+
+    monkeypatch.setattr(warmup, "WARMERS", {"text": no_ml_deps, "image": loaded})
+
+    asyncio.run(warmup.warm_up_models(["text", "image"]))
+
+    stats = fresh_readiness.stats()
+    assert stats["status"] == "ready"
+    assert stats["models"]["image"]["state"] == "ready"
+    assert stats["models"]["text"]["state"] == "fallback"
+
+
+def test_failed_warm_up_is_degraded_but_ready(monkeypatch, fresh_readiness):
+    async def broken():
+        raise RuntimeError("weights download failed")
+
+    monkeypatch.setattr(warmup, "WARMERS", {"image": broken})
+
+    asyncio.run(warmup.warm_up_models(["image", "bogus"]))
+
+    assert fresh_readiness.state == "degraded"
+    assert fresh_readiness.is_ready
+    assert fresh_readiness.models["image"]["error"] == "weights download failed"
+    assert fresh_readiness.models["bogus"]["state"] == "failed"
+
+
+def test_ready_endpoint_waits_for_warm_up(db, monkeypatch):
+    import main
+
+    release = asyncio.Event()
+
+    async def slow():
+        await release.wait()
+        return True
+
+    monkeypatch.setattr(warmup, "WARMERS", {"image": slow})
+    monkeypatch.setattr(main, "PRELOAD_MODELS", ["image"])
+
+    with TestClient(main.app) as client:
+        assert client.get("/health").status_code == 200
+        warming = client.get("/ready")
+        assert warming.status_code == 503
+        assert warming.json()["status"] == "warming"
+
+        client.portal.call(release.set)
+        for _ in range(50):
+            resp = client.get("/ready")
+            if resp.status_code == 200:
+                break
+        assert resp.json()["models"]["image"]["state"] == "ready"